@@ -15,24 +15,49 @@ Security features:
 """
 
 import os
+import math
 import time
+import asyncio
 import hashlib
 import secrets
 import logging
 from datetime import datetime, timedelta
 from functools import wraps
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-from flask import Flask, request, jsonify, g
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from dotenv import load_dotenv
-import anthropic
-import bleach
+
+from audit_log import AuditLog
+from audit_sampler import RequestSampler
+from audit_sink import AuditSink, read_tail
+from base_rpc import ADDRESS, BaseRPC, RPCError, format_eth
+from brain_client import BrainClient, ConditionalCache, is_timeout, parse_route_timeouts
+from chat_sessions import CACHE_BREAKPOINT, SessionBusy, SessionStore
+from circuit_breaker import CircuitBreaker, CircuitOpenError, LastGood
+from claude_client import ClaudeClientManager
+from compression import Compressor
+from field_selector import compile_fields
+from heavy_hitters import WindowedHeavyHitters
+from ip_blocklist import CidrBlocklist
+from lazy_imports import lazy_import
+import json_codec
+from json_codec import JSONBody, JSONProvider, content_etag
+from metrics import Registry
+from path_classifier import PathClassifier
+from pulse_stream import PulseBroadcaster
+import rate_limit_store  # registers the shm:// limiter storage
+from snapshot_cache import SnapshotCache
+from static_responses import PrecomputedResponse
+from threat_store import open_threat_store
 
 load_dotenv()
 
+bleach = lazy_import('bleach')  # first sanitize_input() call pays for it
+
 # =============================================================================
 # SECURITY CONFIGURATION
 # =============================================================================
@@ -60,6 +85,8 @@ class SecurityConfig:
     RATE_LIMIT_DEFAULT = "100 per hour"
     RATE_LIMIT_CHAT = "10 per minute"  # Claude API is expensive
     RATE_LIMIT_STRICT = "5 per minute"  # For sensitive endpoints
+    # 'memory://' counts per worker; 'shm:///dev/shm/b0b-ratelimit' is shared by all workers on the host
+    RATE_LIMIT_STORAGE = os.getenv('RATE_LIMIT_STORAGE', 'memory://')
     
     # API Key settings
     API_KEY_HEADER = 'X-B0B-API-Key'
@@ -72,22 +99,110 @@ class SecurityConfig:
     # Threat detection
     BLOCK_THRESHOLD = 10  # Block IP after N violations
     BLOCK_DURATION = 3600  # 1 hour block
+    VIOLATION_WINDOW = int(os.getenv('VIOLATION_WINDOW', '3600'))  # Sliding window for BLOCK_THRESHOLD
+    
+    # Threat state: 'memory' (per worker) or 'shm' (shared by all workers on the host)
+    THREAT_STORE = os.getenv('THREAT_STORE', 'memory')
+    THREAT_STORE_PATH = os.getenv('THREAT_STORE_PATH', '/dev/shm/b0b-threats')
+    THREAT_STORE_MAX_IPS = int(os.getenv('THREAT_STORE_MAX_IPS', '65536'))
+    
+    # CIDR blocklist: feed file (one CIDR per line, hot reloaded) + admin range blocks
+    BLOCKLIST_PATH = os.getenv('BLOCKLIST_PATH', '')
+    BLOCKLIST_RELOAD_INTERVAL = float(os.getenv('BLOCKLIST_RELOAD_INTERVAL', '30'))
+    BLOCKLIST_FEED_TTL = float(os.getenv('BLOCKLIST_FEED_TTL', '0'))  # 0 = feed ranges never expire
+    
+    # Approximate top-K violators / request sources, per minute, in fixed memory
+    HEAVY_HITTERS_K = int(os.getenv('HEAVY_HITTERS_K', '10'))
+    HEAVY_HITTERS_CAPACITY = int(os.getenv('HEAVY_HITTERS_CAPACITY', '256'))  # counters per minute
     
-    # Honeypot paths (attackers love these)
-    HONEYPOT_PATHS = [
-        '/admin', '/wp-admin', '/phpmyadmin', '/.env',
-        '/config', '/backup', '/.git', '/api/admin',
-        '/login', '/wp-login.php', '/administrator',
+    # Audit log ring buffer (oldest events are overwritten)
+    AUDIT_LOG_CAPACITY = int(os.getenv('AUDIT_LOG_CAPACITY', '10000'))
+    
+    # Durable audit trail: batched JSONL (size-rotated) + stdout, written off the request path
+    AUDIT_LOG_PATH = os.getenv('AUDIT_LOG_PATH', 'logs/audit.jsonl')
+    AUDIT_LOG_MAX_BYTES = int(os.getenv('AUDIT_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+    AUDIT_LOG_BACKUPS = int(os.getenv('AUDIT_LOG_BACKUPS', '5'))
+    AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', '50000'))
+    AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '0.5'))
+    
+    # Benign REQUEST audit events: 'security' (none), 'sampled' or 'full'.
+    # Violations, blocks and probes are always recorded. See audit_sampler.py.
+    AUDIT_LEVEL = os.getenv('AUDIT_LEVEL', 'sampled')
+    AUDIT_SAMPLING = os.getenv('AUDIT_SAMPLING', 'bucket')  # 'bucket' (per IP) or 'rate'
+    AUDIT_SAMPLE_RATE = float(os.getenv('AUDIT_SAMPLE_RATE', '0.01'))
+    AUDIT_BUCKET_BURST = int(os.getenv('AUDIT_BUCKET_BURST', '3'))
+    AUDIT_BUCKET_REFILL = float(os.getenv('AUDIT_BUCKET_REFILL', '60'))
+    AUDIT_SUMMARY_INTERVAL = float(os.getenv('AUDIT_SUMMARY_INTERVAL', '60'))
+    
+    # Honeypot / scanner-probe rules: (pattern, severity). Severity is the
+    # number of violations a hit counts for. See path_classifier.py for syntax.
+    HONEYPOT_RULES = [
+        ('/admin/**', 1), ('/administrator/**', 1), ('/api/admin/**', 1),
+        ('/login', 1), ('/config/**', 1), ('/backup/**', 1),
+        ('/wp-admin/**', 2), ('/wp-login.php', 2), ('/wp-content/**', 2),
+        ('/wp-includes/**', 2), ('/xmlrpc.php', 2), ('/phpmyadmin/**', 2),
+        ('/pma/**', 2), ('/cgi-bin/**', 2), ('/actuator/**', 2),
+        ('/server-status', 2), ('/vendor/phpunit/**', 3),
+        ('**/*.php', 1), ('**/*.asp', 1), ('**/*.aspx', 1), ('**/*.jsp', 1),
+        ('/.env*', 3), ('**/.env', 3), ('/.git/**', 3), ('/.svn/**', 3),
+        ('/.aws/**', 3), ('/.ssh/**', 3), ('**/id_rsa', 3),
     ]
 
 # =============================================================================
 # SECURITY UTILITIES  
 # =============================================================================
 
-# In-memory threat tracking (use Redis in production)
-blocked_ips = {}
-violation_counts = defaultdict(int)
-request_log = []
+# Compiled once - classification is one trie walk, however many rules
+honeypot_classifier = PathClassifier(SecurityConfig.HONEYPOT_RULES)
+
+# Threat tracking - bounded, TTL-expiring, optionally shared across workers
+threat_store = open_threat_store(
+    SecurityConfig.THREAT_STORE,
+    path=SecurityConfig.THREAT_STORE_PATH,
+    window=SecurityConfig.VIOLATION_WINDOW,
+    max_entries=SecurityConfig.THREAT_STORE_MAX_IPS,
+)
+cidr_blocklist = CidrBlocklist(
+    path=SecurityConfig.BLOCKLIST_PATH,
+    reload_interval=SecurityConfig.BLOCKLIST_RELOAD_INTERVAL,
+    feed_ttl=SecurityConfig.BLOCKLIST_FEED_TTL or None,
+)
+request_log = AuditLog(capacity=SecurityConfig.AUDIT_LOG_CAPACITY)
+
+# Space-Saving summaries per minute over the violation window - memory stays
+# flat however many IPs a distributed scan uses (per worker, like memory://)
+HEAVY_HITTER_WINDOWS = max(1, math.ceil(SecurityConfig.VIOLATION_WINDOW / 60))
+top_violators = WindowedHeavyHitters(
+    k=SecurityConfig.HEAVY_HITTERS_K,
+    capacity=SecurityConfig.HEAVY_HITTERS_CAPACITY,
+    windows=HEAVY_HITTER_WINDOWS,
+)
+top_sources = WindowedHeavyHitters(
+    k=SecurityConfig.HEAVY_HITTERS_K,
+    capacity=SecurityConfig.HEAVY_HITTERS_CAPACITY,
+    windows=HEAVY_HITTER_WINDOWS,
+)
+audit_sink = AuditSink(
+    path=SecurityConfig.AUDIT_LOG_PATH or None,
+    max_bytes=SecurityConfig.AUDIT_LOG_MAX_BYTES,
+    backups=SecurityConfig.AUDIT_LOG_BACKUPS,
+    max_queue=SecurityConfig.AUDIT_QUEUE_SIZE,
+    flush_interval=SecurityConfig.AUDIT_FLUSH_INTERVAL,
+)
+
+request_sampler = RequestSampler(
+    level=SecurityConfig.AUDIT_LEVEL,
+    mode=SecurityConfig.AUDIT_SAMPLING,
+    sample_rate=SecurityConfig.AUDIT_SAMPLE_RATE,
+    burst=SecurityConfig.AUDIT_BUCKET_BURST,
+    refill_interval=SecurityConfig.AUDIT_BUCKET_REFILL,
+    summary_interval=SecurityConfig.AUDIT_SUMMARY_INTERVAL,
+    max_ips=SecurityConfig.THREAT_STORE_MAX_IPS,
+)
+
+# Restarts keep the recent audit trail: replay the file tail into the ring buffer
+for _at, _entry in read_tail(audit_sink.path, SecurityConfig.AUDIT_LOG_CAPACITY):
+    request_log.append(_entry, now=_at)
 
 def get_client_ip():
     """Get real client IP, handling proxies"""
@@ -98,27 +213,23 @@ def get_client_ip():
     return request.remote_addr or '0.0.0.0'
 
 def is_ip_blocked(ip):
-    """Check if IP is currently blocked"""
-    if ip in blocked_ips:
-        if time.time() < blocked_ips[ip]:
-            return True
-        else:
-            del blocked_ips[ip]
-            violation_counts[ip] = 0
-    return False
+    """Check if IP is currently blocked - by a CIDR range or its own violations (expired blocks reset the IP)"""
+    return cidr_blocklist.contains(ip) or threat_store.is_blocked(ip)
 
-def record_violation(ip, reason):
-    """Record a security violation and potentially block"""
-    violation_counts[ip] += 1
-    log_security_event('VIOLATION', ip, reason, violation_counts[ip])
+def record_violation(ip, reason, severity=1):
+    """Record a security violation (severity = violations it counts for) and potentially block"""
+    count = threat_store.record_violation(ip, weight=severity)
+    top_violators.add(ip, severity)
+    log_security_event('VIOLATION', ip, reason, count)
     
-    if violation_counts[ip] >= SecurityConfig.BLOCK_THRESHOLD:
-        blocked_ips[ip] = time.time() + SecurityConfig.BLOCK_DURATION
-        log_security_event('IP_BLOCKED', ip, f'Blocked for {SecurityConfig.BLOCK_DURATION}s', violation_counts[ip])
+    if count >= SecurityConfig.BLOCK_THRESHOLD:
+        threat_store.block(ip, time.time() + SecurityConfig.BLOCK_DURATION)
+        SECURITY_EVENTS.inc('IP_BLOCKED')
+        log_security_event('IP_BLOCKED', ip, f'Blocked for {SecurityConfig.BLOCK_DURATION}s', count)
         return True
     return False
 
-def log_security_event(event_type, ip, details, count=None):
+def log_security_event(event_type, ip, details, count=None, **fields):
     """Audit log for security events"""
     entry = {
         'timestamp': datetime.utcnow().isoformat(),
@@ -126,15 +237,12 @@ def log_security_event(event_type, ip, details, count=None):
         'ip': ip,
         'details': details,
         'violation_count': count,
+        **fields,
     }
     request_log.append(entry)
     
-    # Keep log bounded
-    if len(request_log) > 10000:
-        request_log.pop(0)
-    
-    # Also log to stdout for Railway logs
-    logging.warning(f"[SECURITY] {event_type}: {ip} - {details}")
+    # JSONL file + stdout for Railway logs, batched on a background thread
+    audit_sink.submit(entry)
 
 def sanitize_input(text, max_length=None):
     """Sanitize user input - strip dangerous content"""
@@ -160,6 +268,7 @@ def constant_time_compare(a, b):
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = SecurityConfig.MAX_REQUEST_SIZE
+app.json = JSONProvider(app)  # orjson-backed jsonify when available
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -168,17 +277,51 @@ logger = logging.getLogger(__name__)
 # Strict CORS - allowlist only
 CORS(app, 
      origins=SecurityConfig.ALLOWED_ORIGINS,
-     allow_headers=['Content-Type', 'Authorization', SecurityConfig.API_KEY_HEADER],
+     allow_headers=['Content-Type', 'Authorization', 'Cache-Control', SecurityConfig.API_KEY_HEADER],
      methods=['GET', 'POST', 'OPTIONS'],
      max_age=600)
 
-# Rate limiter
+# Rate limiter (atomic sliding-window counters when limits supports them)
 limiter = Limiter(
     app=app,
     key_func=get_client_ip,
     default_limits=[SecurityConfig.RATE_LIMIT_DEFAULT],
-    storage_uri="memory://",
+    storage_uri=SecurityConfig.RATE_LIMIT_STORAGE,
+    strategy=rate_limit_store.STRATEGY,
+)
+
+# =============================================================================
+# METRICS (Prometheus text format on /api/internal/metrics)
+# =============================================================================
+
+metrics = Registry()
+REQUEST_LATENCY = metrics.histogram(
+    'b0b_request_duration_seconds', 'Gateway request latency by route and status',
+    labels=('method', 'route', 'status'),
 )
+# The request method is client-controlled: anything else is counted as 'other'
+METRIC_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+UPSTREAM_LATENCY = metrics.histogram(
+    'b0b_upstream_duration_seconds', 'Brain call latency by target path and status',
+    labels=('method', 'path', 'status'),
+)
+RATE_LIMITED = metrics.counter(
+    'b0b_rate_limited_total', 'Requests rejected by the rate limiter', labels=('route',),
+)
+SECURITY_EVENTS = metrics.counter(
+    'b0b_security_events_total', 'IP blocks, blocked requests and honeypot hits', labels=('event',),
+)
+
+CIRCUIT_TRANSITIONS = metrics.counter(
+    'b0b_circuit_transitions_total', 'Upstream circuit breaker state changes', labels=('upstream', 'state'),
+)
+
+def observe_upstream(method, path, status, seconds):
+    UPSTREAM_LATENCY.observe(seconds, method, path, str(status))
+
+def on_circuit_change(name, old, new):
+    CIRCUIT_TRANSITIONS.inc(name, new)
+    logger.warning(f"Circuit {name}: {old} -> {new}")
 
 # =============================================================================
 # SECURITY MIDDLEWARE
@@ -190,23 +333,50 @@ def security_checkpoint():
     ip = get_client_ip()
     g.request_start = time.time()
     g.client_ip = ip
+    top_sources.add(ip)
     
     # Check if IP is blocked
     if is_ip_blocked(ip):
+        SECURITY_EVENTS.inc('BLOCKED_REQUEST')
         log_security_event('BLOCKED_REQUEST', ip, request.path)
         return jsonify({'error': 'Access denied', 'code': 'IP_BLOCKED'}), 403
     
-    # Honeypot detection
-    if request.path.lower() in SecurityConfig.HONEYPOT_PATHS:
-        record_violation(ip, f'Honeypot triggered: {request.path}')
+    # Honeypot / scanner-probe detection
+    rule = honeypot_classifier.classify(request.path)
+    if rule is not None:
+        SECURITY_EVENTS.inc('HONEYPOT')
+        record_violation(ip, f'Honeypot triggered: {request.path} ({rule.pattern})', rule.severity)
         # Return fake "interesting" response to waste attacker time
         return jsonify({
             'error': 'Unauthorized',
             'hint': 'Try /api/v2/admin with valid credentials',
         }), 401
     
-    # Log request for audit
-    log_security_event('REQUEST', ip, f'{request.method} {request.path}')
+    # Log request for audit - benign traffic is sampled, but always counted
+    represents = request_sampler.sample(ip, request.method)
+    if represents:
+        log_security_event('REQUEST', ip, f'{request.method} {request.path}', represents=represents)
+    summary = request_sampler.summary()
+    if summary is not None:
+        log_security_event('REQUEST_SUMMARY', '-', f"{summary['requests']} requests", **summary)
+
+# gzip/brotli on Accept-Encoding for JSON bodies of COMPRESS_MIN_BYTES and up
+compressor = Compressor(min_bytes=int(os.getenv('COMPRESS_MIN_BYTES', '1024')))
+
+@app.after_request
+def compress_response(response):
+    """Negotiated compression - registered first, so it runs after every other after_request hook"""
+    return compressor.apply(response, request.headers.get('Accept-Encoding'), shared=g.get('shared_body', False))
+
+@app.after_request
+def record_request_metrics(response):
+    """Per-route, per-status latency (route template and known methods, so label cardinality stays bounded)"""
+    started = g.get('request_start')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        method = request.method if request.method in METRIC_METHODS else 'other'
+        REQUEST_LATENCY.observe(time.time() - started, method, route, str(response.status_code))
+    return response
 
 @app.after_request
 def add_security_headers(response):
@@ -228,9 +398,13 @@ def add_security_headers(response):
     # Remove server identification
     response.headers['Server'] = 'B0B'
     
-    # Cache control for API responses
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, private'
-    response.headers['Pragma'] = 'no-cache'
+    # Cache control for API responses (precomputed routes set their own)
+    cache_control = g.get('cache_control')
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    else:
+        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, private'
+        response.headers['Pragma'] = 'no-cache'
     
     return response
 
@@ -259,21 +433,188 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated
 
+# =============================================================================
+# UPSTREAM I/O — inline under WSGI, awaited on the event loop under ASGI
+# =============================================================================
+
+# Event-loop clients ('brain'), installed by asgi.py in async mode
+async_clients = {}
+
+class UpstreamCall:
+    """The upstream I/O step of a view, split out so asgi.py can await it"""
+
+    def __init__(self, call, acall, render, on_error):
+        self.call = call          # () -> result, blocking
+        self.acall = acall        # async () -> result
+        self.render = render      # result -> Flask response value
+        self.on_error = on_error  # exception -> Flask response value
+
+    def run(self):
+        try:
+            result = self.call()
+        except Exception as e:
+            return self.on_error(e)
+        return self.render(result)
+
+    async def run_async(self):
+        try:
+            result = await self.acall()
+        except Exception as e:
+            return self.on_error(e)
+        return self.render(result)
+
+def upstream(call, acall, render, on_error):
+    """Run an upstream call now (WSGI) or hand it to the event loop (ASGI)"""
+    step = UpstreamCall(call, acall, render, on_error)
+    if g.get('asgi'):
+        return step
+    return step.run()
+
+class UpstreamStream:
+    """A streamed upstream relay: gen() yields body chunks, agen() is its async twin"""
+
+    def __init__(self, gen, agen, mimetype):
+        self.gen = gen
+        self.agen = agen
+        self.mimetype = mimetype
+
+    def response(self, body=None):
+        response = Response(body if body is not None else iter(()), mimetype=self.mimetype)
+        response.headers['X-Accel-Buffering'] = 'no'  # don't let proxies buffer the stream
+        return response
+
+def upstream_stream(gen, agen, mimetype='text/event-stream'):
+    """Stream an upstream call now (WSGI) or hand the async generator to the event loop (ASGI)"""
+    step = UpstreamStream(gen, agen, mimetype)
+    if g.get('asgi'):
+        return step
+    return step.response(gen())
+
+def sse(event, data):
+    """One server-sent-events frame"""
+    return f"event: {event}\ndata: {json_codec.dumps(data).decode('utf-8')}\n\n"
+
+def async_view(f):
+    """Mark a view whose upstream I/O the ASGI server runs on its event loop"""
+    f.async_view = True
+    return f
+
 # =============================================================================
 # API ENDPOINTS
 # =============================================================================
 
+# Chat response cache keyed by (model, sanitized message, max_tokens).
+# Identical concurrent requests share one Claude call. By default that is all
+# (CHAT_CACHE_TTL=0); a TTL also reuses the answer for later identical
+# requests. Clients opt out with 'Cache-Control: no-cache'.
+CHAT_CACHE_TTL = float(os.getenv('CHAT_CACHE_TTL', '0'))
+chat_cache = SnapshotCache(ttl=CHAT_CACHE_TTL, max_entries=int(os.getenv('CHAT_CACHE_SIZE', '512')))
+
+# Multi-turn sessions: history kept server-side within a token budget, idle
+# sessions expire (per worker - a session lives in the process that made it)
+chat_sessions = SessionStore(
+    max_sessions=int(os.getenv('CHAT_SESSIONS_MAX', '1000')),
+    idle_ttl=float(os.getenv('CHAT_SESSION_IDLE_TTL', '1800')),
+    max_tokens=int(os.getenv('CHAT_HISTORY_TOKENS', '8000')),
+)
+# Stable system prompt, sent as a prompt-cache breakpoint ahead of the history
+CHAT_SYSTEM_PROMPT = os.getenv('CHAT_SYSTEM_PROMPT', '')
+
+def chat_cache_key(params):
+    """Stable digest of the request fields that determine the answer"""
+    raw = '\x00'.join([params['model'], str(params['max_tokens']), params['messages'][-1]['content']])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+CHAT_MODELS = [
+    'claude-3-5-sonnet-20241022',
+    'claude-3-opus-20250219', 
+    'claude-3-haiku-20250307',
+    'claude-sonnet-4-20250514',
+    'claude-opus-4-20250514',
+]
+
+def chat_params():
+    """Validate and sanitize a chat request into (messages.create params, error response)"""
+    data = request.get_json()
+    
+    if not data or 'message' not in data:
+        return None, (jsonify({'error': 'Message required'}), 400)
+    
+    # Sanitize input
+    message = sanitize_input(
+        data['message'], 
+        max_length=SecurityConfig.MAX_MESSAGE_LENGTH
+    )
+    
+    if len(message) < 1:
+        return None, (jsonify({'error': 'Message too short'}), 400)
+    
+    # Validate model selection (prevent injection)
+    model = data.get('model', 'claude-3-5-sonnet-20241022')
+    if model not in CHAT_MODELS:
+        record_violation(g.client_ip, f'Invalid model requested: {model}')
+        model = 'claude-3-5-sonnet-20241022'
+    
+    params = {
+        'model': model,
+        'max_tokens': 1024,
+        'messages': [
+            {
+                'role': 'user',
+                'content': message
+            }
+        ]
+    }
+    if CHAT_SYSTEM_PROMPT:
+        params['system'] = [{'type': 'text', 'text': CHAT_SYSTEM_PROMPT, 'cache_control': CACHE_BREAKPOINT}]
+    return params, None
+
+def chat_session(params):
+    """Start a session turn if the request asks for one: (session or None, error response)
+
+    {"session": true} opens a new session, {"session_id": ...} continues
+    one; the session's history is put in front of the new message.
+    """
+    data = request.get_json()
+    session_id = data.get('session_id')
+    if session_id is None and not data.get('session'):
+        return None, None
+    if session_id is not None and (not isinstance(session_id, str) or len(session_id) > 64):
+        return None, (jsonify({'error': 'Invalid session_id'}), 400)
+    try:
+        session = chat_sessions.acquire(session_id)
+    except KeyError:
+        return None, (jsonify({'error': 'Unknown or expired session', 'code': 'SESSION_EXPIRED'}), 404)
+    except SessionBusy:
+        return None, (jsonify({'error': 'Session is busy with another message', 'code': 'SESSION_BUSY'}), 409)
+    params['messages'] = session.messages(params['messages'][-1]['content'])
+    return session, None
+
+def usage_fields(usage):
+    """Token usage of a Messages API response, including prompt-cache reads and writes"""
+    return {
+        'input_tokens': usage.input_tokens,
+        'output_tokens': usage.output_tokens,
+        'cache_read_input_tokens': getattr(usage, 'cache_read_input_tokens', None) or 0,
+        'cache_creation_input_tokens': getattr(usage, 'cache_creation_input_tokens', None) or 0,
+    }
+
+# Process-wide Anthropic clients - rebuilt when CLAUDE_API_KEY rotates (the old
+# one closed after its in-flight calls), fork-safe. Calls go through claude.lease()
+claude = ClaudeClientManager(
+    'CLAUDE_API_KEY',
+    max_connections=int(os.getenv('CLAUDE_MAX_CONNECTIONS', '20')),
+    max_keepalive=int(os.getenv('CLAUDE_KEEPALIVE_CONNECTIONS', '10')),
+)
+
 def get_anthropic_client():
-    """Get or create Anthropic client"""
-    api_key = os.getenv('CLAUDE_API_KEY')
-    if not api_key:
-        raise ValueError("CLAUDE_API_KEY environment variable not set")
-    return anthropic.Anthropic(api_key=api_key)
+    """Get the shared Anthropic client"""
+    return claude.get()
 
-@app.route('/', methods=['GET'])
-def root():
-    """Root endpoint - API info"""
-    return jsonify({
+# Metadata bodies are serialized once at startup and served with ETags
+def root_info():
+    """Root endpoint body - API info"""
+    return {
         'name': 'B0B API',
         'version': '3.0.0',
         'description': 'Swarm intelligence gateway - connects to the brain',
@@ -282,8 +623,11 @@ def root():
             '/': 'This info',
             '/api/health': 'Health check',
             '/api/chat': 'Chat with Claude (POST, rate limited)',
+            '/api/chat/stream': 'Chat with Claude, streamed as SSE (POST, rate limited)',
+            '/api/chat/sessions/<id>': 'End a multi-turn chat session (DELETE)',
             '/api/v1/status': 'Platform status',
             '/api/swarm/pulse': '🧠 Full swarm status (agents, signals, treasury)',
+            '/api/swarm/stream': '📺 Live pulse as SSE - only changed sections are pushed',
             '/api/swarm/agents': '🤖 Agent states (d0t, b0b, r0ss, c0m)',
             '/api/swarm/treasury': '💰 Treasury balance',
             '/api/swarm/signals': '📡 D0T market signals',
@@ -291,128 +635,268 @@ def root():
             '/api/swarm/tasks': '📋 Pending tasks',
             '/api/swarm/turb0': '⚡ TURB0 trading dashboard',
             '/api/crawlers': '🔄 Crawler status',
+            '/api/swarm/batch': '📦 Several swarm sections in one call (?sections=pulse,tasks,turb0,crawlers)',
+            '?fields=': 'Sparse fieldsets on brain proxy routes, e.g. /api/swarm/pulse?fields=agentStates.d0t,treasury.balance',
         },
         'brain_url': os.getenv('BRAIN_URL', 'https://brain.b0b.dev'),
         'mantra': "We're Bob Rossing this. 🎨"
-    }), 200
+    }
 
-@app.route('/api/health', methods=['GET'])
-def health():
-    """Health check endpoint"""
-    return jsonify({
+def health_info():
+    """Health check body"""
+    return {
         'status': 'healthy',
         'service': 'b0b-api',
         'version': '2.1.0',
         'security': 'active',
         'uptime': time.time(),
-    }), 200
+    }
+
+root_response = PrecomputedResponse(root_info, cache_control='public, max-age=300')
+# Rebuilt every few seconds so 'uptime' moves; monitors revalidate with If-None-Match
+health_response = PrecomputedResponse(
+    health_info,
+    cache_control='no-cache',
+    refresh=float(os.getenv('HEALTH_REFRESH', '5')),
+)
+
+@app.route('/', methods=['GET'])
+def root():
+    """Root endpoint - API info"""
+    return root_response.respond()
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    """Health check endpoint"""
+    return health_response.respond()
 
 @app.route('/api/chat', methods=['POST'])
 @limiter.limit(SecurityConfig.RATE_LIMIT_CHAT)
 @require_api_key
+@async_view
 def chat():
     """Claude chat endpoint - SECURED"""
     try:
-        data = request.get_json()
-        
-        if not data or 'message' not in data:
-            return jsonify({'error': 'Message required'}), 400
+        params, error = chat_params()
+        if error:
+            return error
+        model = params['model']
+        message = params['messages'][-1]['content']
+        session, error = chat_session(params)
+        if error:
+            return error
         
-        # Sanitize input
-        message = sanitize_input(
-            data['message'], 
-            max_length=SecurityConfig.MAX_MESSAGE_LENGTH
-        )
+        # Session turns depend on their history - never answered from the cache
+        use_cache = session is None and 'no-cache' not in request.headers.get('Cache-Control', '').lower()
+        cache_key = chat_cache_key(params) if use_cache else None
+        fetched = []
         
-        if len(message) < 1:
-            return jsonify({'error': 'Message too short'}), 400
+        def call():
+            fetched.append(True)
+            with claude.lease() as client:
+                return client.messages.create(**params)
         
-        # Validate model selection (prevent injection)
-        allowed_models = [
-            'claude-3-5-sonnet-20241022',
-            'claude-3-opus-20250219', 
-            'claude-3-haiku-20250307',
-            'claude-sonnet-4-20250514',
-            'claude-opus-4-20250514',
-        ]
-        model = data.get('model', 'claude-3-5-sonnet-20241022')
-        if model not in allowed_models:
-            record_violation(g.client_ip, f'Invalid model requested: {model}')
-            model = 'claude-3-5-sonnet-20241022'
+        async def acall():
+            fetched.append(True)
+            async with claude.alease() as client:
+                return await client.messages.create(**params)
         
-        # Get client
-        client = get_anthropic_client()
+        def cached_call():
+            return chat_cache.get(cache_key, call) if use_cache else call()
         
-        # Call Claude API
-        response = client.messages.create(
-            model=model,
-            max_tokens=1024,
-            messages=[
-                {
-                    'role': 'user',
-                    'content': message
-                }
-            ]
-        )
+        async def cached_acall():
+            return await chat_cache.get_async(cache_key, acall) if use_cache else await acall()
         
-        # Extract text response
-        text_content = next(
-            (block.text for block in response.content if hasattr(block, 'text')),
-            None
-        )
+        def render(response):
+            # Extract text response
+            text_content = next(
+                (block.text for block in response.content if hasattr(block, 'text')),
+                None
+            )
+            
+            if not text_content:
+                if session:
+                    chat_sessions.release(session)
+                return jsonify({'error': 'No text response from Claude'}), 500
+            
+            usage = usage_fields(response.usage)
+            body = {
+                'message': text_content,
+                'model': model,
+                'usage': usage,
+                'cached': not fetched,
+            }
+            if session:
+                chat_sessions.finish(session, message, text_content, usage)
+                body['session_id'] = session.id
+            return jsonify(body), 200
         
-        if not text_content:
-            return jsonify({'error': 'No text response from Claude'}), 500
+        def failed(e):
+            if session:
+                chat_sessions.release(session)
+            return chat_error(e)
         
-        return jsonify({
-            'message': text_content,
-            'model': model,
-            'usage': {
-                'input_tokens': response.usage.input_tokens,
-                'output_tokens': response.usage.output_tokens
-            }
-        }), 200
+        return upstream(cached_call, cached_acall, render, failed)
         
-    except ValueError as e:
+    except Exception as e:
+        return chat_error(e)
+
+def chat_error(e):
+    if isinstance(e, ValueError):
         return jsonify({'error': str(e)}), 500
+    logger.error(f"Chat error: {str(e)}")
+    return jsonify({'error': 'Internal error'}), 500
+
+@app.route('/api/chat/stream', methods=['POST'])
+@limiter.limit(SecurityConfig.RATE_LIMIT_CHAT)
+@require_api_key
+@async_view
+def chat_stream():
+    """Claude chat, streamed as server-sent events - SECURED
+
+    Frames: 'delta' {text} while generating, then 'done' {model, usage}
+    (and session_id for session turns), or 'error' {error} if generation
+    fails part-way.
+    """
+    try:
+        params, error = chat_params()
+        if error:
+            return error
+        # Fail before the stream starts if the key is missing
+        get_anthropic_client()
+        message = params['messages'][-1]['content']
+        session, error = chat_session(params)
+        if error:
+            return error
     except Exception as e:
-        logger.error(f"Chat error: {str(e)}")
-        return jsonify({'error': 'Internal error'}), 500
+        return chat_error(e)
+    
+    def done(final):
+        usage = usage_fields(final.usage)
+        frame = {
+            'model': params['model'],
+            'stop_reason': final.stop_reason,
+            'usage': usage,
+        }
+        if session:
+            reply = ''.join(block.text for block in final.content if hasattr(block, 'text'))
+            chat_sessions.finish(session, message, reply, usage)
+            frame['session_id'] = session.id
+        return sse('done', frame)
+    
+    def stream_error(e):
+        logger.error(f"Chat stream error: {str(e)}")
+        return sse('error', {'error': 'Internal error'})
+    
+    def end_turn():
+        # A turn that failed or was cut off by the client leaves no history
+        if session and session.busy_since is not None:
+            chat_sessions.release(session)
+    
+    def relay():
+        try:
+            with claude.lease() as client, client.messages.stream(**params) as stream:
+                for text in stream.text_stream:
+                    yield sse('delta', {'text': text})
+                yield done(stream.get_final_message())
+        except Exception as e:
+            yield stream_error(e)
+        finally:
+            end_turn()
+    
+    async def arelay():
+        try:
+            async with claude.alease() as client, client.messages.stream(**params) as stream:
+                async for text in stream.text_stream:
+                    yield sse('delta', {'text': text})
+                yield done(await stream.get_final_message())
+        except Exception as e:
+            yield stream_error(e)
+        finally:
+            end_turn()
+    
+    return upstream_stream(relay, arelay)
+
+@app.route('/api/chat/sessions/<session_id>', methods=['DELETE'])
+@require_api_key
+def chat_session_delete(session_id):
+    """End a chat session and drop its history - SECURED"""
+    if not chat_sessions.discard(session_id):
+        return jsonify({'error': 'Unknown or expired session'}), 404
+    return '', 204
+
+# BASE node: pooled JSON-RPC, balances cached per block (polls within a block stay in memory)
+base_rpc = BaseRPC(
+    os.getenv('BASE_RPC_URL', 'https://mainnet.base.org'),
+    pool_size=int(os.getenv('BASE_RPC_POOL_SIZE', '10')),
+    timeout=(float(os.getenv('BASE_RPC_CONNECT_TIMEOUT', '3.05')), float(os.getenv('BASE_RPC_TIMEOUT', '10'))),
+    block_time=float(os.getenv('BASE_BLOCK_TIME', '2')),
+    batch_size=int(os.getenv('BASE_RPC_BATCH_SIZE', '100')),
+    observe=observe_upstream,
+)
+BASE_MAX_ADDRESSES = int(os.getenv('BASE_MAX_ADDRESSES', '50'))
 
 @app.route('/api/base/balance', methods=['POST'])
 @limiter.limit(SecurityConfig.RATE_LIMIT_STRICT)
 @require_api_key
 def base_balance():
-    """Check BASE blockchain balance - SECURED"""
+    """Check BASE blockchain balances - SECURED
+
+    Body: {"address": "0x..."} or {"addresses": ["0x...", ...]} (up to
+    BASE_MAX_ADDRESSES). All balances are read at the same block, in wei
+    and ETH.
+    """
     try:
         data = request.get_json()
         
-        if not data or 'address' not in data:
+        if not data or ('address' not in data and 'addresses' not in data):
             return jsonify({'error': 'Address required'}), 400
         
-        # Sanitize and validate address format
-        address = sanitize_input(data['address'], max_length=50)
+        many = 'addresses' in data or isinstance(data.get('address'), list)
+        requested = data.get('addresses', data.get('address'))
+        if not isinstance(requested, list):
+            requested = [requested]
+        if not requested or len(requested) > BASE_MAX_ADDRESSES:
+            return jsonify({'error': f'Between 1 and {BASE_MAX_ADDRESSES} addresses required'}), 400
+        
+        addresses, seen = [], set()
+        for raw in requested:
+            # Sanitize and validate address format (0x + 40 hex chars)
+            address = sanitize_input(raw, max_length=50)
+            if not ADDRESS.fullmatch(address):
+                record_violation(g.client_ip, f'Invalid address format: {address[:10]}...')
+                return jsonify({'error': 'Invalid address format'}), 400
+            if address.lower() not in seen:
+                seen.add(address.lower())
+                addresses.append(address)
         
-        # Basic address validation (0x + 40 hex chars)
-        if not address.startswith('0x') or len(address) != 42:
-            record_violation(g.client_ip, f'Invalid address format: {address[:10]}...')
-            return jsonify({'error': 'Invalid address format'}), 400
+        try:
+            balances, block = base_rpc.balances(addresses)
+        except RPCError as e:
+            logger.error(f"BASE RPC error: {str(e)}")
+            return jsonify({'error': 'BASE RPC unavailable'}), 503
         
-        # Placeholder for BASE blockchain integration
+        def entry(address):
+            wei = balances[address]
+            if isinstance(wei, RPCError):
+                return {'address': address, 'error': str(wei)}
+            return {'address': address, 'balance': str(wei), 'balance_eth': format_eth(wei)}
+        
+        if not many:
+            result = entry(addresses[0])
+            return jsonify({**result, 'network': 'BASE', 'block': block}), 502 if 'error' in result else 200
         return jsonify({
-            'address': address,
-            'balance': '0',
+            'balances': [entry(address) for address in addresses],
             'network': 'BASE',
-            'message': 'BASE integration coming soon'
+            'block': block,
         }), 200
         
     except Exception as e:
         logger.error(f"Balance error: {str(e)}")
         return jsonify({'error': 'Internal error'}), 500
 
-@app.route('/api/claude/models', methods=['GET'])
-def list_models():
-    """List available Claude models"""
+def models_info():
+    """Available Claude models body"""
     models = [
         {
             'id': 'claude-3-5-sonnet-20241022',
@@ -440,7 +924,14 @@ def list_models():
             'context': 200000
         }
     ]
-    return jsonify({'models': models}), 200
+    return {'models': models}
+
+models_response = PrecomputedResponse(models_info, cache_control='public, max-age=3600')
+
+@app.route('/api/claude/models', methods=['GET'])
+def list_models():
+    """List available Claude models"""
+    return models_response.respond()
 
 @app.route('/api/v1/status', methods=['GET'])
 def platform_status():
@@ -449,7 +940,8 @@ def platform_status():
         'platform': 'B0B',
         'status': 'operational',
         'security_level': 'MILSPEC',
-        'active_blocks': len(blocked_ips),
+        'active_blocks': threat_store.blocked_count(),
+        'brain': brain_breaker.state,
         'timestamp': datetime.utcnow().isoformat(),
     }), 200
 
@@ -459,76 +951,294 @@ def platform_status():
 
 BRAIN_URL = os.getenv('BRAIN_URL', 'https://brain.b0b.dev')
 
+# After BRAIN_BREAKER_FAILURES consecutive failures brain calls fail fast for
+# BRAIN_BREAKER_RECOVERY seconds, then BRAIN_BREAKER_TRIALS calls probe it again
+brain_breaker = CircuitBreaker(
+    'brain',
+    failure_threshold=int(os.getenv('BRAIN_BREAKER_FAILURES', '5')),
+    recovery_timeout=float(os.getenv('BRAIN_BREAKER_RECOVERY', '30')),
+    half_open_max=int(os.getenv('BRAIN_BREAKER_TRIALS', '1')),
+    on_change=on_circuit_change,
+)
+
+# Pooled keep-alive transport - every proxy route shares warm connections
+BRAIN_CONNECT_TIMEOUT = float(os.getenv('BRAIN_CONNECT_TIMEOUT', '3.05'))
+brain = BrainClient(
+    BRAIN_URL,
+    pool_size=int(os.getenv('BRAIN_POOL_SIZE', '20')),
+    connect_timeout=BRAIN_CONNECT_TIMEOUT,
+    read_timeout=float(os.getenv('BRAIN_READ_TIMEOUT', '10')),
+    route_timeouts=parse_route_timeouts(
+        os.getenv('BRAIN_ROUTE_TIMEOUTS', '/chat=30'),
+        BRAIN_CONNECT_TIMEOUT,
+    ),
+    observe=observe_upstream,
+    breaker=brain_breaker,
+)
+
+# Brain validators per path: unchanged GETs are revalidated, not re-downloaded
+brain_conditional = ConditionalCache()
+
+def brain_get(path, **kwargs):
+    """Conditional GET to the brain -> (JSONBody, status); a 304 reuses the stored body"""
+    response = brain.get(path, headers=brain_conditional.headers(path), **kwargs)
+    return brain_conditional.resolve(path, response)
+
+async def brain_get_async(path):
+    """brain_get() on the async client"""
+    response = await async_clients['brain'].get(path, headers=brain_conditional.headers(path))
+    return brain_conditional.resolve(path, response)
+
+# Last good brain answers, served marked stale while the brain is failing
+last_good = LastGood(max_age=float(os.getenv('BRAIN_STALE_MAX_AGE', '3600')))
+
+def remember(key, result):
+    """Keep a successful (body, status) brain result as the key's last good answer"""
+    if result[1] < 500:
+        last_good.put(key, result)
+    return result
+
+def circuit_open(e):
+    response = jsonify({'error': 'Brain unavailable', 'retry_after': round(e.retry_after, 1)})
+    response.headers['Retry-After'] = str(math.ceil(e.retry_after))
+    return response, 503
+
+def resilient_upstream(key, call, acall, render, on_error):
+    """upstream() for (body, status) brain results, with a stale fallback
+
+    When the call fails, the circuit is open or the brain answers 5xx, the
+    key's last good result is rendered instead and flagged via g.stale.
+    """
+    def stale_or(reason, fallback):
+        hit = last_good.get(key)
+        if hit is None:
+            return fallback()
+        result, age = hit
+        g.stale = {'age': round(age, 1), 'reason': reason}
+        return render(result)
+    
+    def served(result):
+        if result[1] >= 500:
+            return stale_or(f"Brain returned {result[1]}", lambda: render(result))
+        return render(result)
+    
+    def failed(e):
+        if isinstance(e, CircuitOpenError):
+            return stale_or('Circuit open', lambda: circuit_open(e))
+        return stale_or('Brain unreachable', lambda: on_error(e))
+    
+    async def acall_remembered():
+        return remember(key, await acall())
+    
+    return upstream(lambda: remember(key, call()), acall_remembered, served, failed)
+
+@app.after_request
+def mark_stale(response):
+    """Flag a last-good fallback: Age and Warning headers, 'stale' in JSON object bodies"""
+    stale = g.get('stale')
+    if stale is None:
+        return response
+    response.headers['Age'] = str(int(stale['age']))
+    response.headers['Warning'] = '110 - "Response is Stale"'
+    body = response.get_json(silent=True)
+    if isinstance(body, dict):
+        body['stale'] = stale
+        response.set_data(app.json.dumps(body) + '\n')
+    return response
+
+# One shared /pulse snapshot for pulse/agents/treasury/signals.
+# Upstream sees at most one fetch per TTL window, whatever the dashboard fan-out.
+# Error answers are shared with the callers already waiting but never cached,
+# so the next request retries (and the breaker / stale fallback see it).
+PULSE_CACHE_TTL = float(os.getenv('PULSE_CACHE_TTL', '5'))
+pulse_cache = SnapshotCache(ttl=PULSE_CACHE_TTL, cacheable=lambda result: result[1] < 400)
+
+def fetch_pulse():
+    """Get the brain /pulse snapshot as (JSONBody, status) - cached, single-flight"""
+    return pulse_cache.get('pulse', lambda: brain_get('/pulse'))
+
+async def fetch_pulse_async():
+    """fetch_pulse() for the event loop - shares the same cached snapshot"""
+    return await pulse_cache.get_async('pulse', lambda: brain_get_async('/pulse'))
+
+def project_agents(data):
+    return {
+        'agents': data.get('agentStates', {}),
+        'swarmActivity': data.get('swarmActivity', {}),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+def project_treasury(data):
+    return {
+        'treasury': data.get('treasury', {}),
+        'chain': 'BASE',
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+def project_signals(data):
+    return {
+        'd0tSignals': data.get('d0tSignals', {}),
+        'turb0Decision': data.get('turb0Decision', {}),
+        'l0reState': data.get('l0reState', {}),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+def pulse_upstream(render, label):
+    """Project fields out of the shared pulse snapshot"""
+    def failed(e):
+        logger.error(f"{label} error: {str(e)}")
+        return jsonify({'error': 'Brain unreachable'}), 503
+    return resilient_upstream('/pulse', fetch_pulse, fetch_pulse_async, render, failed)
+
+def sparse_fields(f):
+    """Compile ?fields=a.b,c for a proxy route into g.fields (400 on a bad spec)"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        spec = request.args.get('fields')
+        if spec:
+            try:
+                g.fields = compile_fields(spec)
+            except ValueError as e:
+                return jsonify({'error': 'Invalid fields', 'details': str(e)}), 400
+        return f(*args, **kwargs)
+    return decorated
+
+# Proxied brain data may be kept by the client but must be revalidated (ETag)
+PROXY_CACHE_CONTROL = 'private, no-cache'
+
+def revalidatable(status):
+    """Only fresh GET/HEAD 200s get an ETag - a POST reply (swarm chat) is never a 304"""
+    return status == 200 and request.method in ('GET', 'HEAD') and not g.get('stale')
+
+def revalidated(etag, weak=False):
+    """Mark the response revalidatable; a 304 when If-None-Match already has etag"""
+    g.cache_control = PROXY_CACHE_CONTROL
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        # Echo the form the client holds (compression weakens a strong tag)
+        response.set_etag(etag, weak=weak or not request.if_none_match.contains(etag))
+        return response
+    return None
+
+def render_json(doc, status=200, source=None):
+    """jsonify a successful document, projected to ?fields= when given
+
+    With source (the upstream JSONBody doc is derived from) a fresh GET 200 gets
+    a weak ETag from the source's content hash and the request URL, checked
+    before doc is projected or encoded.
+    """
+    etag = None
+    if source is not None and revalidatable(status):
+        etag = content_etag(f'{source.etag} {request.full_path}'.encode('utf-8'))
+        not_modified = revalidated(etag, weak=True)
+        if not_modified is not None:
+            return not_modified
+    fields = g.get('fields')
+    if fields is not None and status < 400:
+        doc = fields(doc)
+    response = jsonify(doc)
+    response.status_code = status
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+    return response
+
+def relay_json(body, status, shared=False):
+    """Upstream JSON bytes as-is - no parse/serialize round trip
+
+    shared marks a body served to many requests (the cached pulse) so its
+    compressed form is reused. A fresh GET 200 carries the body's content hash
+    as a strong ETag and If-None-Match matches get a bodiless 304. With
+    ?fields= the body is parsed and projected.
+    """
+    if g.get('fields') is not None and status < 400:
+        return render_json(body.data, status, source=body)
+    g.shared_body = shared
+    response = Response(body.raw, status=status, mimetype='application/json')
+    if revalidatable(status):
+        not_modified = revalidated(body.etag)
+        if not_modified is not None:
+            return not_modified
+        response.set_etag(body.etag)
+    return response
+
+def brain_upstream(method, path, label, **kwargs):
+    """Relay one brain call as-is: body and status code (GETs fall back to stale)"""
+    def call():
+        if method == 'GET':
+            return brain_get(path, **kwargs)
+        response = brain.request(method, path, **kwargs)
+        return JSONBody.from_response(response), response.status_code
+    async def acall():
+        if method == 'GET':
+            return await brain_get_async(path)
+        response = await async_clients['brain'].request(method, path, **kwargs)
+        return JSONBody.from_response(response), response.status_code
+    def relay(result):
+        body, status = result
+        return relay_json(body, status)
+    def failed(e):
+        logger.error(f"{label} error: {str(e)}")
+        if isinstance(e, CircuitOpenError):
+            return circuit_open(e)
+        return jsonify({'error': 'Brain unreachable'}), 503
+    if method != 'GET':
+        return upstream(call, acall, relay, failed)
+    return resilient_upstream(path, call, acall, relay, failed)
+
 @app.route('/api/swarm/pulse', methods=['GET'])
 @limiter.limit("30 per minute")
+@async_view
+@sparse_fields
 def swarm_pulse():
     """Proxy to brain /pulse - comprehensive swarm status"""
-    try:
-        import requests
-        response = requests.get(f'{BRAIN_URL}/pulse', timeout=10)
-        return jsonify(response.json()), response.status_code
-    except Exception as e:
+    def relay(pulse):
+        body, status = pulse
+        return relay_json(body, status, shared=True)
+    def failed(e):
         logger.error(f"Brain pulse error: {str(e)}")
         return jsonify({'error': 'Brain unreachable', 'details': str(e)}), 503
+    return resilient_upstream('/pulse', fetch_pulse, fetch_pulse_async, relay, failed)
 
 @app.route('/api/swarm/agents', methods=['GET'])
 @limiter.limit("30 per minute")
+@async_view
+@sparse_fields
 def swarm_agents():
     """Get swarm agent states"""
-    try:
-        import requests
-        response = requests.get(f'{BRAIN_URL}/pulse', timeout=10)
-        data = response.json()
-        return jsonify({
-            'agents': data.get('agentStates', {}),
-            'swarmActivity': data.get('swarmActivity', {}),
-            'timestamp': datetime.utcnow().isoformat()
-        }), 200
-    except Exception as e:
-        logger.error(f"Agents fetch error: {str(e)}")
-        return jsonify({'error': 'Brain unreachable'}), 503
+    def project(pulse):
+        body, _ = pulse
+        return render_json(project_agents(body.data), source=body)
+    return pulse_upstream(project, 'Agents fetch')
 
 @app.route('/api/swarm/treasury', methods=['GET'])
 @limiter.limit("30 per minute")
+@async_view
+@sparse_fields
 def swarm_treasury():
     """Get treasury balance from brain"""
-    try:
-        import requests
-        response = requests.get(f'{BRAIN_URL}/pulse', timeout=10)
-        data = response.json()
-        return jsonify({
-            'treasury': data.get('treasury', {}),
-            'chain': 'BASE',
-            'timestamp': datetime.utcnow().isoformat()
-        }), 200
-    except Exception as e:
-        logger.error(f"Treasury fetch error: {str(e)}")
-        return jsonify({'error': 'Brain unreachable'}), 503
+    def project(pulse):
+        body, _ = pulse
+        return render_json(project_treasury(body.data), source=body)
+    return pulse_upstream(project, 'Treasury fetch')
 
 @app.route('/api/swarm/signals', methods=['GET'])
 @limiter.limit("30 per minute")
+@async_view
+@sparse_fields
 def swarm_signals():
     """Get D0T signals and market data"""
-    try:
-        import requests
-        response = requests.get(f'{BRAIN_URL}/pulse', timeout=10)
-        data = response.json()
-        return jsonify({
-            'd0tSignals': data.get('d0tSignals', {}),
-            'turb0Decision': data.get('turb0Decision', {}),
-            'l0reState': data.get('l0reState', {}),
-            'timestamp': datetime.utcnow().isoformat()
-        }), 200
-    except Exception as e:
-        logger.error(f"Signals fetch error: {str(e)}")
-        return jsonify({'error': 'Brain unreachable'}), 503
+    def project(pulse):
+        body, _ = pulse
+        return render_json(project_signals(body.data), source=body)
+    return pulse_upstream(project, 'Signals fetch')
 
 @app.route('/api/swarm/chat', methods=['POST'])
 @limiter.limit(SecurityConfig.RATE_LIMIT_CHAT)
+@async_view
+@sparse_fields
 def swarm_chat():
     """Send a message to the swarm brain"""
     try:
-        import requests
         data = request.get_json()
         
         if not data or 'message' not in data:
@@ -537,77 +1247,348 @@ def swarm_chat():
         message = sanitize_input(data['message'], max_length=SecurityConfig.MAX_MESSAGE_LENGTH)
         agent = data.get('agent', 'swarm')
         
-        response = requests.post(
-            f'{BRAIN_URL}/chat',
-            json={'message': message, 'agent': agent},
-            timeout=30
-        )
-        return jsonify(response.json()), response.status_code
+        return brain_upstream('POST', '/chat', 'Swarm chat', json={'message': message, 'agent': agent})
     except Exception as e:
         logger.error(f"Swarm chat error: {str(e)}")
         return jsonify({'error': 'Brain unreachable'}), 503
 
 @app.route('/api/swarm/tasks', methods=['GET'])
 @limiter.limit("30 per minute")
+@async_view
+@sparse_fields
 def swarm_tasks():
     """Get pending swarm tasks"""
-    try:
-        import requests
-        response = requests.get(f'{BRAIN_URL}/tasks', timeout=10)
-        return jsonify(response.json()), response.status_code
-    except Exception as e:
-        logger.error(f"Tasks fetch error: {str(e)}")
-        return jsonify({'error': 'Brain unreachable'}), 503
+    return brain_upstream('GET', '/tasks', 'Tasks fetch')
 
 @app.route('/api/swarm/turb0', methods=['GET'])
 @limiter.limit("30 per minute") 
+@async_view
+@sparse_fields
 def swarm_turb0():
     """Get TURB0 trading dashboard"""
-    try:
-        import requests
-        response = requests.get(f'{BRAIN_URL}/turb0/dashboard', timeout=10)
-        return jsonify(response.json()), response.status_code
-    except Exception as e:
-        logger.error(f"TURB0 fetch error: {str(e)}")
-        return jsonify({'error': 'Brain unreachable'}), 503
+    return brain_upstream('GET', '/turb0/dashboard', 'TURB0 fetch')
 
 @app.route('/api/crawlers', methods=['GET'])
 @limiter.limit("30 per minute")
+@async_view
+@sparse_fields
 def get_crawlers():
     """Get crawler status"""
+    return brain_upstream('GET', '/crawlers', 'Crawlers fetch')
+
+# =============================================================================
+# BATCHED SWARM AGGREGATION — one gateway round trip for the whole dashboard
+# =============================================================================
+
+# Sections projected out of the shared /pulse snapshot (one fetch serves all)
+PULSE_SECTIONS = {
+    'pulse': lambda data: data,
+    'agents': project_agents,
+    'treasury': project_treasury,
+    'signals': project_signals,
+}
+# Sections relayed from their own brain path
+BRAIN_SECTIONS = {
+    'tasks': '/tasks',
+    'turb0': '/turb0/dashboard',
+    'crawlers': '/crawlers',
+}
+BATCH_SECTION_TIMEOUT = float(os.getenv('BATCH_SECTION_TIMEOUT', '5'))
+batch_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BATCH_WORKERS', '16')),
+    thread_name_prefix='swarm-batch',
+)
+
+def batch_resource(section):
+    """Brain path a section is built from ('/pulse' for the shared snapshot)"""
+    return '/pulse' if section in PULSE_SECTIONS else BRAIN_SECTIONS[section]
+
+def load_resource(resource, timeout):
+    if resource == '/pulse':
+        return remember(resource, fetch_pulse())
+    return remember(resource, brain_get(resource, timeout=(BRAIN_CONNECT_TIMEOUT, timeout)))
+
+async def load_resource_async(resource):
+    if resource == '/pulse':
+        return remember(resource, await fetch_pulse_async())
+    return remember(resource, await brain_get_async(resource))
+
+def batch_fetch(resources, timeout):
+    """Fetch resources concurrently on the batch pool -> {resource: (body, status) or exception}"""
+    futures = {r: batch_pool.submit(load_resource, r, timeout) for r in resources}
+    deadline = time.monotonic() + timeout
+    results = {}
+    for resource, future in futures.items():
+        try:
+            results[resource] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except Exception as e:
+            results[resource] = e
+    return results
+
+async def batch_fetch_async(resources, timeout):
+    """batch_fetch() on the event loop"""
+    resources = list(resources)
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(load_resource_async(r), timeout) for r in resources),
+        return_exceptions=True,
+    )
+    return dict(zip(resources, outcomes))
+
+@app.route('/api/swarm/batch', methods=['GET'])
+@limiter.limit("30 per minute")
+@async_view
+def swarm_batch():
+    """Several swarm sections in one response: ?sections=pulse,tasks,turb0,crawlers
+
+    Brain resources are fetched concurrently, each bounded by ?timeout=
+    (seconds, default BATCH_SECTION_TIMEOUT). A failed section is served
+    from its last good answer when there is one (listed under 'stale' with
+    its age), otherwise listed under 'errors' and the response marked partial.
+    """
+    known = list(PULSE_SECTIONS) + list(BRAIN_SECTIONS)
+    requested = request.args.get('sections')
+    sections = [s.strip() for s in requested.split(',') if s.strip()] if requested else known
+    unknown = [s for s in sections if s not in known]
+    if unknown or not sections:
+        return jsonify({'error': 'Unknown sections', 'unknown': unknown, 'available': known}), 400
     try:
-        import requests
-        response = requests.get(f'{BRAIN_URL}/crawlers', timeout=10)
-        return jsonify(response.json()), response.status_code
-    except Exception as e:
-        logger.error(f"Crawlers fetch error: {str(e)}")
+        timeout = min(float(request.args.get('timeout', BATCH_SECTION_TIMEOUT)), 10.0)
+    except ValueError:
+        return jsonify({'error': 'Invalid timeout'}), 400
+    
+    resources = {batch_resource(s) for s in sections}
+    
+    def section_error(section, outcome):
+        if is_timeout(outcome):
+            return {'error': 'Timed out', 'timeout': timeout}
+        if isinstance(outcome, CircuitOpenError):
+            return {'error': 'Brain unavailable', 'retry_after': round(outcome.retry_after, 1)}
+        if isinstance(outcome, Exception):
+            logger.error(f"Batch {section} error: {str(outcome)}")
+            return {'error': 'Brain unreachable'}
+        if outcome[1] >= 400:
+            return {'error': 'Brain error', 'status': outcome[1]}
+        return None
+    
+    def render(results):
+        doc = {'sections': {}, 'errors': {}, 'stale': {}}
+        for section in sections:
+            resource = batch_resource(section)
+            outcome = results[resource]
+            error = section_error(section, outcome)
+            if error is not None:
+                hit = last_good.get(resource) if error.get('status', 500) >= 500 else None
+                if hit is None:
+                    doc['errors'][section] = error
+                    continue
+                outcome, age = hit
+                doc['stale'][section] = {'age': round(age, 1), 'reason': error['error']}
+            body, _ = outcome
+            if section in PULSE_SECTIONS:
+                doc['sections'][section] = PULSE_SECTIONS[section](body.data)
+            else:
+                doc['sections'][section] = body.data
+        doc['partial'] = bool(doc['errors'])
+        doc['timestamp'] = datetime.utcnow().isoformat()
+        return jsonify(doc), 200 if doc['sections'] else 503
+    
+    def failed(e):
+        logger.error(f"Batch error: {str(e)}")
         return jsonify({'error': 'Brain unreachable'}), 503
+    
+    return upstream(
+        lambda: batch_fetch(resources, timeout),
+        lambda: batch_fetch_async(resources, timeout),
+        render,
+        failed,
+    )
+
+# =============================================================================
+# LIVE PULSE STREAM — one upstream poller, pushed to every viewer
+# =============================================================================
+
+PULSE_STREAM_HEARTBEAT = float(os.getenv('PULSE_STREAM_HEARTBEAT', '15'))
+
+def poll_pulse():
+    """Pulse document for the broadcaster, straight from the brain
+
+    Not read through pulse_cache: a poll landing just before the cached
+    snapshot expires would get the old one, so viewers could see updates up
+    to twice the cadence apart. Still a conditional GET - an unchanged pulse
+    is a 304.
+    """
+    body, status = brain_get('/pulse')
+    if status >= 400:
+        raise RuntimeError(f"Brain /pulse returned {status}")
+    return body.data
+
+pulse_hub = PulseBroadcaster(
+    poll_pulse,
+    interval=float(os.getenv('PULSE_STREAM_INTERVAL', '5')),
+    max_queue=int(os.getenv('PULSE_STREAM_QUEUE', '16')),
+    max_subscribers=int(os.getenv('PULSE_STREAM_MAX_SUBSCRIBERS', '100')),
+)
+
+def pulse_frame(event):
+    if event is None:
+        return ': keepalive\n\n'
+    name, data = event
+    return sse(name, dict(data, timestamp=datetime.utcnow().isoformat()))
+
+@app.route('/api/swarm/stream', methods=['GET'])
+@limiter.limit("10 per minute")
+@async_view
+def swarm_stream():
+    """Live swarm pulse as server-sent events
+
+    Frames: 'snapshot' {sections} on connect (and after a resync), then
+    'update' {sections, removed} carrying only the top-level pulse sections
+    that changed, 'error' {error} when the brain stops answering, and a
+    keepalive comment every PULSE_STREAM_HEARTBEAT seconds.
+    """
+    if pulse_hub.subscriber_count() >= pulse_hub.max_subscribers:
+        return jsonify({'error': 'Too many subscribers'}), 503
+    
+    def relay():
+        for event in pulse_hub.listen(PULSE_STREAM_HEARTBEAT):
+            yield pulse_frame(event)
+    
+    async def arelay():
+        async for event in pulse_hub.alisten(PULSE_STREAM_HEARTBEAT):
+            yield pulse_frame(event)
+    
+    return upstream_stream(relay, arelay)
 
 # =============================================================================
 # SECURITY ADMIN ENDPOINTS (Internal use only)
 # =============================================================================
 
+def internal_key_valid():
+    """X-Internal-Key (or 'Authorization: Bearer' for scrapers) matches INTERNAL_API_KEY"""
+    valid_key = os.getenv('INTERNAL_API_KEY')
+    internal_key = request.headers.get('X-Internal-Key')
+    if not internal_key:
+        auth = request.headers.get('Authorization', '')
+        if auth.startswith('Bearer '):
+            internal_key = auth[len('Bearer '):]
+    return bool(valid_key) and constant_time_compare(internal_key or '', valid_key)
+
 @app.route('/api/internal/security/stats', methods=['GET'])
 @limiter.limit("10 per minute")
 def security_stats():
     """Security statistics - requires internal key"""
-    internal_key = request.headers.get('X-Internal-Key')
-    valid_key = os.getenv('INTERNAL_API_KEY')
-    
-    if not valid_key or not constant_time_compare(internal_key or '', valid_key):
+    if not internal_key_valid():
         return jsonify({'error': 'Unauthorized'}), 401
     
+    # Indexed audit query: ?ip=1.2.3.4&event=IP_BLOCKED&since=3600&limit=50
+    try:
+        limit = min(int(request.args.get('limit', 50)), 1000)
+        since = request.args.get('since')
+        since = time.time() - float(since) if since else None
+    except ValueError:
+        return jsonify({'error': 'Invalid query'}), 400
+    
+    def heavy_hitters(summary, window=None):
+        return {
+            'last_minute': summary.top(),
+            'window': window if window is not None else summary.top(windows=HEAVY_HITTER_WINDOWS),
+            'total_last_minute': summary.total(),
+        }
+    
+    violators = top_violators.top(windows=HEAVY_HITTER_WINDOWS)
+    
     return jsonify({
-        'blocked_ips': len(blocked_ips),
-        'total_violations': sum(violation_counts.values()),
-        'recent_events': request_log[-50:],
-        'top_violators': sorted(
-            violation_counts.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:10],
+        'blocked_ips': threat_store.blocked_count(),
+        'total_violations': top_violators.total(windows=HEAVY_HITTER_WINDOWS),
+        'recent_events': request_log.query(
+            ip=request.args.get('ip'),
+            event=request.args.get('event'),
+            limit=limit,
+            since=since,
+        ),
+        'event_counts': request_log.counts_by_event(),
+        'top_violators': [
+            (ip, count) for ip, count, _ in violators
+        ],
+        'heavy_hitters': {
+            'violators': heavy_hitters(top_violators, violators),
+            'sources': heavy_hitters(top_sources),
+            'summary': top_sources.stats(),
+        },
+        'threat_store': threat_store.stats(),
+        'blocklist': cidr_blocklist.stats(),
+        'audit_sink': audit_sink.stats(),
+        'audit_sampling': request_sampler.stats(),
+        'brain_transport': brain.stats(),
+        'base_rpc': base_rpc.stats(),
+        'chat_cache': {'ttl': chat_cache.ttl, 'entries': len(chat_cache), **chat_cache.stats},
+        'chat_sessions': chat_sessions.stats(),
+        'claude_clients': claude.stats(),
+        'brain_circuit': brain_breaker.stats(),
+        'brain_revalidation': brain_conditional.stats,
+        'rate_limit_storage': limiter.storage.stats() if hasattr(limiter.storage, 'stats') else {'backend': 'memory'},
+        'pulse_stream': pulse_hub.stats(),
     }), 200
 
+@app.route('/api/internal/blocklist', methods=['GET', 'POST', 'DELETE'])
+@limiter.limit("10 per minute")
+def blocklist_admin():
+    """CIDR range blocks - requires internal key
+
+    GET ?ip=1.2.3.4 checks an address; POST {"cidr", "duration"} blocks a
+    range for duration seconds (default BLOCK_DURATION, 0 = until removed);
+    DELETE {"cidr"} lifts an admin block. Range blocks are per worker - put
+    ranges every worker must enforce in BLOCKLIST_PATH instead.
+    """
+    if not internal_key_valid():
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    if request.method == 'GET':
+        ip = request.args.get('ip')
+        if ip:
+            expires_at = cidr_blocklist.lookup(ip)
+            return jsonify({
+                'ip': ip,
+                'blocked': expires_at is not None,
+                'expires_at': expires_at if expires_at not in (None, math.inf) else None,
+            }), 200
+        return jsonify(cidr_blocklist.stats()), 200
+    
+    data = request.get_json(silent=True) or {}
+    cidr = str(data.get('cidr', ''))
+    try:
+        if request.method == 'DELETE':
+            removed = cidr_blocklist.remove(cidr)
+            log_security_event('RANGE_UNBLOCKED', cidr, 'Admin unblock')
+            return jsonify({'cidr': cidr, 'removed': removed}), 200 if removed else 404
+        duration = float(data.get('duration', SecurityConfig.BLOCK_DURATION))
+        expires_at = time.time() + duration if duration > 0 else None
+        cidr_blocklist.add(cidr, expires_at=expires_at)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': 'Invalid range', 'details': str(e)}), 400
+    log_security_event('RANGE_BLOCKED', cidr, f'Admin block for {duration:g}s' if expires_at else 'Admin block')
+    return jsonify({'cidr': cidr, 'expires_at': expires_at}), 201
+
+@app.route('/api/internal/blocklist/reload', methods=['POST'])
+@limiter.limit("10 per minute")
+def blocklist_reload():
+    """Reload the BLOCKLIST_PATH feed now - requires internal key"""
+    if not internal_key_valid():
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not cidr_blocklist.path:
+        return jsonify({'error': 'BLOCKLIST_PATH not set'}), 400
+    reloaded = cidr_blocklist.reload(force=True)
+    return jsonify({'reloaded': reloaded, **cidr_blocklist.stats()}), 200 if reloaded else 500
+
+@app.route('/api/internal/metrics', methods=['GET'])
+@limiter.limit("60 per minute")
+def prometheus_metrics():
+    """Latency histograms and security counters in Prometheus text format - requires internal key"""
+    if not internal_key_valid():
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4'), 200
+
 # =============================================================================
 # ERROR HANDLERS
 # =============================================================================
@@ -620,6 +1601,7 @@ def not_found(error):
 
 @app.errorhandler(429)
 def rate_limit_exceeded(error):
+    RATE_LIMITED.inc(request.url_rule.rule if request.url_rule else 'unmatched')
     record_violation(get_client_ip(), 'Rate limit exceeded')
     return jsonify({
         'error': 'Rate limit exceeded',
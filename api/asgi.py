@@ -0,0 +1,249 @@
+"""
+B0B API - Async (ASGI) Serving Mode
+===================================
+Serve the gateway from an event loop so slow brain/Claude calls don't pin workers.
+
+    uvicorn asgi:application --host 0.0.0.0 --port $PORT
+    python asgi.py
+
+Views marked @async_view (brain proxies, /api/chat) run the normal Flask
+pipeline - security_checkpoint, the limiter, require_api_key, error
+handlers, add_security_headers - on the loop, and only their UpstreamCall
+is awaited with an async client (an UpstreamStream is relayed chunk by
+chunk as its async generator yields). One process can hold thousands of
+in-flight upstream calls. Every other route runs the plain WSGI app on a
+thread pool.
+"""
+
+import asyncio
+import io
+import os
+import sys
+
+from flask import g
+from werkzeug.exceptions import HTTPException
+
+import app as gateway
+from brain_client import AsyncBrainClient
+
+flask_app = gateway.app
+
+ASGI_BRAIN_POOL_SIZE = int(os.getenv('ASGI_BRAIN_POOL_SIZE', '200'))
+
+
+def install_async_clients():
+    """Create the event-loop clients the @async_view routes await"""
+    if 'brain' not in gateway.async_clients:
+        sync = gateway.brain
+        gateway.async_clients['brain'] = AsyncBrainClient(
+            sync.base_url,
+            pool_size=ASGI_BRAIN_POOL_SIZE,
+            connect_timeout=sync.default_timeout[0],
+            read_timeout=sync.default_timeout[1],
+            route_timeouts=sync.route_timeouts,
+            observe=sync.observe,
+            breaker=sync.breaker,
+        )
+
+
+async def close_async_clients():
+    for client in list(gateway.async_clients.values()):
+        close = getattr(client, 'aclose', None) or getattr(client, 'close', None)
+        if close:
+            await close()
+    gateway.async_clients.clear()
+    await gateway.claude.aclose()
+
+
+def build_environ(scope, body):
+    """Translate an ASGI http scope into a WSGI environ"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('0.0.0.0', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'CONTENT_LENGTH':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+async def read_body(receive):
+    """Read the request body, stopping just past MAX_CONTENT_LENGTH (Flask answers 413)"""
+    limit = flask_app.config['MAX_CONTENT_LENGTH']
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunk = message.get('body', b'')
+        if size <= limit:
+            chunks.append(chunk)
+        size += len(chunk)
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+def is_async_route(environ):
+    """True if the request routes to an @async_view endpoint"""
+    adapter = flask_app.url_map.bind_to_environ(environ)
+    try:
+        endpoint, _ = adapter.match()
+    except HTTPException:
+        return False
+    view = flask_app.view_functions.get(endpoint)
+    return getattr(view, 'async_view', False)
+
+
+async def dispatch_async(environ):
+    """Flask request pipeline with the upstream step awaited on the loop
+
+    Returns (response, stream): stream is an async generator of body chunks
+    for streamed views, else None.
+    """
+    ctx = flask_app.request_context(environ)
+    error = None
+    stream = None
+    ctx.push()
+    try:
+        g.asgi = True
+        try:
+            rv = flask_app.preprocess_request()
+            if rv is None:
+                rv = flask_app.dispatch_request()
+            if isinstance(rv, gateway.UpstreamCall):
+                rv = await rv.run_async()
+            elif isinstance(rv, gateway.UpstreamStream):
+                stream = rv.agen()
+                rv = rv.response()
+        except Exception as e:
+            rv = flask_app.handle_user_exception(e)
+        return flask_app.finalize_request(rv), stream
+    except Exception as e:
+        error = e
+        return flask_app.finalize_request(flask_app.handle_exception(e), from_error_handler=True), None
+    finally:
+        ctx.pop(error)
+
+
+def dispatch_wsgi(environ):
+    """Run the plain WSGI app (thread pool) and collect its response"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    iterable = flask_app(environ, start_response)
+    try:
+        body = b''.join(iterable)
+    finally:
+        close = getattr(iterable, 'close', None)
+        if close:
+            close()
+    return started['status'], started['headers'], body
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def relay_stream(send, receive, stream):
+    """Send stream chunks until it ends or the client goes away (long-lived SSE)"""
+    async def pump():
+        async for chunk in stream:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+    pumping = asyncio.ensure_future(pump())
+    watching = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await asyncio.wait({pumping, watching}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (pumping, watching):
+            task.cancel()
+        await asyncio.gather(pumping, watching, return_exceptions=True)
+        await stream.aclose()
+    if not pumping.cancelled() and pumping.exception() is not None:
+        raise pumping.exception()
+    return watching.cancelled()  # False if the client hung up
+
+
+async def send_response(send, status, headers, body, stream=None, receive=None):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+    })
+    if stream is not None and not await relay_stream(send, receive, stream):
+        return  # client disconnected
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            install_async_clients()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_async_clients()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    body = await read_body(receive)
+    environ = build_environ(scope, body)
+
+    if is_async_route(environ):
+        install_async_clients()
+        response, stream = await dispatch_async(environ)
+        body = b'' if stream is not None else response.get_data()
+        await send_response(send, response.status_code, response.headers.to_wsgi_list(), body, stream, receive)
+    else:
+        loop = asyncio.get_running_loop()
+        status, headers, data = await loop.run_in_executor(None, dispatch_wsgi, environ)
+        await send_response(send, status, headers, data)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(
+        'asgi:application',
+        host='0.0.0.0',
+        port=int(os.getenv('PORT', 5000)),
+        log_level='info',
+    )
@@ -0,0 +1,90 @@
+"""
+B0B API - Security Audit Log
+============================
+Fixed-capacity ring buffer for security events, indexed by IP and event type.
+
+Appends are O(1) at any traffic level: the newest event overwrites the
+oldest slot, and the overwritten event is dropped from the front of its
+index deques. Queries like "last N events for IP X" or "all IP_BLOCKED
+events in the last hour" walk only the matching index, never the buffer.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class AuditLog:
+    """Ring buffer of audit events with per-IP and per-event indexes"""
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self._slots = [None] * capacity  # seq % capacity -> (seq, epoch, entry)
+        self._next_seq = 0
+        self._by_ip = {}     # ip -> deque of seq
+        self._by_event = {}  # event -> deque of seq
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._next_seq, self.capacity)
+
+    def append(self, entry, now=None):
+        """Record one event dict (must carry 'ip' and 'event')"""
+        now = time.time() if now is None else now
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            slot = seq % self.capacity
+
+            evicted = self._slots[slot]
+            if evicted is not None:
+                old_seq, _, old = evicted
+                self._unindex(self._by_ip, old['ip'], old_seq)
+                self._unindex(self._by_event, old['event'], old_seq)
+
+            self._slots[slot] = (seq, now, entry)
+            self._by_ip.setdefault(entry['ip'], deque()).append(seq)
+            self._by_event.setdefault(entry['event'], deque()).append(seq)
+
+    @staticmethod
+    def _unindex(index, key, seq):
+        # The evicted event is always the oldest one in its index
+        seqs = index.get(key)
+        if seqs and seqs[0] == seq:
+            seqs.popleft()
+            if not seqs:
+                del index[key]
+
+    def _collect(self, seqs, limit, since, event=None):
+        events = []
+        for seq in reversed(seqs):
+            _, at, entry = self._slots[seq % self.capacity]
+            if since is not None and at < since:
+                break
+            if event is not None and entry['event'] != event:
+                continue
+            events.append(entry)
+            if limit is not None and len(events) >= limit:
+                break
+        events.reverse()
+        return events
+
+    def query(self, ip=None, event=None, limit=50, since=None):
+        """Newest matching events, oldest first
+
+        ip/event pick the index to walk; since (epoch seconds) stops the walk
+        at the first older event, so cost is bounded by the matches returned.
+        """
+        with self._lock:
+            if ip is not None:
+                seqs = self._by_ip.get(ip, ())
+                return self._collect(seqs, limit, since, event)
+            if event is not None:
+                return self._collect(self._by_event.get(event, ()), limit, since)
+            start = max(self._next_seq - self.capacity, 0)
+            return self._collect(range(start, self._next_seq), limit, since)
+
+    def counts_by_event(self):
+        """Events currently held in the buffer, per type"""
+        with self._lock:
+            return {event: len(seqs) for event, seqs in self._by_event.items()}
@@ -0,0 +1,110 @@
+"""
+B0B API - Audit Sampler
+=======================
+Tiered verbosity for per-request audit events.
+
+Security events (violations, blocks, honeypot hits, 404 probes) are always
+recorded. Benign REQUEST events go through the audit level:
+
+    security  none are recorded - exact counters only
+    sampled   a sample is recorded (default)
+    full      every request is recorded
+
+Sampling is either probabilistic ('rate': each request with probability
+sample_rate) or a per-IP token bucket ('bucket': a burst, then one record
+per refill interval per IP, so every client still shows up). A recorded
+sample carries 'represents', the number of requests it stands for, and
+exact per-method counts since the last summary are handed out every
+summary interval so the audit trail keeps the true volume.
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict
+
+LEVELS = ('security', 'sampled', 'full')
+MODES = ('rate', 'bucket')
+
+
+class RequestSampler:
+    """Decides which benign requests get an audit record, counting all of them"""
+
+    def __init__(self, level='sampled', mode='bucket', sample_rate=0.01, burst=3,
+                 refill_interval=60.0, summary_interval=60.0, max_ips=65536):
+        if level not in LEVELS:
+            raise ValueError(f'audit level must be one of {LEVELS}, got {level!r}')
+        if mode not in MODES:
+            raise ValueError(f'audit sampling must be one of {MODES}, got {mode!r}')
+        self.level = level
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.burst = burst
+        self.refill_interval = refill_interval
+        self.summary_interval = summary_interval
+        self.max_ips = max_ips
+        self._buckets = OrderedDict()  # ip -> [tokens, updated_at, unrecorded]
+        self._lock = threading.Lock()
+        self._random = random.random
+        self._window = {}  # method -> requests since the last summary
+        self._window_start = time.time()
+        self.counters = {'seen': 0, 'recorded': 0, 'suppressed': 0, 'summaries': 0}
+
+    def sample(self, ip, method, now=None):
+        """Requests this one's audit record stands for, or 0 to skip recording it"""
+        with self._lock:  # counters stay exact under threads
+            self.counters['seen'] += 1
+            self._window[method] = self._window.get(method, 0) + 1
+            if self.level == 'full':
+                represents = 1
+            elif self.level == 'security':
+                represents = 0
+            elif self.mode == 'rate':
+                represents = round(1 / self.sample_rate) if self._random() < self.sample_rate else 0
+            else:
+                represents = self._take_token(ip, time.time() if now is None else now)
+            self.counters['recorded' if represents else 'suppressed'] += 1
+        return represents
+
+    def _take_token(self, ip, now):
+        bucket = self._buckets.get(ip)
+        if bucket is None:
+            bucket = self._buckets[ip] = [float(self.burst), now, 0]
+            if len(self._buckets) > self.max_ips:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(ip)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) / self.refill_interval)
+            bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            return 0
+        bucket[0] -= 1
+        represents = bucket[2] + 1
+        bucket[2] = 0
+        return represents
+
+    def summary(self, now=None):
+        """Exact per-method request counts since the last summary, once per interval (else None)"""
+        now = time.time() if now is None else now
+        if now - self._window_start < self.summary_interval:
+            return None
+        with self._lock:
+            if now - self._window_start < self.summary_interval:
+                return None  # another thread took it
+            window, self._window = self._window, {}
+            started, self._window_start = self._window_start, now
+            self.counters['summaries'] += 1
+        return {
+            'requests': sum(window.values()),
+            'by_method': window,
+            'seconds': round(now - started, 1),
+        }
+
+    def stats(self):
+        return {
+            'level': self.level,
+            'mode': self.mode,
+            'tracked_ips': len(self._buckets),
+            **self.counters,
+        }
@@ -0,0 +1,164 @@
+"""
+B0B API - Audit Sink
+====================
+Asynchronous, batched writer for security audit events.
+
+The request path only appends the event dict to a deque (atomic under the
+GIL, no lock taken) - microseconds per request. A background thread
+drains it every flush interval and writes one batch to a size-rotated
+JSONL file and one batched line group to stdout for the Railway logs.
+When the queue is full new events are dropped and counted, so a flood can
+never stall requests or grow memory.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+logger = logging.getLogger('b0b.audit')
+
+
+class AuditSink:
+    """Bounded, lock-free-enqueue, batching audit writer"""
+
+    def __init__(self, path=None, max_bytes=10 * 1024 * 1024, backups=5,
+                 max_queue=50000, flush_interval=0.5, stdout=True):
+        self.path_template = path  # '{pid}' gives each worker its own file
+        self.path = self._resolve_path()
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.stdout = stdout
+
+        self._queue = deque()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._file = None
+        self._flush_lock = threading.Lock()
+        self.counters = {'enqueued': 0, 'written': 0, 'dropped': 0, 'batches': 0, 'errors': 0}
+        atexit.register(self.close)
+
+    def submit(self, entry):
+        """Queue one event - never blocks, drops (and counts) when full"""
+        if self._pid != os.getpid():
+            self._start()
+        if len(self._queue) >= self.max_queue:
+            self.counters['dropped'] += 1
+            return False
+        self._queue.append(entry)
+        self.counters['enqueued'] += 1
+        return True
+
+    def _resolve_path(self):
+        if not self.path_template:
+            return None
+        return self.path_template.replace('{pid}', str(os.getpid()))
+
+    def _start(self):
+        # (Re)start the writer in this process - threads don't survive a fork
+        self._pid = os.getpid()
+        self.path = self._resolve_path()
+        self._file = None
+        self._thread = threading.Thread(target=self._run, name='audit-sink', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far as one batch"""
+        with self._flush_lock:
+            batch = []
+            while self._queue:
+                try:
+                    batch.append(self._queue.popleft())
+                except IndexError:
+                    break
+            if not batch:
+                return
+            try:
+                if self.path:
+                    self._write_file(batch)
+                if self.stdout:
+                    logger.warning('\n'.join(
+                        f"[SECURITY] {e['event']}: {e['ip']} - {e['details']}" for e in batch
+                    ))
+                self.counters['written'] += len(batch)
+                self.counters['batches'] += 1
+            except Exception:
+                self.counters['errors'] += 1
+                logger.exception('Audit sink write failed')
+
+    def _write_file(self, batch):
+        data = ''.join(json.dumps(e, default=str) + '\n' for e in batch).encode('utf-8')
+        self._rotate_if_needed(len(data))
+        self._file.write(data)
+        self._file.flush()
+
+    def _rotate_if_needed(self, incoming):
+        if self._file is not None:
+            # Another worker may have rotated the file under us
+            try:
+                stale = os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+            except FileNotFoundError:
+                stale = True
+            if stale:
+                self._file.close()
+                self._file = None
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'ab')
+        if self._file.tell() + incoming <= self.max_bytes or self._file.tell() == 0:
+            return
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f'{self.path}.{i}'
+            if os.path.exists(src):
+                os.replace(src, f'{self.path}.{i + 1}')
+        if self.backups > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'ab')
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        return dict(self.counters, queued=len(self._queue), path=self.path)
+
+
+def read_tail(path, limit):
+    """Last `limit` events from a JSONL audit file, with their epoch times"""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        chunk = 64 * 1024
+        data = b''
+        while end > 0 and data.count(b'\n') <= limit:
+            start = max(end - chunk, 0)
+            f.seek(start)
+            data = f.read(end - start) + data
+            end = start
+    events = []
+    for line in data.splitlines()[-limit:]:
+        try:
+            entry = json.loads(line)
+            at = datetime.fromisoformat(entry['timestamp']).replace(tzinfo=timezone.utc).timestamp()
+        except (ValueError, KeyError, TypeError):
+            continue
+        events.append((at, entry))
+    return events
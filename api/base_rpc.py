@@ -0,0 +1,168 @@
+"""
+B0B API - BASE JSON-RPC Client
+==============================
+Batched eth_getBalance lookups against a BASE node, cached per block.
+
+One requests.Session with a bounded connection pool talks to the node. A
+balance refresh for N wallets is one eth_blockNumber (shared by every
+caller for a block time, single-flight) and one JSON-RPC batch of
+eth_getBalance calls pinned to that block number. Balances are cached per
+(block, address): polls within the same block are answered entirely from
+memory, and a new block only fetches the addresses actually asked for.
+"""
+
+import re
+import threading
+import time
+from decimal import Decimal
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from snapshot_cache import SnapshotCache
+
+ADDRESS = re.compile(r'0x[0-9a-fA-F]{40}')
+
+
+class RPCError(Exception):
+    """The node failed: a JSON-RPC error, a non-JSON-RPC reply or a transport error"""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+def format_eth(wei):
+    """Exact decimal ETH string for a wei amount: 1500000000000000000 -> '1.5'"""
+    text = format(Decimal(wei).scaleb(-18), 'f')
+    return text.rstrip('0').rstrip('.') if '.' in text else text
+
+
+class BaseRPC:
+    """Pooled JSON-RPC client with a per-block balance cache"""
+
+    def __init__(self, url, pool_size=10, timeout=(3.05, 10), block_time=2.0,
+                 batch_size=100, max_addresses=10000, observe=None):
+        self.url = url
+        self.max_addresses = max_addresses
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.observe = observe  # (method, path, status, seconds) -> None
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # The head block is re-read at most once per block time, by one caller
+        self._head = SnapshotCache(ttl=block_time)
+        self._balances = {}  # address (lower case) -> (block, wei)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.counters = {'rpc_requests': 0, 'rpc_calls': 0, 'cache_hits': 0, 'cache_misses': 0}
+
+    def batch(self, calls):
+        """Send [(method, params), ...] as one JSON-RPC batch -> results in order
+
+        A failed call comes back as an RPCError instance in its slot; a
+        transport failure or a non-JSON-RPC reply raises RPCError.
+        """
+        with self._lock:
+            first = self._next_id
+            self._next_id += len(calls)
+        payload = [
+            {'jsonrpc': '2.0', 'id': first + i, 'method': method, 'params': params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        self.counters['rpc_requests'] += 1
+        self.counters['rpc_calls'] += len(calls)
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+            status = response.status_code
+            response.raise_for_status()
+            replies = response.json()
+        except (requests.RequestException, ValueError) as e:
+            # Not str(e): requests puts the node URL (and any API key in it) there
+            raise RPCError(f'HTTP {status}' if isinstance(status, int) else type(e).__name__) from e
+        finally:
+            if self.observe:
+                self.observe('POST', calls[0][0], status, time.perf_counter() - started)
+        if not isinstance(replies, list):  # some nodes answer a rejected batch with one error
+            error = (replies.get('error') if isinstance(replies, dict) else None) or {}
+            raise RPCError(error.get('message', 'Invalid JSON-RPC reply'), error.get('code'))
+        by_id = {reply.get('id'): reply for reply in replies if isinstance(reply, dict)}
+        results = []
+        for call in payload:
+            reply = by_id.get(call['id'])
+            if reply is None:
+                results.append(RPCError('No reply for call'))
+            elif 'error' in reply:
+                error = reply['error'] or {}
+                results.append(RPCError(error.get('message', 'RPC error'), error.get('code')))
+            else:
+                results.append(reply.get('result'))
+        return results
+
+    def block_number(self):
+        """Current head block - cached for one block time, single-flight"""
+        def load():
+            result, = self.batch([('eth_blockNumber', [])])
+            if isinstance(result, RPCError):
+                raise result
+            return int(result, 16)
+        return self._head.get('head', load)
+
+    def balances(self, addresses):
+        """{address: wei or RPCError} at the head block, and that block number
+
+        Addresses already fetched at this block are served from the cache;
+        the rest go out in eth_getBalance batches of batch_size.
+        """
+        block = self.block_number()
+        result, missing = {}, []
+        for address in addresses:
+            cached = self._balances.get(address.lower())
+            if cached is not None and cached[0] == block:
+                result[address] = cached[1]
+                self.counters['cache_hits'] += 1
+            else:
+                missing.append(address)
+        self.counters['cache_misses'] += len(missing)
+        tag = hex(block)
+        for i in range(0, len(missing), self.batch_size):
+            chunk = missing[i:i + self.batch_size]
+            replies = self.batch([('eth_getBalance', [address, tag]) for address in chunk])
+            for address, reply in zip(chunk, replies):
+                if isinstance(reply, RPCError):
+                    result[address] = reply
+                    continue
+                try:
+                    wei = int(reply, 16)
+                except (TypeError, ValueError):
+                    result[address] = RPCError(f'Bad balance {reply!r}')
+                    continue
+                result[address] = wei
+                self._remember(address.lower(), block, wei)
+        return result, block
+
+    def _remember(self, key, block, wei):
+        with self._lock:
+            cached = self._balances.get(key)
+            if cached is None or cached[0] <= block:
+                self._balances[key] = (block, wei)
+            if len(self._balances) > self.max_addresses:
+                # Only the newest block is worth keeping
+                self._balances = {k: v for k, v in self._balances.items() if v[0] >= block}
+                if len(self._balances) > self.max_addresses:
+                    self._balances = {key: (block, wei)}
+
+    def stats(self):
+        return {
+            'node': urlparse(self.url).netloc,  # provider URLs often embed an API key in the path
+            'cached_addresses': len(self._balances),
+            'head': self._head.stats,
+            **self.counters,
+        }
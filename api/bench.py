@@ -0,0 +1,731 @@
+"""
+B0B API - Benchmarks
+====================
+Self-contained gateway benchmarks, run against an in-process stand-in brain.
+
+    python bench.py payload [--agents 500] [--requests 2000]
+    python bench.py ratelimit [--checks 100000] [--workers 4]
+    python bench.py audit [--requests 20000] [--ips 200]
+    python bench.py blocklist [--ranges 100000] [--lookups 200000]
+    python bench.py balance [--addresses 50] [--latency 30] [--polls 20]
+    python bench.py chat [--turns 40] [--history-tokens 8000]
+    python bench.py chatcache [--requests 16] [--latency 300] [--ttl 60]
+    python bench.py imports [--eager] [--top 15]
+    python bench.py startup [--runs 5] [--label v3.1] [--json startup.jsonl]
+
+payload    CPU per request and bytes on the wire for the pulse routes:
+           encoder comparison, pass-through vs re-encoded, identity/gzip/br
+ratelimit  per-check overhead of the limiter storages (memory:// vs the
+           cross-worker shm:// backend), alone and with workers contending
+audit      audit cost and volume per benign request at each AUDIT_LEVEL /
+           AUDIT_SAMPLING setting
+blocklist  CIDR blocklist load/compile time and per-lookup cost with a
+           synthetic threat feed, for fresh and repeat client addresses
+balance    BASE balance refresh for N wallets against a stand-in JSON-RPC node
+           with simulated latency: one request per address vs one batch,
+           and repeat polls within a block served from the cache
+chat       per-turn input tokens and latency of a growing /api/chat session
+           against a stand-in Anthropic API that models prompt caching: full
+           history vs token-budgeted window, with and without caching
+chatcache  model calls for identical /api/chat messages against the stand-in:
+           concurrent ones coalesced into one call, repeats reused only
+           with a CHAT_CACHE_TTL, none shared with Cache-Control: no-cache
+imports    `python -X importtime` of app.py in a fresh interpreter, summed
+           per package and per direct import of app.py
+startup    cold start to first response (interpreter launch, import, first
+           /api/health and /api/swarm/pulse), lazy vs eager SDK imports;
+           --json appends the figures so releases can be compared
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def synthetic_pulse(agents):
+    """A pulse document shaped like the brain's, with `agents` agent states"""
+    return {
+        'agentStates': {
+            f'agent-{i}': {
+                'status': 'active' if i % 3 else 'idle',
+                'lastSeen': 1700000000 + i,
+                'task': f'crawl shard {i % 17} of the signal feeds',
+                'metrics': {'cpu': i % 100 / 100, 'queue': i % 23, 'errors': i % 5},
+            }
+            for i in range(agents)
+        },
+        'swarmActivity': {'messages': [{'from': f'agent-{i}', 'text': 'ok ' * 8} for i in range(agents // 4)]},
+        'treasury': {'balance': '1234.5678', 'history': [{'t': i, 'v': i * 1.5} for i in range(agents // 2)]},
+        'd0tSignals': {f'PAIR{i}': {'score': i * 0.01, 'side': 'long' if i % 2 else 'short'} for i in range(agents // 5)},
+        'turb0Decision': {'action': 'hold', 'confidence': 0.72},
+        'l0reState': {'epoch': 42},
+    }
+
+
+def start_brain(pulse):
+    """Stand-in brain serving a fixed /pulse on an ephemeral port"""
+    body = json.dumps(pulse).encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_gateway(brain_url, **env):
+    """Import app.py against the stand-in brain with audit files and rate limits off"""
+    os.environ.update({
+        'BRAIN_URL': brain_url,
+        'AUDIT_LOG_PATH': '',
+        'PULSE_CACHE_TTL': '3600',
+        **env,
+    })
+    import logging
+    logging.disable(logging.WARNING)
+    import app as gateway
+    gateway.limiter.enabled = False
+    gateway.audit_sink.stdout = False
+    return gateway
+
+
+def cpu_per_call(fn, n):
+    """Mean CPU microseconds per fn() call"""
+    fn()  # warm caches
+    started = time.process_time()
+    for _ in range(n):
+        fn()
+    return (time.process_time() - started) / n * 1e6
+
+
+def table(title, header, rows):
+    print(f'\n{title}')
+    widths = [max(len(str(x)) for x in column) for column in zip(header, *rows)]
+    for row in [header] + rows:
+        print('  ' + '  '.join(str(x).ljust(w) for x, w in zip(row, widths)))
+
+
+def bench_payload(args):
+    pulse = synthetic_pulse(args.agents)
+    raw = json.dumps(pulse).encode('utf-8')
+    server = start_brain(pulse)
+    gateway = load_gateway(f'http://127.0.0.1:{server.server_port}')
+    import json_codec
+    from compression import brotli
+
+    n = args.requests
+    table(
+        f'Encoding the pulse ({len(raw):,} bytes), per call',
+        ['encoder', 'cpu_us'],
+        [
+            ['json.dumps (stdlib)', f'{cpu_per_call(lambda: json.dumps(pulse, sort_keys=True), n):.1f}'],
+            [f'json_codec.dumps ({json_codec.ENCODER})', f'{cpu_per_call(lambda: json_codec.dumps(pulse), n):.1f}'],
+            ['json.loads (parse)', f'{cpu_per_call(lambda: json.loads(raw), n):.1f}'],
+        ],
+    )
+
+    client = gateway.app.test_client()
+    encodings = [('identity', None), ('gzip', 'gzip')]
+    if brotli is not None:
+        encodings.append(('br', 'br'))
+
+    from flask.json.provider import DefaultJSONProvider
+    stdlib_provider = DefaultJSONProvider(gateway.app)
+
+    def reencode():
+        # What the relay used to add per request: jsonify of the parsed snapshot
+        with gateway.app.app_context():
+            stdlib_provider.response(pulse)
+
+    rows = [['(old relay: stdlib jsonify, added per request)', 'identity', f'{cpu_per_call(reencode, n):.1f}', f'{len(raw):,}']]
+    for route in ('/api/swarm/pulse', '/api/swarm/agents'):
+        for name, accept in encodings:
+            headers = {'Accept-Encoding': accept} if accept else {}
+            wire = len(client.get(route, headers=headers).data)
+            cpu = cpu_per_call(lambda: client.get(route, headers=headers), n)
+            rows.append([route, name, f'{cpu:.1f}', f'{wire:,}'])
+    table(
+        'Gateway CPU per request (full Flask pipeline, cached snapshot) and response bytes',
+        ['route', 'encoding', 'cpu_us', 'bytes'],
+        rows,
+    )
+    print(f'\ncompressor: {gateway.compressor.stats}')
+    server.shutdown()
+
+
+def _limit_checks(uri, checks, keys):
+    from limits import parse
+    from limits.storage import storage_from_string
+    from limits.strategies import STRATEGIES
+    import rate_limit_store
+
+    limiter = STRATEGIES[rate_limit_store.STRATEGY](storage_from_string(uri))
+    item = parse('1000000 per minute')
+    names = [f'10.0.{i // 256}.{i % 256}' for i in range(keys)]
+    started = time.perf_counter()
+    for i in range(checks):
+        limiter.hit(item, names[i % keys], '/api/chat')
+    return (time.perf_counter() - started) / checks * 1e6
+
+
+def _storage_checks(uri, checks, keys):
+    """The storage's atomic acquire alone, without the limits strategy around it"""
+    from limits.storage import storage_from_string
+
+    storage = storage_from_string(uri)
+    names = [f'LIMITER/10.0.{i // 256}.{i % 256}/api/chat/10/1/minute' for i in range(keys)]
+    started = time.perf_counter()
+    for i in range(checks):
+        storage.acquire_sliding_window_entry(names[i % keys], 1000000, 60)
+    return (time.perf_counter() - started) / checks * 1e6
+
+
+def bench_ratelimit(args):
+    import rate_limit_store  # registers shm://
+
+    path = os.path.join(tempfile.mkdtemp(prefix='b0b-bench-'), 'ratelimit')
+    shm = f'shm://{path}?slots=65536'
+    rows = [
+        ['memory:// (per worker)', 1, f'{_limit_checks("memory://", args.checks, args.keys):.2f}'],
+        ['shm:// (shared)', 1, f'{_limit_checks(shm, args.checks, args.keys):.2f}'],
+    ]
+    if rate_limit_store.SLIDING_WINDOW:
+        rows.append(['shm:// storage acquire only', 1, f'{_storage_checks(shm, args.checks, args.keys):.2f}'])
+    # Contention: aggregate wall-clock over all workers' checks (on one core this
+    # equals the single-process figure; on N cores lower means the lock scales)
+    fork = multiprocessing.get_context('fork')
+    workers = [
+        fork.Process(target=_limit_checks, args=(shm, args.checks, args.keys))
+        for _ in range(args.workers)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    aggregate = (time.perf_counter() - started) / (args.checks * args.workers) * 1e6
+    rows.append(['shm:// (shared)', args.workers, f'{aggregate:.2f}'])
+    table(
+        f'Rate-limit check ({rate_limit_store.STRATEGY}, {args.keys} keys, {os.cpu_count()} CPUs): '
+        'wall-clock per hit()',
+        ['storage', 'processes', 'us_per_check'],
+        rows,
+    )
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+
+def bench_audit(args):
+    gateway = load_gateway('http://127.0.0.1:9')
+    from audit_sampler import RequestSampler
+
+    n = args.requests
+    ips = [f'10.1.{i // 256}.{i % 256}' for i in range(args.ips)]
+    settings = [
+        ('full (every request)', {'level': 'full'}),
+        ('sampled, rate 1%', {'mode': 'rate', 'sample_rate': 0.01}),
+        ('sampled, bucket 3 + 1/min per IP', {'mode': 'bucket'}),
+        ('security (counters only)', {'level': 'security'}),
+    ]
+    rows = []
+    for name, options in settings:
+        gateway.request_sampler = RequestSampler(**options)
+        sampler = gateway.request_sampler
+        i = 0
+
+        def checkpoint():
+            # The audit step of security_checkpoint, as it runs per request
+            nonlocal i
+            i += 1
+            ip = ips[i % len(ips)]
+            represents = sampler.sample(ip, 'GET')
+            if represents:
+                gateway.log_security_event('REQUEST', ip, 'GET /api/swarm/pulse', represents=represents)
+            summary = sampler.summary()
+            if summary is not None:
+                gateway.log_security_event('REQUEST_SUMMARY', '-', f"{summary['requests']} requests", **summary)
+
+        before = gateway.audit_sink.counters['enqueued']
+        cpu = cpu_per_call(checkpoint, n)
+        gateway.audit_sink.flush()
+        written = gateway.audit_sink.counters['enqueued'] - before
+        rows.append([name, f'{cpu:.2f}', f'{written:,}', f'{written / (n + 1) * 1000:.1f}'])
+    table(
+        f'Audit step per benign request ({n:,} requests from {args.ips} IPs)',
+        ['AUDIT_LEVEL / AUDIT_SAMPLING', 'cpu_us', 'events', 'events_per_1k'],
+        rows,
+    )
+
+
+def bench_blocklist(args):
+    import random
+    from ip_blocklist import CidrBlocklist
+
+    rng = random.Random(7)
+
+    def v4():
+        return '.'.join(str(rng.getrandbits(8)) for _ in range(4))
+
+    feed = [f'{v4()}/{rng.choice((16, 20, 24, 24, 24, 28, 32))} ; SBL{i}' for i in range(args.ranges)]
+    feed += [f'2001:db8:{rng.getrandbits(16):x}:{rng.getrandbits(16):x}::/64' for _ in range(args.ranges // 10)]
+    blocklist = CidrBlocklist()
+    started = time.perf_counter()
+    blocklist.load_lines(feed, source='bench')
+    load = time.perf_counter() - started
+
+    fresh = [v4() for _ in range(args.lookups)]
+    repeat = [fresh[i % 1000] for i in range(args.lookups)]
+    v6 = [f'2001:db8:{rng.getrandbits(16):x}::{rng.getrandbits(16):x}' for _ in range(args.lookups)]
+
+    def per_lookup(addresses, runs=3):
+        lookup = blocklist.lookup
+        best = float('inf')
+        for _ in range(runs):  # best of runs: scheduler noise only ever adds
+            started = time.perf_counter()
+            for address in addresses:
+                lookup(address)
+            best = min(best, time.perf_counter() - started)
+        return best / len(addresses) * 1e6
+
+    stats = blocklist.stats()
+    table(
+        f'CIDR blocklist: {stats["ranges"]:,} ranges -> {stats["intervals"]:,} intervals, '
+        f'loaded + compiled in {load:.2f} s',
+        ['lookups', 'us_per_lookup'],
+        [
+            ['IPv4, distinct addresses (scan)', f'{per_lookup(fresh):.3f}'],
+            ['IPv4, 1000 repeat clients', f'{per_lookup(repeat):.3f}'],
+            ['IPv6, distinct addresses', f'{per_lookup(v6):.3f}'],
+        ],
+    )
+
+
+def start_rpc_node(latency):
+    """Stand-in JSON-RPC node answering eth_blockNumber / eth_getBalance after `latency` seconds"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            calls = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            batch = isinstance(calls, list)
+            replies = [
+                {'jsonrpc': '2.0', 'id': call['id'],
+                 'result': hex(1000) if call['method'] == 'eth_blockNumber' else hex(int(call['params'][0], 16) % 10**21)}
+                for call in (calls if batch else [calls])
+            ]
+            body = json.dumps(replies if batch else replies[0]).encode('utf-8')
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_balance(args):
+    import requests
+    from base_rpc import BaseRPC
+
+    server = start_rpc_node(args.latency / 1000)
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    addresses = [f'0x{i:040x}' for i in range(1, args.addresses + 1)]
+
+    def one_by_one():
+        # What the per-address approach costs: a request per eth_getBalance
+        with requests.Session() as session:
+            for i, address in enumerate(addresses):
+                session.post(url, json={'jsonrpc': '2.0', 'id': i, 'method': 'eth_getBalance',
+                                        'params': [address, 'latest']}).json()
+
+    def wall_ms(fn, runs=3):
+        best = float('inf')
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        return best * 1000
+
+    def batched():
+        BaseRPC(url, block_time=3600).balances(addresses)
+
+    rpc = BaseRPC(url, block_time=3600)
+    rpc.balances(addresses)
+    before = rpc.counters['rpc_requests']
+    polls = wall_ms(lambda: [rpc.balances(addresses) for _ in range(args.polls)], runs=1) / args.polls
+    rows = [
+        ['one request per address', f'{wall_ms(one_by_one):.1f}', args.addresses],
+        ['BaseRPC batch (head + 1 batch)', f'{wall_ms(batched):.1f}', 2],
+        [f'BaseRPC, {args.polls} polls in one block', f'{polls:.3f}', rpc.counters['rpc_requests'] - before],
+    ]
+    table(
+        f'Balance refresh for {args.addresses} wallets, {args.latency} ms node latency',
+        ['strategy', 'ms_per_refresh', 'node_requests'],
+        rows,
+    )
+    server.shutdown()
+
+
+def start_anthropic(reply_chars=1200, base_latency=0.02, per_token=0.00005):
+    """Stand-in Messages API that models prompt caching and latency
+
+    Prompt prefixes ending at a cache_control block are cached; a later
+    request reading one is billed cache_read_input_tokens for it, and
+    latency grows with the uncached input tokens only. Tokens are ~4 chars.
+    """
+    cached = set()
+    reply = ('the swarm sees it ' * (reply_chars // 18 + 1))[:reply_chars]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            server.calls += 1
+            request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            blocks = list(request.get('system') or [])
+            for message in request['messages']:
+                content = message['content']
+                blocks += [{'type': 'text', 'text': content}] if isinstance(content, str) else content
+            prefix, sizes, breakpoints = [], [], []
+            for i, block in enumerate(blocks):
+                prefix.append(json.dumps(block.get('text'), sort_keys=True))
+                sizes.append((sizes[-1] if sizes else 0) + len(block.get('text', '')) // 4 + 4)
+                if 'cache_control' in block and server.caching:
+                    breakpoints.append(i)
+            keys = [hash(tuple(prefix[:i + 1])) for i in range(len(blocks))]
+            # A breakpoint also hits a cached prefix ending up to 20 blocks before it
+            hit = max((i for b in breakpoints for i in range(max(0, b - 20), b + 1) if keys[i] in cached), default=-1)
+            read = sizes[hit] if hit >= 0 else 0
+            written = sizes[breakpoints[-1]] - read if breakpoints and breakpoints[-1] > hit else 0
+            cached.update(keys[b] for b in breakpoints)
+            uncached = sizes[-1] - read - written
+            time.sleep(base_latency + (uncached + written) * per_token)
+            body = json.dumps({
+                'id': 'msg_bench', 'type': 'message', 'role': 'assistant', 'model': request['model'],
+                'content': [{'type': 'text', 'text': reply}], 'stop_reason': 'end_turn', 'stop_sequence': None,
+                'usage': {'input_tokens': uncached, 'output_tokens': len(reply) // 4,
+                          'cache_read_input_tokens': read, 'cache_creation_input_tokens': written},
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.caching = True
+    server.calls = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_chat(args):
+    anthropic = start_anthropic()
+    gateway = load_gateway(
+        'http://127.0.0.1:9',
+        ANTHROPIC_BASE_URL=f'http://127.0.0.1:{anthropic.server_address[1]}',
+        CLAUDE_API_KEY='bench',
+        REQUIRE_API_KEY='false',
+    )
+    from chat_sessions import SessionStore
+
+    client = gateway.app.test_client()
+    question = ('what is d0t seeing on the signal feeds right now? ' * 32)[:1600]
+    settings = [
+        ('full history, no caching', 10**9, False),
+        (f'{args.history_tokens}-token window, no caching', args.history_tokens, False),
+        (f'{args.history_tokens}-token window + prompt caching', args.history_tokens, True),
+    ]
+    shown = sorted({1, args.turns // 4, args.turns // 2, args.turns})
+    rows = []
+    for name, budget, caching in settings:
+        gateway.chat_sessions = SessionStore(max_tokens=budget)
+        anthropic.caching = caching
+        session_id, turns = None, []
+        for turn in range(1, args.turns + 1):
+            body = {'message': f'{turn}: {question}'}
+            body.update({'session_id': session_id} if session_id else {'session': True})
+            started = time.perf_counter()
+            response = client.post('/api/chat', json=body)
+            elapsed = time.perf_counter() - started
+            data = response.get_json()
+            session_id = data['session_id']
+            usage = data['usage']
+            # Input priced as the API does: cache writes 1.25x, cache reads 0.1x
+            billed = (usage['input_tokens'] + 1.25 * usage['cache_creation_input_tokens']
+                      + 0.1 * usage['cache_read_input_tokens'])
+            turns.append((billed, usage['cache_read_input_tokens'], elapsed * 1000))
+        for turn in shown:
+            billed, read, ms = turns[turn - 1]
+            rows.append([name, turn, f'{billed:,.0f}', f'{read:,}', f'{ms:.0f}'])
+        total = sum(billed for billed, _, _ in turns)
+        rows.append([name, 'all', f'{total:,.0f}', '', f'{sum(ms for _, _, ms in turns):.0f}'])
+    table(
+        f'/api/chat session, {args.turns} turns (~400-token questions, ~300-token answers)',
+        ['history', 'turn', 'billed_input_tokens', 'cache_read', 'ms'],
+        rows,
+    )
+    anthropic.shutdown()
+
+
+def bench_chatcache(args):
+    anthropic = start_anthropic(base_latency=args.latency / 1000)
+    gateway = load_gateway(
+        'http://127.0.0.1:9',
+        ANTHROPIC_BASE_URL=f'http://127.0.0.1:{anthropic.server_address[1]}',
+        CLAUDE_API_KEY='bench',
+        REQUIRE_API_KEY='false',
+    )
+    from snapshot_cache import SnapshotCache
+
+    client = gateway.app.test_client()
+
+    def ask(headers):
+        return client.post('/api/chat', json={'message': 'what is the swarm doing?'}, headers=headers).get_json()
+
+    def concurrent(headers):
+        with ThreadPoolExecutor(args.requests) as pool:
+            return list(pool.map(lambda _: ask(headers), range(args.requests)))
+
+    def sequential(headers):
+        return [ask(headers) for _ in range(args.requests)]
+
+    scenarios = [
+        ('TTL 0 (default), concurrent', 0, concurrent, {}),
+        ('TTL 0 (default), one after another', 0, sequential, {}),
+        (f'TTL {args.ttl:g}, one after another', args.ttl, sequential, {}),
+        ('Cache-Control: no-cache, concurrent', args.ttl, concurrent, {'Cache-Control': 'no-cache'}),
+    ]
+    ask({'Cache-Control': 'no-cache'})  # warm up: client creation and lazy imports
+    rows = []
+    for name, ttl, run, headers in scenarios:
+        gateway.chat_cache = SnapshotCache(ttl=ttl, max_entries=512)
+        before = anthropic.calls
+        started = time.perf_counter()
+        answers = run(headers)
+        elapsed = time.perf_counter() - started
+        rows.append([
+            name, len(answers), anthropic.calls - before,
+            sum(1 for answer in answers if answer['cached']),
+            gateway.chat_cache.stats['coalesced'], f'{elapsed * 1000:.0f}',
+        ])
+    table(
+        f'/api/chat, {args.requests} identical messages, {args.latency:g} ms model latency',
+        ['scenario', 'requests', 'model_calls', 'cached', 'coalesced', 'ms'],
+        rows,
+    )
+    anthropic.shutdown()
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def fresh_env(**env):
+    """Environment for a fresh gateway interpreter: no brain, no audit files"""
+    return {
+        **os.environ,
+        'BRAIN_URL': 'http://127.0.0.1:9',
+        'AUDIT_LOG_PATH': '',
+        'PYTHONDONTWRITEBYTECODE': '1',
+        **env,
+    }
+
+
+def import_profile(env):
+    """-X importtime of `import app` -> [(depth, self_us, cumulative_us, module)]"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=HERE, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise SystemExit(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def bench_imports(args):
+    rows = import_profile(fresh_env(LAZY_IMPORTS='false' if args.eager else 'true'))
+    app_depth, _, total, _ = next(row for row in rows if row[3] == 'app')
+    # importtime prints children before their parent: app's direct imports are
+    # the rows one level deeper that come before it
+    app_index = next(i for i, row in enumerate(rows) if row[3] == 'app')
+    direct = [row for row in rows[:app_index] if row[0] == app_depth + 1]
+    table(
+        f'Direct imports of app.py ({"eager" if args.eager else "lazy"} SDK imports), '
+        f'total {total / 1000:.1f} ms',
+        ['module', 'cumulative_ms'],
+        [[name, f'{cum / 1000:.1f}'] for _, _, cum, name in sorted(direct, key=lambda r: -r[2])[:args.top]],
+    )
+    packages = {}
+    for _, self_us, _, name in rows:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    table(
+        'Self time by top-level package (where the import time actually goes)',
+        ['package', 'self_ms'],
+        [[name, f'{us / 1000:.1f}'] for name, us in sorted(packages.items(), key=lambda p: -p[1])[:args.top]],
+    )
+
+
+STARTUP_PROBE = """
+import json, os, sys, time
+started = float(os.environ['BENCH_STARTED'])
+import app
+imported = time.time()
+client = app.app.test_client()
+health = client.get('/api/health')
+first = time.time()
+pulse = client.get('/api/swarm/pulse')
+proxied = time.time()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'health_ms': (first - started) * 1000,
+    'pulse_ms': (proxied - started) * 1000,
+    'status': [health.status_code, pulse.status_code],
+    'sdks': sorted(m for m in ('anthropic', 'httpx', 'bleach') if m in sys.modules),
+}))
+"""
+
+
+def cold_start(env):
+    """One fresh interpreter: ms from launch to import done / first responses"""
+    env = {**env, 'BENCH_STARTED': repr(time.time())}
+    result = subprocess.run([sys.executable, '-c', STARTUP_PROBE], cwd=HERE, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise SystemExit(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_startup(args):
+    server = start_brain(synthetic_pulse(args.agents))
+    brain_url = f'http://127.0.0.1:{server.server_port}'
+    results = {}
+    rows = []
+    for mode, lazy in (('lazy', 'true'), ('eager', 'false')):
+        env = fresh_env(BRAIN_URL=brain_url, LAZY_IMPORTS=lazy)
+        runs = [cold_start(env) for _ in range(args.runs)]
+        summary = {
+            key: round(statistics.median(run[key] for run in runs), 1)
+            for key in ('import_ms', 'health_ms', 'pulse_ms')
+        }
+        summary['sdks_loaded'] = runs[-1]['sdks']
+        results[mode] = summary
+        rows.append([mode, summary['import_ms'], summary['health_ms'], summary['pulse_ms'],
+                     ','.join(summary['sdks_loaded']) or '-'])
+    table(
+        f'Cold start, median of {args.runs} fresh interpreters (ms since launch)',
+        ['imports', 'import_done', 'first_health', 'first_pulse', 'sdks_loaded'],
+        rows,
+    )
+    server.shutdown()
+    if args.json:
+        record = {
+            'label': args.label,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'runs': args.runs,
+            'results': results,
+        }
+        with open(args.json, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        print(f'\nappended to {args.json}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    payload = commands.add_parser('payload', help='JSON encoding, pass-through and compression')
+    payload.add_argument('--agents', type=int, default=500, help='agent states in the synthetic pulse')
+    payload.add_argument('--requests', type=int, default=2000, help='iterations per measurement')
+    payload.set_defaults(run=bench_payload)
+
+    ratelimit = commands.add_parser('ratelimit', help='limiter storage per-check overhead')
+    ratelimit.add_argument('--checks', type=int, default=100000, help='hits per process')
+    ratelimit.add_argument('--keys', type=int, default=1000, help='distinct client keys')
+    ratelimit.add_argument('--workers', type=int, default=4, help='contending processes')
+    ratelimit.set_defaults(run=bench_ratelimit)
+
+    audit = commands.add_parser('audit', help='audit sampling cost and volume')
+    audit.add_argument('--requests', type=int, default=20000, help='benign requests per setting')
+    audit.add_argument('--ips', type=int, default=200, help='distinct client IPs')
+    audit.set_defaults(run=bench_audit)
+
+    blocklist = commands.add_parser('blocklist', help='CIDR blocklist lookup cost')
+    blocklist.add_argument('--ranges', type=int, default=100000, help='IPv4 ranges in the synthetic feed (+10%% IPv6)')
+    blocklist.add_argument('--lookups', type=int, default=200000, help='lookups per measurement')
+    blocklist.set_defaults(run=bench_blocklist)
+
+    balance = commands.add_parser('balance', help='BASE balance batching and per-block cache')
+    balance.add_argument('--addresses', type=int, default=50, help='wallets per refresh')
+    balance.add_argument('--latency', type=float, default=30, help='simulated node latency, ms per request')
+    balance.add_argument('--polls', type=int, default=20, help='repeat polls within one block')
+    balance.set_defaults(run=bench_balance)
+
+    chat = commands.add_parser('chat', help='multi-turn chat sessions: history window and prompt caching')
+    chat.add_argument('--turns', type=int, default=40, help='turns in the conversation')
+    chat.add_argument('--history-tokens', type=int, default=8000, help='CHAT_HISTORY_TOKENS budget')
+    chat.set_defaults(run=bench_chat)
+
+    chatcache = commands.add_parser('chatcache', help='/api/chat coalescing and answer cache')
+    chatcache.add_argument('--requests', type=int, default=16, help='identical messages per scenario')
+    chatcache.add_argument('--latency', type=float, default=300, help='simulated model latency, ms')
+    chatcache.add_argument('--ttl', type=float, default=60, help='CHAT_CACHE_TTL for the cached scenario')
+    chatcache.set_defaults(run=bench_chatcache)
+
+    imports = commands.add_parser('imports', help='import-time profile of app.py')
+    imports.add_argument('--eager', action='store_true', help='profile with LAZY_IMPORTS=false')
+    imports.add_argument('--top', type=int, default=15, help='rows per table')
+    imports.set_defaults(run=bench_imports)
+
+    startup = commands.add_parser('startup', help='cold start to first request')
+    startup.add_argument('--runs', type=int, default=5, help='fresh interpreters per mode')
+    startup.add_argument('--agents', type=int, default=500, help='agent states in the stand-in pulse')
+    startup.add_argument('--label', default='dev', help='release label stored with --json')
+    startup.add_argument('--json', metavar='PATH', help='append the results as a JSON line')
+    startup.set_defaults(run=bench_startup)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
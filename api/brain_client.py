@@ -0,0 +1,259 @@
+"""
+B0B API - Brain Transport
+=========================
+Shared, pooled keep-alive HTTP session for every brain proxy call.
+
+One requests.Session per process, with a bounded urllib3 connection pool,
+so proxy routes reuse warm TCP+TLS connections to BRAIN_URL instead of
+handshaking on every request. Connect/read timeouts are set per brain path,
+and an optional CircuitBreaker makes calls fail fast while the brain is down.
+ConditionalCache revalidates GETs with the brain's own ETag/Last-Modified.
+AsyncBrainClient is the httpx equivalent used by the ASGI server (asgi.py);
+httpx is only imported once one is built.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from json_codec import JSONBody
+from lazy_imports import is_loaded, lazy_import
+
+httpx = lazy_import('httpx')
+
+
+def parse_route_timeouts(spec, default_connect):
+    """Parse '/chat=30,/pulse=3:5' into {path: (connect, read)}"""
+    timeouts = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        path, value = item.split('=', 1)
+        if ':' in value:
+            connect, read = value.split(':', 1)
+        else:
+            connect, read = default_connect, value
+        timeouts[path.strip()] = (float(connect), float(read))
+    return timeouts
+
+
+def is_timeout(error):
+    """True for a timeout from either transport (or an asyncio/futures deadline)"""
+    if isinstance(error, (TimeoutError, requests.Timeout)):
+        return True
+    # No httpx error can exist before httpx is imported - don't import it to check
+    return is_loaded('httpx') and isinstance(error, httpx.TimeoutException)
+
+
+class BrainClient:
+    """Thread-safe pooled HTTP client for the brain server"""
+
+    def __init__(self, base_url, pool_size=20, connect_timeout=3.05,
+                 read_timeout=10, route_timeouts=None, observe=None, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.default_timeout = (connect_timeout, read_timeout)
+        self.route_timeouts = dict(route_timeouts or {})
+        self.observe = observe  # (method, path, status, seconds) -> None
+        self.breaker = breaker  # CircuitBreaker shared with the async client
+
+        self.session = requests.Session()
+        # Never persist brain cookies - keeps the shared session stateless across threads
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._adapter = adapter
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+
+    def timeout_for(self, path):
+        """(connect, read) timeout for a brain path"""
+        return self.route_timeouts.get(path, self.default_timeout)
+
+    def request(self, method, path, timeout=None, **kwargs):
+        """Send a request to the brain over the shared pool"""
+        if self.breaker:
+            self.breaker.before_call()  # raises CircuitOpenError while the brain is down
+        with self._lock:
+            self._requests += 1
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            response = self.session.request(
+                method,
+                f'{self.base_url}{path}',
+                timeout=timeout or self.timeout_for(path),
+                **kwargs
+            )
+            status = response.status_code
+            self._record(status)
+            return response
+        except requests.RequestException:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            if status == 'error' and self.breaker:
+                self.breaker.record_failure()  # any exception, incl. a cancelled await
+            if self.observe:
+                self.observe(method, path, status, time.perf_counter() - started)
+
+    def _record(self, status):
+        """Feed a response status to the breaker - 5xx counts as a failure"""
+        if self.breaker:
+            if status >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def stats(self):
+        """Connection reuse metrics summed over every pool in the adapter"""
+        opened = 0
+        served = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            served += pool.num_requests
+        return {
+            'requests': self._requests,
+            'errors': self._errors,
+            'connections_opened': opened,
+            'connections_reused': max(served - opened, 0),
+            'reuse_ratio': round((served - opened) / served, 3) if served else 0.0,
+            'pool_size': self.pool_size,
+        }
+
+
+class AsyncBrainClient:
+    """Event-loop brain client - one pooled httpx.AsyncClient per process"""
+
+    def __init__(self, base_url, pool_size=100, connect_timeout=3.05,
+                 read_timeout=10, route_timeouts=None, observe=None, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.default_timeout = (connect_timeout, read_timeout)
+        self.route_timeouts = dict(route_timeouts or {})
+        self.observe = observe
+        self.breaker = breaker
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+        self._requests = 0
+        self._errors = 0
+        self._in_flight = 0
+
+    def timeout_for(self, path):
+        connect, read = self.route_timeouts.get(path, self.default_timeout)
+        return httpx.Timeout(read, connect=connect)
+
+    async def request(self, method, path, timeout=None, **kwargs):
+        """Send a request to the brain without blocking the event loop"""
+        if self.breaker:
+            self.breaker.before_call()
+        self._requests += 1
+        self._in_flight += 1
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            response = await self.client.request(
+                method, path, timeout=timeout or self.timeout_for(path), **kwargs
+            )
+            status = response.status_code
+            self._record(status)
+            return response
+        except httpx.HTTPError:
+            self._errors += 1
+            raise
+        finally:
+            if status == 'error' and self.breaker:
+                self.breaker.record_failure()
+            self._in_flight -= 1
+            if self.observe:
+                self.observe(method, path, status, time.perf_counter() - started)
+
+    _record = BrainClient._record
+
+    async def get(self, path, **kwargs):
+        return await self.request('GET', path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request('POST', path, **kwargs)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def stats(self):
+        return {
+            'requests': self._requests,
+            'errors': self._errors,
+            'in_flight': self._in_flight,
+            'pool_size': self.pool_size,
+        }
+
+
+class ConditionalCache:
+    """Last body and validators per brain path, for conditional GETs upstream
+
+    When the brain sent an ETag or Last-Modified, the next GET for that path
+    carries If-None-Match / If-Modified-Since; a 304 reuses the stored body
+    (the same JSONBody object, so its parse, hash and compressed forms too).
+    Brains that send no validators are simply fetched in full.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # path -> (etag, last_modified, JSONBody)
+        self._lock = threading.Lock()
+        self.stats = {'conditional': 0, 'not_modified': 0}
+
+    def headers(self, path):
+        """Conditional request headers for path ({} when nothing is stored)"""
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None:
+            return {}
+        etag, last_modified, _ = entry
+        self.stats['conditional'] += 1
+        if etag:
+            return {'If-None-Match': etag}
+        return {'If-Modified-Since': last_modified}
+
+    def resolve(self, path, response):
+        """(JSONBody, status) for a brain response, reusing the stored body on 304"""
+        if response.status_code == 304:
+            with self._lock:
+                entry = self._entries.get(path)
+            if entry is None:
+                raise RuntimeError(f'Unexpected 304 from brain for {path}')
+            self.stats['not_modified'] += 1
+            return entry[2], 200
+        body = JSONBody.from_response(response)
+        if response.status_code == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            with self._lock:
+                if etag or last_modified:
+                    self._entries[path] = (etag, last_modified, body)
+                    self._entries.move_to_end(path)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                else:
+                    self._entries.pop(path, None)
+        return body, response.status_code
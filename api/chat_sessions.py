@@ -0,0 +1,156 @@
+"""
+B0B API - Chat Sessions
+=======================
+Server-side multi-turn chat history, bounded by tokens and by idle time.
+
+A session keeps the turns of one conversation so the client only sends its
+new message. The history is a token-budgeted window: once it grows past
+`max_tokens`, the oldest turns are dropped down to `trim_to` in one step
+rather than one turn at a time, so the retained history stays
+byte-identical for many turns - which is what prompt caching keys on.
+Requests mark the newest user message as a cache breakpoint: a turn writes
+the cache for the whole conversation so far and the next turn reads it
+back, paying full input price only for what was added since.
+
+Sessions live in an LRU: idle ones expire after `idle_ttl` seconds, the
+least recently used are evicted past `max_sessions`. A session runs one
+turn at a time; a second concurrent turn is refused rather than
+interleaved.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+
+CACHE_BREAKPOINT = {'type': 'ephemeral'}
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) for budgeting, not billing"""
+    return len(text) // 4 + 1
+
+
+class SessionBusy(Exception):
+    """The session is already running a turn"""
+
+
+class ChatSession:
+    """One conversation: completed (user, assistant, tokens) turns and running usage"""
+
+    __slots__ = ('id', 'turns', 'tokens', 'busy_since', 'created_at', 'used_at', 'usage')
+
+    def __init__(self, session_id, now):
+        self.id = session_id
+        self.turns = deque()    # (user text, assistant text, estimated tokens)
+        self.tokens = 0         # estimated tokens of the retained turns
+        self.busy_since = None  # monotonic start of the running turn
+        self.created_at = now
+        self.used_at = now
+        self.usage = {'turns': 0, 'input_tokens': 0, 'output_tokens': 0,
+                      'cache_read_input_tokens': 0, 'cache_creation_input_tokens': 0}
+
+    def messages(self, message):
+        """Messages API history plus the new user message, marked as a cache breakpoint"""
+        messages = []
+        for user, assistant, _ in self.turns:
+            messages.append({'role': 'user', 'content': user})
+            messages.append({'role': 'assistant', 'content': assistant})
+        messages.append({
+            'role': 'user',
+            'content': [{'type': 'text', 'text': message, 'cache_control': CACHE_BREAKPOINT}],
+        })
+        return messages
+
+
+class SessionStore:
+    """Per-process chat sessions with a token-budgeted history and LRU idle eviction"""
+
+    def __init__(self, max_sessions=1000, idle_ttl=1800.0, max_tokens=8000, trim_to=None,
+                 turn_timeout=300.0):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_tokens = max_tokens
+        self.trim_to = max_tokens // 2 if trim_to is None else trim_to
+        self.turn_timeout = turn_timeout  # a turn never released (dropped stream) stops blocking after this
+        self._sessions = OrderedDict()  # id -> ChatSession, least recently used first
+        self._lock = threading.Lock()
+        self.counters = {'created': 0, 'expired': 0, 'evicted': 0, 'turns': 0,
+                         'trims': 0, 'turns_dropped': 0, 'busy': 0}
+
+    def _expire(self, now):
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.used_at < self.idle_ttl:
+                break
+            del self._sessions[session.id]
+            self.counters['expired'] += 1
+
+    def acquire(self, session_id=None, now=None):
+        """Start a turn on a session (a new one if session_id is None)
+
+        KeyError if the session is unknown or expired, SessionBusy if it is
+        mid-turn. Every acquire must be followed by finish() or release().
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if session_id is None:
+                session = ChatSession(secrets.token_urlsafe(18), now)
+                self._sessions[session.id] = session
+                self.counters['created'] += 1
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.counters['evicted'] += 1
+            else:
+                session = self._sessions[session_id]
+                if session.busy_since is not None and now - session.busy_since < self.turn_timeout:
+                    self.counters['busy'] += 1
+                    raise SessionBusy(session_id)
+                self._sessions.move_to_end(session_id)
+            session.busy_since = now
+            session.used_at = now
+            return session
+
+    def release(self, session, now=None):
+        """End a turn without recording it (the model call failed)"""
+        session.busy_since = None
+        session.used_at = time.monotonic() if now is None else now
+
+    def finish(self, session, message, reply, usage=None, now=None):
+        """Record a completed turn, trim the window if over budget and end the turn"""
+        usage = usage or {}
+        tokens = estimate_tokens(message) + (usage.get('output_tokens') or estimate_tokens(reply))
+        with self._lock:
+            session.turns.append((message, reply, tokens))
+            session.tokens += tokens
+            session.usage['turns'] += 1
+            for key, value in usage.items():
+                if key in session.usage:
+                    session.usage[key] += value or 0
+            self.counters['turns'] += 1
+            if session.tokens > self.max_tokens:
+                # Drop to the low-water mark in one go: the history prefix then
+                # stays the same (and cacheable) until the budget fills again
+                self.counters['trims'] += 1
+                while session.turns and session.tokens > self.trim_to:
+                    session.tokens -= session.turns.popleft()[2]
+                    self.counters['turns_dropped'] += 1
+        self.release(session, now)
+
+    def discard(self, session_id):
+        """Forget a session, True if it existed"""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self):
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'idle_ttl': self.idle_ttl,
+                'history_tokens': {'max': self.max_tokens, 'trim_to': self.trim_to},
+                'retained_turns': sum(len(s.turns) for s in self._sessions.values()),
+                **self.counters,
+            }
@@ -0,0 +1,132 @@
+"""
+B0B API - Circuit Breaker
+=========================
+Fail fast while an upstream is down, serve the last good answer instead.
+
+CircuitBreaker counts consecutive upstream failures (errors, timeouts,
+5xx). At failure_threshold it opens: calls raise CircuitOpenError at once
+instead of tying a worker up for the full read timeout. After
+recovery_timeout it goes half-open and lets a few trial calls through;
+one success closes it, one failure reopens it.
+
+LastGood keeps the most recent successful result per key so routes can
+answer from it, marked stale with its age, while the breaker is open.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f'{name} circuit open, retry in {retry_after:.1f}s')
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open trial -> closed"""
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30.0,
+                 half_open_max=1, on_change=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max = half_open_max  # trial calls allowed while half-open
+        self.on_change = on_change          # (name, old_state, new_state) -> None
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self.counters = {'rejected': 0, 'failures': 0, 'opened': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _transition(self, state):
+        old, self._state = self._state, state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self.counters['opened'] += 1
+        if state != CLOSED:
+            self._trials = 0
+        if self.on_change and old != state:
+            self.on_change(self.name, old, state)
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._transition(HALF_OPEN)
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and self._trials < self.half_open_max:
+                self._trials += 1
+                return
+            self.counters['rejected'] += 1
+            retry_after = max(self.recovery_timeout - (time.monotonic() - self._opened_at), 0)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.counters['failures'] += 1
+            self._failures += 1
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._transition(OPEN)
+
+    def stats(self):
+        with self._lock:
+            self._maybe_half_open()
+            return dict(self.counters, state=self._state, consecutive_failures=self._failures)
+
+
+class LastGood:
+    """Most recent successful result per key, for stale fallbacks"""
+
+    def __init__(self, max_entries=256, max_age=3600.0):
+        self.max_entries = max_entries
+        self.max_age = max_age  # older results are not served at all
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+
+    def put(self, key, value):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] is not value:  # re-put of a cached object keeps its age
+                self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """(value, age_seconds) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry[0]
+        if age > self.max_age:
+            return None
+        return entry[1], age
@@ -0,0 +1,186 @@
+"""
+B0B API - Claude Client Manager
+===============================
+One process-wide Anthropic client (and its async twin) instead of one per request.
+
+Clients hold a sized httpx connection pool, so chat requests reuse warm
+TLS connections to the API. A client is rebuilt lazily when the API key
+in the environment rotates. Calls take a lease on the client they use, so
+the replaced client is closed - and its pool released - once the last
+call still running on it finishes. After a fork (gunicorn --preload) the
+child drops the parent's clients without closing them - their sockets
+still belong to the parent - and builds its own on first use. The
+anthropic SDK itself is imported then too, not at startup.
+"""
+
+import os
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
+from lazy_imports import lazy_import
+
+anthropic = lazy_import('anthropic')
+httpx = lazy_import('httpx')
+
+
+class ClaudeClientManager:
+    """Lazily built, key-rotation-aware, fork-safe Anthropic clients"""
+
+    def __init__(self, key_env='CLAUDE_API_KEY', max_connections=20, max_keepalive=10):
+        self.key_env = key_env
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._sync = None    # (api_key, client)
+        self._async = None   # (api_key, client)
+        self._leases = {}    # id(client) -> calls in flight on it
+        self._retired = {}   # id(client) -> client replaced by a rotation, closed once idle
+        self._idle_async = []  # retired async clients waiting for the event loop to close them
+        self._orphaned = []  # inherited across fork - never closed, never reused
+        self.created = 0
+        self.closed = 0
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._orphaned.extend(c for c in (self._sync, self._async) if c)
+        self._orphaned.extend(self._retired.values())
+        self._orphaned.extend(self._idle_async)
+        self._sync = self._async = None
+        self._leases, self._retired, self._idle_async = {}, {}, []
+        self._pid = os.getpid()
+
+    def _limits(self):
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+        )
+
+    def _api_key(self):
+        api_key = os.getenv(self.key_env)
+        if not api_key:
+            raise ValueError(f"{self.key_env} environment variable not set")
+        return api_key
+
+    def _replace(self, slot, api_key, client):
+        """Install client for api_key in slot (under the lock); the old one if it can close now"""
+        current = getattr(self, slot)
+        setattr(self, slot, (api_key, client))
+        self.created += 1
+        if current is None:
+            return None
+        if self._leases.get(id(current[1])):
+            self._retired[id(current[1])] = current[1]
+            return None
+        return current[1]
+
+    def get(self):
+        """Shared sync client for the current key"""
+        api_key = self._api_key()
+        current = self._sync
+        if current and current[0] == api_key and self._pid == os.getpid():
+            return current[1]
+        idle = None
+        with self._lock:
+            if os.getpid() != self._pid:
+                self._after_fork()
+            if not self._sync or self._sync[0] != api_key:
+                client = anthropic.Anthropic(
+                    api_key=api_key,
+                    http_client=anthropic.DefaultHttpxClient(limits=self._limits()),
+                )
+                idle = self._replace('_sync', api_key, client)
+            client = self._sync[1]
+        if idle:
+            self._close(idle)
+        return client
+
+    def get_async(self):
+        """Shared async client for the current key (ASGI event loop)"""
+        api_key = self._api_key()
+        current = self._async
+        if current and current[0] == api_key and self._pid == os.getpid():
+            return current[1]
+        with self._lock:
+            if os.getpid() != self._pid:
+                self._after_fork()
+            if not self._async or self._async[0] != api_key:
+                client = anthropic.AsyncAnthropic(
+                    api_key=api_key,
+                    http_client=anthropic.DefaultAsyncHttpxClient(limits=self._limits()),
+                )
+                idle = self._replace('_async', api_key, client)
+                if idle:
+                    self._idle_async.append(idle)
+            return self._async[1]
+
+    def _checkout(self, get, slot):
+        # Retry if a rotation swapped the client between get() and taking the lease
+        while True:
+            client = get()
+            with self._lock:
+                current = getattr(self, slot)
+                if current and current[1] is client:
+                    self._leases[id(client)] = self._leases.get(id(client), 0) + 1
+                    return client
+
+    def _checkin(self, client):
+        """End one call on client; returns it if it was retired and this was its last call"""
+        with self._lock:
+            left = self._leases.get(id(client), 1) - 1
+            if left:
+                self._leases[id(client)] = left
+                return None
+            self._leases.pop(id(client), None)
+            return self._retired.pop(id(client), None)
+
+    def _close(self, client):
+        client.close()
+        self.closed += 1
+
+    async def _aclose_idle(self, idle=None):
+        with self._lock:
+            clients, self._idle_async = self._idle_async, []
+        for client in clients + ([idle] if idle else []):
+            await client.close()
+            self.closed += 1
+
+    @contextmanager
+    def lease(self):
+        """Sync client held for one call - `with claude.lease() as client: ...`"""
+        client = self._checkout(self.get, '_sync')
+        try:
+            yield client
+        finally:
+            idle = self._checkin(client)
+            if idle:
+                self._close(idle)
+
+    @asynccontextmanager
+    async def alease(self):
+        """Async client held for one call - `async with claude.alease() as client: ...`"""
+        client = self._checkout(self.get_async, '_async')
+        try:
+            yield client
+        finally:
+            await self._aclose_idle(self._checkin(client))
+
+    async def aclose(self):
+        """Close the async client (ASGI shutdown)"""
+        await self._aclose_idle()
+        if self._async:
+            await self._async[1].close()
+            self._async = None
+            self.closed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients_created': self.created,
+                'clients_closed': self.closed,
+                'calls_in_flight': sum(self._leases.values()),
+                'retired_in_flight': len(self._retired),
+                'max_connections': self.max_connections,
+                'max_keepalive_connections': self.max_keepalive,
+            }
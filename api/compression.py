@@ -0,0 +1,114 @@
+"""
+B0B API - Response Compression
+==============================
+gzip / brotli negotiated on Accept-Encoding.
+
+Brotli is preferred when the brotli package is installed and the client
+accepts it, gzip otherwise. Bodies below min_bytes go out as-is. Bodies
+that are shared between requests (precomputed metadata, relayed brain
+snapshots) are compressed once and the encoded bytes reused from a small
+LRU, so a hot pulse costs one compression per snapshot, not per request.
+"""
+
+import gzip
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE = ('application/json', 'text/plain', 'text/html')
+
+
+def parse_accept_encoding(header):
+    """{'gzip': 1.0, 'br': 0.5, ...} from an Accept-Encoding header"""
+    accepted = {}
+    for item in (header or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(header):
+    """'br', 'gzip' or None for an Accept-Encoding header"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for coding in ('br', 'gzip') if brotli is not None else ('gzip',):
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class Compressor:
+    """Encodes response bodies, caching the result for shared bodies"""
+
+    def __init__(self, min_bytes=1024, gzip_level=6, brotli_quality=5, cache_size=64):
+        self.min_bytes = min_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (coding, body) -> encoded bytes
+        self._lock = threading.Lock()
+        self.stats = {'compressed': 0, 'cache_hits': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def encode(self, body, coding):
+        if coding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def compress(self, body, coding, shared=False):
+        """Encoded body; shared bodies are looked up in / stored into the LRU"""
+        encoded = None
+        if shared:
+            key = (coding, body)  # bytes cache their hash - cheap for the same object
+            with self._lock:
+                encoded = self._cache.get(key)
+                if encoded is not None:
+                    self._cache.move_to_end(key)
+                    self.stats['cache_hits'] += 1
+        if encoded is None:
+            encoded = self.encode(body, coding)
+            self.stats['compressed'] += 1
+            if shared:
+                with self._lock:
+                    self._cache[key] = encoded
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        self.stats['bytes_in'] += len(body)
+        self.stats['bytes_out'] += len(encoded)
+        return encoded
+
+    def apply(self, response, accept_encoding, shared=False):
+        """Compress a Flask response in place if the client and body allow it"""
+        response.vary.add('Accept-Encoding')
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE):
+            return response
+        body = response.get_data()
+        if len(body) < self.min_bytes:
+            return response
+        coding = negotiate(accept_encoding)
+        if coding is None:
+            return response
+        response.set_data(self.compress(body, coding, shared))
+        response.headers['Content-Encoding'] = coding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)  # same content, different bytes
+        return response
@@ -0,0 +1,196 @@
+"""
+Shared fixtures: local stand-ins for the BASE JSON-RPC node and the Anthropic
+Messages API, and the gateway (app.py) imported against them.
+
+app.py is imported once per test session; tests swap the module-level
+objects they exercise (base_rpc, chat_cache, chat_sessions) for fresh ones.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from bench import load_gateway
+
+
+def serve(handler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def send_json(handler, status, body):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+    handler.send_response(status)
+    handler.send_header('Content-Type', 'application/json')
+    handler.send_header('Content-Length', str(len(data)))
+    handler.end_headers()
+    handler.wfile.write(data)
+
+
+class RPCNode:
+    """Stand-in JSON-RPC node: eth_blockNumber and eth_getBalance over settable state"""
+
+    def __init__(self):
+        self.server = serve(self._handler())
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/v1/node-secret-key'
+        self.reset()
+
+    def reset(self):
+        self.block = 1000
+        self.balances = {}  # address (lower case) -> wei, 0 when missing
+        self.errors = {}    # address (lower case) -> JSON-RPC error object
+        self.reply = None   # (status, raw body) to answer every request with instead
+        self.requests = []  # decoded request payloads, in order
+
+    def methods(self):
+        """Methods of every request, one list per HTTP request"""
+        return [[call['method'] for call in payload] if isinstance(payload, list) else [payload['method']]
+                for payload in self.requests]
+
+    def _answer(self, call):
+        if call['method'] == 'eth_blockNumber':
+            return {'jsonrpc': '2.0', 'id': call['id'], 'result': hex(self.block)}
+        address = call['params'][0].lower()
+        if address in self.errors:
+            return {'jsonrpc': '2.0', 'id': call['id'], 'error': self.errors[address]}
+        return {'jsonrpc': '2.0', 'id': call['id'], 'result': hex(self.balances.get(address, 0))}
+
+    def _handler(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                node.requests.append(payload)
+                if node.reply is not None:
+                    return send_json(self, *node.reply)
+                if isinstance(payload, list):
+                    return send_json(self, 200, [node._answer(call) for call in payload])
+                send_json(self, 200, node._answer(payload))
+
+        return Handler
+
+
+class AnthropicAPI:
+    """Stand-in Messages API: echoes the newest user message, streams a fixed reply"""
+
+    STREAM_TEXT = ['hel', 'lo ', 'world']
+
+    def __init__(self):
+        self.server = serve(self._handler())
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.reset()
+
+    def reset(self):
+        self.delay = 0.0
+        self.requests = []  # decoded request bodies, in order
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self):
+        return len(self.requests)
+
+    def _message(self, body):
+        content = body['messages'][-1]['content']
+        text = content if isinstance(content, str) else content[-1]['text']
+        return {
+            'id': f'msg_{self.calls}', 'type': 'message', 'role': 'assistant', 'model': body['model'],
+            'content': [{'type': 'text', 'text': f'echo: {text}'}],
+            'stop_reason': 'end_turn', 'stop_sequence': None,
+            'usage': {'input_tokens': 10, 'output_tokens': 3},
+        }
+
+    def _stream(self, handler, body):
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Transfer-Encoding', 'chunked')
+        handler.end_headers()
+
+        def event(name, data):
+            chunk = f'event: {name}\ndata: {json.dumps({"type": name, **data})}\n\n'.encode('utf-8')
+            handler.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+
+        event('message_start', {'message': {
+            'id': 'msg_stream', 'type': 'message', 'role': 'assistant', 'content': [], 'model': body['model'],
+            'stop_reason': None, 'stop_sequence': None, 'usage': {'input_tokens': 10, 'output_tokens': 0},
+        }})
+        event('content_block_start', {'index': 0, 'content_block': {'type': 'text', 'text': ''}})
+        for text in self.STREAM_TEXT:
+            event('content_block_delta', {'index': 0, 'delta': {'type': 'text_delta', 'text': text}})
+        event('content_block_stop', {'index': 0})
+        event('message_delta', {'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                                'usage': {'output_tokens': 3}})
+        event('message_stop', {})
+        handler.wfile.write(b'0\r\n\r\n')
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with api._lock:
+                    api.requests.append(body)
+                time.sleep(api.delay)
+                if body.get('stream'):
+                    return api._stream(self, body)
+                send_json(self, 200, api._message(body))
+
+        return Handler
+
+
+@pytest.fixture(scope='session')
+def _rpc_node():
+    node = RPCNode()
+    yield node
+    node.server.shutdown()
+
+
+@pytest.fixture(scope='session')
+def _anthropic():
+    api = AnthropicAPI()
+    yield api
+    api.server.shutdown()
+
+
+@pytest.fixture
+def rpc_node(_rpc_node):
+    _rpc_node.reset()
+    return _rpc_node
+
+
+@pytest.fixture
+def anthropic_api(_anthropic):
+    _anthropic.reset()
+    return _anthropic
+
+
+@pytest.fixture(scope='session')
+def gateway(_rpc_node, _anthropic):
+    return load_gateway(
+        'http://127.0.0.1:9',
+        ANTHROPIC_BASE_URL=_anthropic.url,
+        CLAUDE_API_KEY='test',
+        REQUIRE_API_KEY='false',
+        BASE_RPC_URL=_rpc_node.url,
+        CHAT_SYSTEM_PROMPT='',
+    )
+
+
+@pytest.fixture
+def client(gateway):
+    return gateway.app.test_client()
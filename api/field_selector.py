@@ -0,0 +1,95 @@
+"""
+B0B API - Field Selector
+========================
+Sparse fieldsets for proxy responses: ?fields=agentStates.d0t,treasury.balance
+
+A field spec is a comma-separated list of dotted paths. It is compiled
+once into a tree of closures that copies only the selected branches of a
+document, and compiled selectors are cached per distinct spec, so
+repeated widget polls pay for the projection walk only.
+
+    agentStates.d0t      one key below another
+    agentStates.*.status '*' matches every key at that level
+    treasury             a whole subtree
+
+Lists are projected element by element. Paths that don't exist are left
+out rather than reported. A path overlapping a shorter one ('a' and 'a.b')
+keeps the whole subtree.
+"""
+
+from functools import lru_cache
+
+MAX_FIELDS = 32
+MAX_DEPTH = 8
+MAX_SPEC_LENGTH = 1024
+MAX_SEGMENT_LENGTH = 64
+
+_MISSING = object()
+_WHOLE = None  # tree leaf: take the value as-is
+
+
+def parse_fields(spec):
+    """'a.b,c' -> {'a': {'b': None}, 'c': None}; ValueError on a malformed spec"""
+    if len(spec) > MAX_SPEC_LENGTH:
+        raise ValueError(f'fields spec longer than {MAX_SPEC_LENGTH} characters')
+    paths = [path.strip() for path in spec.split(',') if path.strip()]
+    if not paths:
+        raise ValueError('no fields given')
+    if len(paths) > MAX_FIELDS:
+        raise ValueError(f'more than {MAX_FIELDS} fields')
+    tree = {}
+    for path in paths:
+        segments = path.split('.')
+        if len(segments) > MAX_DEPTH:
+            raise ValueError(f'{path}: deeper than {MAX_DEPTH} levels')
+        if any(not s or len(s) > MAX_SEGMENT_LENGTH for s in segments):
+            raise ValueError(f'{path}: empty or oversized segment')
+        node = tree
+        for segment in segments[:-1]:
+            child = node.get(segment, {})
+            if child is _WHOLE:
+                break  # a shorter path already takes this whole subtree
+            node = node.setdefault(segment, child)
+        else:
+            node[segments[-1]] = _WHOLE
+    return tree
+
+
+def _compile(tree):
+    keys = [(key, _compile(child) if child is not _WHOLE else None)
+            for key, child in tree.items() if key != '*']
+    wildcard = tree.get('*', _MISSING)
+    if wildcard is not _MISSING:
+        wildcard = _compile(wildcard) if wildcard is not _WHOLE else None
+
+    def select(value):
+        if isinstance(value, list):
+            return [picked for picked in map(select, value) if picked is not _MISSING]
+        if not isinstance(value, dict):
+            return _MISSING
+        out = {}
+        if wildcard is not _MISSING:
+            for key, child in value.items():
+                picked = child if wildcard is None else wildcard(child)
+                if picked is not _MISSING:
+                    out[key] = picked
+        for key, child_select in keys:
+            if key in value:
+                picked = value[key] if child_select is None else child_select(value[key])
+                if picked is not _MISSING:
+                    out[key] = picked
+        return out
+
+    return select
+
+
+@lru_cache(maxsize=256)
+def compile_fields(spec):
+    """Compiled selector for a field spec: document -> projected copy (cached per spec)"""
+    select = _compile(parse_fields(spec))
+
+    def project(document):
+        picked = select(document)
+        return {} if picked is _MISSING else picked
+
+    return project
@@ -0,0 +1,264 @@
+"""
+B0B API - Heavy Hitters
+=======================
+Approximate top-K counting in fixed memory (Space-Saving), per minute.
+
+A SpaceSaving summary tracks at most `capacity` keys. A new key arriving
+when it is full takes over the smallest counter, so any key with a true
+count above total/capacity is guaranteed to be present and every counter
+is an upper bound, overestimating by at most its `error`. Classic
+Space-Saving makes every newcomer inherit the smallest count as error; a
+small bit filter of the keys evicted so far lets a key that was never
+evicted start from zero instead, so a steady client arriving after a
+burst of scan noise keeps an exact count. Updates are a dict lookup and a
+heap push; the heap is compacted as it collects stale entries.
+
+WindowedHeavyHitters keeps one summary per minute for the last N minutes,
+so a distributed scan touching a million IPs still holds N * capacity
+counters. Closed minutes are folded into a rolling aggregate when they
+close and taken out of it when they expire, and its ranking is cached
+until the next rotation: "top sources this minute" reads one summary and
+"top sources this hour" merges that ranking with the open minute - both
+O(capacity), however many minutes are kept.
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+
+FILTER_BITS = 1 << 16  # evicted-key filter per summary (8 KiB); saturates under huge scans
+_FILTER_MASK = FILTER_BITS - 1
+
+
+class SpaceSaving:
+    """Space-Saving summary: at most `capacity` counters, weighted updates"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}  # key -> count (upper bound)
+        self.errors = {}  # key -> overestimation bound
+        self.total = 0    # exact sum of all weights added
+        self._heap = []   # (count, key), lazily invalidated
+        self._evicted = bytearray(FILTER_BITS // 8)  # may contain every key ever evicted
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, key, weight=1):
+        self.total += weight
+        count = self.counts.get(key)
+        if count is None:
+            count = 0
+            if len(self.counts) >= self.capacity:
+                floor, victim = self._pop_min()
+                del self.counts[victim]
+                del self.errors[victim]
+                self._mark_evicted(victim)
+                if self._maybe_evicted(key):
+                    count = floor  # may have been counted before: inherit the floor
+            self.errors[key] = count
+        count += weight
+        self.counts[key] = count
+        heapq.heappush(self._heap, (count, key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, k) for k, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _mark_evicted(self, key):
+        h = hash(key)
+        for bit in (h & _FILTER_MASK, (h >> 16) & _FILTER_MASK):
+            self._evicted[bit >> 3] |= 1 << (bit & 7)
+
+    def _maybe_evicted(self, key):
+        h = hash(key)
+        return all(
+            self._evicted[bit >> 3] & (1 << (bit & 7))
+            for bit in (h & _FILTER_MASK, (h >> 16) & _FILTER_MASK)
+        )
+
+    def _pop_min(self):
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return count, key
+
+    def floor(self):
+        """Most a key missing from the summary can have been counted (0 unless full)"""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def close(self):
+        """No more updates: drop the heap and filter, keep the counters"""
+        self._heap = []
+        self._evicted = None
+
+    def top(self, k):
+        """[(key, count, error)] for the k largest counters, largest first"""
+        return [
+            (key, count, self.errors[key])
+            for key, count in heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+        ]
+
+
+class _Aggregate:
+    """Sum of closed summaries; a key missing from a full one is padded with its floor"""
+
+    def __init__(self):
+        self.counts = {}       # key -> sum of counts where present
+        self.errors = {}       # key -> sum of errors where present
+        self.floors_seen = {}  # key -> sum of floors of the summaries it is present in
+        self.present = {}      # key -> number of summaries it is present in
+        self.floors = 0        # sum of floors of all summaries
+        self.total = 0
+        self._ranking = None   # cached [(key, count, error)], largest first
+
+    def fold(self, summary, sign):
+        """Add (sign=1) or remove (sign=-1) a closed summary"""
+        floor = summary.floor_at_close
+        self.floors += sign * floor
+        self.total += sign * summary.total
+        for key, count in summary.counts.items():
+            present = self.present.get(key, 0) + sign
+            if present:
+                self.present[key] = present
+                self.counts[key] = self.counts.get(key, 0) + sign * count
+                self.errors[key] = self.errors.get(key, 0) + sign * summary.errors[key]
+                self.floors_seen[key] = self.floors_seen.get(key, 0) + sign * floor
+            else:
+                for table in (self.present, self.counts, self.errors, self.floors_seen):
+                    del table[key]
+        self._ranking = None
+
+    def estimate(self, key):
+        """(count, error) over the closed summaries, padded where key is missing"""
+        missing = self.floors - self.floors_seen.get(key, 0)
+        return self.counts.get(key, 0) + missing, self.errors.get(key, 0) + missing
+
+    def ranking(self, size):
+        """The `size` largest estimates - recomputed only after a fold"""
+        if self._ranking is None or len(self._ranking) < min(size, len(self.counts)):
+            self._ranking = [
+                (key,) + self.estimate(key)
+                for key in heapq.nlargest(size, self.counts, key=lambda key: self.estimate(key)[0])
+            ]
+        return self._ranking
+
+
+class WindowedHeavyHitters:
+    """Space-Saving summaries per time window (default one minute), last `windows` kept"""
+
+    def __init__(self, k=10, capacity=None, window=60.0, windows=60):
+        self.k = k
+        self.capacity = capacity or k * 8
+        self.window = window
+        self.windows = windows
+        self._summaries = deque()  # (window index, SpaceSaving), oldest first; last one open
+        self._closed = _Aggregate()
+        self._lock = threading.Lock()
+
+    def _expire(self, index):
+        while self._summaries and self._summaries[0][0] <= index - self.windows:
+            _, summary = self._summaries.popleft()
+            if self._summaries:  # the open summary was never folded in
+                self._closed.fold(summary, -1)
+
+    def _current(self, now):
+        index = int(now // self.window)
+        if not self._summaries or self._summaries[-1][0] != index:
+            if self._summaries:
+                closing = self._summaries[-1][1]
+                closing.floor_at_close = closing.floor()
+                closing.close()
+                self._closed.fold(closing, 1)
+            self._summaries.append((index, SpaceSaving(self.capacity)))
+        self._expire(index)
+        return self._summaries[-1][1]
+
+    def add(self, key, weight=1, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._current(now).add(key, weight)
+
+    def _recent(self, windows, now):
+        first = int(now // self.window) - windows + 1
+        return [summary for index, summary in self._summaries if index >= first]
+
+    def top(self, k=None, windows=1, now=None):
+        """[(key, count, error)] over the last `windows` windows, largest first
+
+        One window reads a single summary. The full span merges the cached
+        ranking of the closed windows with the open one. Counts are upper
+        bounds: a key missing from a full summary may have been evicted
+        there, so that summary's smallest count is added to its count and
+        error.
+        """
+        k = k or self.k
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(int(now // self.window))
+            if windows == 1:
+                summaries = self._recent(1, now)
+                return summaries[0].top(k) if summaries else []
+            if windows >= self.windows:
+                return self._top_span(k)
+            return self._merge(k, self._recent(windows, now))
+
+    def _top_span(self, k):
+        if not self._summaries:
+            return []
+        current = self._summaries[-1][1]
+        floor = current.floor()
+        closed = self._closed
+        merged = {}
+        # A key outside both the closed ranking and the open summary is
+        # outranked by every ranked key, so these candidates suffice
+        for key, count, error in closed.ranking(self.capacity):
+            if key not in current.counts:
+                merged[key] = (count + floor, error + floor)
+        for key, count in current.counts.items():
+            closed_count, closed_error = closed.estimate(key)
+            merged[key] = (closed_count + count, closed_error + current.errors[key])
+        return [
+            (key, count, error)
+            for key, (count, error) in heapq.nlargest(k, merged.items(), key=lambda item: item[1][0])
+        ]
+
+    @staticmethod
+    def _merge(k, summaries):
+        counts, errors, floors_seen = {}, {}, {}
+        all_floors = 0
+        for summary in summaries:
+            floor = getattr(summary, 'floor_at_close', None)
+            floor = summary.floor() if floor is None else floor
+            all_floors += floor
+            for key, count in summary.counts.items():
+                counts[key] = counts.get(key, 0) + count
+                errors[key] = errors.get(key, 0) + summary.errors[key]
+                floors_seen[key] = floors_seen.get(key, 0) + floor
+        for key, seen in floors_seen.items():
+            missing = all_floors - seen
+            counts[key] += missing
+            errors[key] += missing
+        return [
+            (key, count, errors[key])
+            for key, count in heapq.nlargest(k, counts.items(), key=lambda item: item[1])
+        ]
+
+    def total(self, windows=1, now=None):
+        """Exact sum of weights added over the last `windows` windows"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(int(now // self.window))
+            if windows >= self.windows and self._summaries:
+                return self._closed.total + self._summaries[-1][1].total
+            return sum(summary.total for summary in self._recent(windows, now))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'k': self.k,
+                'capacity': self.capacity,
+                'window_seconds': self.window,
+                'windows_kept': len(self._summaries),
+                'tracked_keys': sum(len(summary) for _, summary in self._summaries),
+            }
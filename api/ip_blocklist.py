@@ -0,0 +1,412 @@
+"""
+B0B API - CIDR Blocklist
+========================
+IPv4 / IPv6 range blocks: whole subnets and published threat feeds.
+
+Ranges live in prefix tables keyed by (family, network, prefix length),
+each with an optional expiry and the source it came from. Feed ranges
+are compiled into a flat, sorted array of disjoint address intervals per
+family - overlapping and nested prefixes are resolved once, each interval
+keeping the latest expiry of the ranges covering it. IPv4 has a
+65536-bucket index on the top address bits: a bucket wholly inside one
+interval (or outside all of them) answers from the index alone, the rest
+narrow a C bisect to a handful of intervals. IPv6 bisects a machine-word
+array of the intervals' top 64 bits and only compares full 128-bit values
+among intervals sharing them. Admin blocks go to a second, small table, so
+adding or removing one never recompiles the feed.
+
+A lookup is one address parse plus an index read or a short bisect, with
+no per-address cache to fill or thrash: an address never seen before costs
+about the same as a repeat client - roughly 1 µs for IPv4 and 1.5 µs for
+IPv6 with 100k ranges loaded (`bench.py blocklist`), most of it parsing
+the address string. An expired range simply stops matching.
+
+Feed files hold one CIDR or address per line; '#' and ';' start comments
+(the Spamhaus DROP format loads as-is), bad lines are counted and skipped.
+Reloads build a complete new table and swap it in with one assignment, so
+lookups never see a half-loaded feed. A watcher thread reloads the file
+when its mtime or size changes.
+"""
+
+import heapq
+import os
+import socket
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from socket import AF_INET, AF_INET6, inet_pton
+
+FOREVER = float('inf')
+INDEX_BITS = 16
+INDEX_MIN = 1024  # intervals below which a plain bisect beats building the index
+UNCOVERED = -1  # IPv4 index state: no interval touches the bucket
+MIXED = -2      # IPv4 index state: bisect within the bucket
+
+
+def parse_address(ip):
+    """(4 or 6, int) for an address string, None if it isn't one"""
+    try:
+        if ':' not in ip:
+            return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+        value = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip.split('%', 1)[0]), 'big')
+    except (OSError, ValueError):
+        return None
+    if value >> 32 == 0xFFFF:  # ::ffff:a.b.c.d - an IPv4 client on a dual-stack socket
+        return 4, value & 0xFFFFFFFF
+    return 6, value
+
+
+def parse_network(cidr):
+    """(4 or 6, network int, prefix length) for '10.0.0.0/8', '2001:db8::/32' or a bare address
+
+    Host bits are masked off ('10.1.2.3/8' is 10.0.0.0/8); ValueError if malformed.
+    """
+    address, slash, prefix = cidr.strip().partition('/')
+    try:
+        family, version = (socket.AF_INET6, 6) if ':' in address else (socket.AF_INET, 4)
+        value = int.from_bytes(socket.inet_pton(family, address), 'big')
+    except OSError:
+        raise ValueError(f'not an IP network: {cidr!r}') from None
+    bits = _bits(version)
+    if not slash:
+        return version, value, bits
+    if not prefix.isdigit() or int(prefix) > bits:
+        raise ValueError(f'bad prefix length: {cidr!r}')
+    prefix = int(prefix)
+    return version, value >> (bits - prefix) << (bits - prefix), prefix
+
+
+def _bits(version):
+    return 32 if version == 4 else 128
+
+
+def compile_intervals(ranges):
+    """Disjoint (starts, ends, expiries) from overlapping (start, end, expires_at) ranges
+
+    A sweep over range boundaries keeps the covering ranges in a heap by
+    expiry; each elementary interval takes the latest one, and neighbours
+    with the same expiry are merged.
+    """
+    ranges = sorted(ranges)
+    points = sorted({start for start, _, _ in ranges} | {end + 1 for _, end, _ in ranges})
+    starts, ends, expiries = [], [], []
+    covering = []  # (-expires_at, end)
+    i = 0
+    for low, next_low in zip(points, points[1:]):
+        while i < len(ranges) and ranges[i][0] <= low:
+            heapq.heappush(covering, (-ranges[i][2], ranges[i][1]))
+            i += 1
+        while covering and covering[0][1] < low:
+            heapq.heappop(covering)
+        if not covering:
+            continue
+        expires_at = -covering[0][0]
+        if ends and ends[-1] == low - 1 and expiries[-1] == expires_at:
+            ends[-1] = next_low - 1
+        else:
+            starts.append(low)
+            ends.append(next_low - 1)
+            expiries.append(expires_at)
+    return starts, ends, expiries
+
+
+def _later(a, b):
+    """The later of two optional expiries"""
+    if a is None:
+        return b
+    return a if b is None or a >= b else b
+
+
+class _Family:
+    """Compiled IPv4 intervals, bucketed on the top INDEX_BITS bits"""
+
+    __slots__ = ('starts', 'ends', 'expiries', 'lo', 'hi', 'direct')
+
+    SHIFT = 32 - INDEX_BITS
+
+    def __init__(self, ranges):
+        starts, ends, expiries = compile_intervals(ranges)
+        # Flat machine-word arrays bisect ~2.5x faster than lists of int objects
+        self.starts = array('Q', starts)
+        self.ends = array('Q', ends)
+        self.expiries = array('d', expiries)
+        if len(starts) < INDEX_MIN:
+            # Admin blocks: a few C bisect steps, and no index to rebuild per change
+            self.direct = self.lo = self.hi = None
+            return
+        shift = self.SHIFT
+        buckets = 1 << INDEX_BITS
+        # An interval holding an address of bucket k starts at or before it and
+        # at or after the last interval starting before the bucket
+        firsts = [bisect_right(starts, k << shift) for k in range(buckets + 1)]
+        lo = [max(first - 1, 0) for first in firsts[:-1]]
+        hi = firsts[1:]
+        # Buckets covered by one interval, or by none, need no bisect at all
+        direct = array('l', [MIXED]) * buckets
+        for k in range(buckets):
+            low, high = k << shift, ((k + 1) << shift) - 1
+            touching = [i for i in range(lo[k], hi[k]) if ends[i] >= low]
+            if not touching:
+                direct[k] = UNCOVERED
+            elif len(touching) == 1 and starts[touching[0]] <= low and ends[touching[0]] >= high:
+                direct[k] = touching[0]
+        self.lo = array('L', lo)
+        self.hi = array('L', hi)
+        self.direct = direct
+
+    def match(self, value):
+        """Latest expiry of the ranges covering value (expired or not), None if uncovered"""
+        if self.direct is None:
+            i = bisect_right(self.starts, value) - 1
+            if i < 0 or value > self.ends[i]:
+                return None
+            return self.expiries[i]
+        k = value >> self.SHIFT
+        i = self.direct[k]
+        if i == MIXED:
+            i = bisect_right(self.starts, value, self.lo[k], self.hi[k]) - 1
+            if i < 0 or value > self.ends[i]:
+                return None
+        elif i == UNCOVERED:
+            return None
+        return self.expiries[i]
+
+
+class _WideFamily:
+    """Compiled IPv6 intervals: a bisect over their top 64 bits, then full values on ties"""
+
+    __slots__ = ('starts', 'ends', 'expiries', 'heads')
+
+    def __init__(self, ranges):
+        starts, ends, expiries = compile_intervals(ranges)
+        self.heads = array('Q', (start >> 64 for start in starts))
+        self.starts = starts  # 128-bit values don't fit a word
+        self.ends = ends
+        self.expiries = array('d', expiries)
+
+    def match(self, value):
+        """Latest expiry of the ranges covering value (expired or not), None if uncovered"""
+        head = value >> 64
+        heads = self.heads
+        j = bisect_right(heads, head)
+        if j and heads[j - 1] == head:
+            # Several intervals may start in this /64 - only those compare as big ints
+            i = bisect_right(self.starts, value, bisect_left(heads, head), j) - 1
+        else:
+            i = j - 1
+        if i < 0 or value > self.ends[i]:
+            return None
+        return self.expiries[i]
+
+
+class _Table:
+    """Immutable compiled lookup table for both families"""
+
+    __slots__ = ('entries', 'v4', 'v6', 'intervals', 'next_expiry')
+
+    def __init__(self, entries):
+        self.entries = entries  # (version, network, prefix) -> (expires_at, source)
+        ranges = {4: [], 6: []}
+        self.next_expiry = min((expires_at for expires_at, _ in entries.values()), default=FOREVER)
+        for (version, network, prefix), (expires_at, _) in entries.items():
+            size = 1 << (_bits(version) - prefix)
+            ranges[version].append((network, network + size - 1, expires_at))
+        self.v4 = _Family(ranges[4]) if ranges[4] else None
+        self.v6 = _WideFamily(ranges[6]) if ranges[6] else None
+        self.intervals = sum(len(f.starts) for f in (self.v4, self.v6) if f)
+
+    def match(self, version, value):
+        family = self.v4 if version == 4 else self.v6
+        return family.match(value) if family else None
+
+
+class CidrBlocklist:
+    """CIDR ranges from a feed file plus admin blocks, with expiry and hot reload"""
+
+    def __init__(self, path=None, reload_interval=30.0, feed_ttl=None):
+        self.path = path or None
+        self.reload_interval = reload_interval
+        self.feed_ttl = feed_ttl  # seconds a loaded feed stays valid without a reload
+        self._feed = _Table({})   # feed file ranges - recompiled on reload
+        self._admin = _Table({})  # admin blocks - small, recompiled on every change
+        self._lock = threading.Lock()
+        self._file_state = None   # (mtime_ns, size) of the last loaded feed
+        self._stop = threading.Event()
+        self.counters = {'reloads': 0, 'reload_errors': 0, 'bad_lines': 0, 'blocked': 0}
+        self.loaded_at = None
+        if self.path:
+            self.reload()
+            self._start_watcher()
+            os.register_at_fork(after_in_child=self._start_watcher)
+
+    # -- lookups ----------------------------------------------------------------
+
+    def lookup(self, ip, now=None):
+        """Expiry of the block covering ip (inf for permanent), None if not blocked"""
+        feed = self._feed
+        admin = self._admin
+        try:
+            if ':' not in ip:
+                # Inlined IPv4 feed match: every request and every scan takes this path
+                value = int.from_bytes(inet_pton(AF_INET, ip), 'big')
+                family = feed.v4
+                expires_at = None
+                if family is not None and family.direct is None:
+                    expires_at = family.match(value)
+                elif family is not None:
+                    k = value >> _Family.SHIFT
+                    i = family.direct[k]
+                    if i == MIXED:
+                        i = bisect_right(family.starts, value, family.lo[k], family.hi[k]) - 1
+                        if i >= 0 and value <= family.ends[i]:
+                            expires_at = family.expiries[i]
+                    elif i != UNCOVERED:
+                        expires_at = family.expiries[i]
+                if admin.v4 is not None:
+                    expires_at = _later(expires_at, admin.v4.match(value))
+            else:
+                if '%' in ip:  # fe80::1%eth0
+                    ip = ip.split('%', 1)[0]
+                value = int.from_bytes(inet_pton(AF_INET6, ip), 'big')
+                if value >> 32 == 0xFFFF:  # ::ffff:a.b.c.d
+                    value &= 0xFFFFFFFF
+                    expires_at = _later(feed.match(4, value), admin.match(4, value))
+                else:
+                    expires_at = feed.v6.match(value) if feed.v6 is not None else None
+                    if admin.v6 is not None:
+                        expires_at = _later(expires_at, admin.v6.match(value))
+        except (OSError, ValueError):  # not an address
+            return None
+        if expires_at is None:
+            return None
+        if expires_at != FOREVER and expires_at <= (time.time() if now is None else now):
+            return None
+        self.counters['blocked'] += 1
+        return expires_at
+
+    def contains(self, ip, now=None):
+        return self.lookup(ip, now) is not None
+
+    __contains__ = contains
+
+    # -- changes ----------------------------------------------------------------
+
+    def add(self, cidr, expires_at=None, source='admin'):
+        """Block a range (until expires_at, epoch seconds, or for good) - ValueError if malformed
+
+        Goes to the small admin table: the feed table is not recompiled.
+        """
+        key = parse_network(cidr)
+        with self._lock:
+            entries = dict(self._admin.entries)
+            entries[key] = (FOREVER if expires_at is None else expires_at, source)
+            self._admin = _Table(entries)  # one assignment: lookups see old or new
+
+    def remove(self, cidr):
+        """Unblock an exact range (admin or feed), True if it was listed
+
+        A feed range stays removed until the feed is next reloaded.
+        """
+        key = parse_network(cidr)
+        with self._lock:
+            for name in ('_admin', '_feed'):
+                table = getattr(self, name)
+                if key in table.entries:
+                    entries = dict(table.entries)
+                    del entries[key]
+                    setattr(self, name, _Table(entries))
+                    return True
+            return False
+
+    def purge(self, now=None):
+        """Drop expired ranges from both tables, return how many"""
+        now = time.time() if now is None else now
+        dropped = 0
+        with self._lock:
+            for name in ('_admin', '_feed'):
+                table = getattr(self, name)
+                if table.next_expiry > now:
+                    continue
+                entries = {k: v for k, v in table.entries.items() if v[0] > now}
+                dropped += len(table.entries) - len(entries)
+                setattr(self, name, _Table(entries))
+        return dropped
+
+    def load_lines(self, lines, source, expires_at=None):
+        """Replace every feed range from `source` with the CIDRs in lines, return how many loaded"""
+        expires_at = FOREVER if expires_at is None else expires_at
+        loaded = {}
+        bad = 0
+        for line in lines:
+            cidr = line.split('#', 1)[0].split(';', 1)[0].strip()
+            if not cidr:
+                continue
+            try:
+                loaded[parse_network(cidr)] = (expires_at, source)
+            except ValueError:
+                bad += 1
+        self.counters['bad_lines'] += bad
+        now = time.time()
+        with self._lock:
+            entries = {
+                k: v for k, v in self._feed.entries.items() if v[1] != source and v[0] > now
+            }
+            for key, value in loaded.items():
+                if key not in entries or entries[key][0] < value[0]:
+                    entries[key] = value
+            self._feed = _Table(entries)
+        return len(loaded)
+
+    def reload(self, force=False):
+        """Reload the feed file if it changed (or always with force), True if it was loaded"""
+        if not self.path:
+            return False
+        try:
+            st = os.stat(self.path)
+            state = (st.st_mtime_ns, st.st_size)
+            if not force and state == self._file_state:
+                return False
+            with open(self.path, encoding='utf-8', errors='replace') as f:
+                lines = f.readlines()
+        except OSError:
+            self.counters['reload_errors'] += 1
+            return False
+        expires_at = time.time() + self.feed_ttl if self.feed_ttl else None
+        self.load_lines(lines, source=f'file:{os.path.basename(self.path)}', expires_at=expires_at)
+        self._file_state = state
+        self.loaded_at = time.time()
+        self.counters['reloads'] += 1
+        return True
+
+    # -- hot reload -------------------------------------------------------------
+
+    def _start_watcher(self):
+        # (Re)start in this process - threads don't survive a fork
+        self._lock = threading.Lock()
+        thread = threading.Thread(target=self._watch, name='blocklist-watcher', daemon=True)
+        thread.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            self.reload()
+            self.purge()
+
+    def close(self):
+        self._stop.set()
+
+    def stats(self):
+        feed, admin = self._feed, self._admin
+        sources = {}
+        for table in (feed, admin):
+            for _, source in table.entries.values():
+                sources[source] = sources.get(source, 0) + 1
+        return {
+            'path': self.path,
+            'ranges': len(feed.entries) + len(admin.entries),
+            'admin_ranges': len(admin.entries),
+            'intervals': feed.intervals + admin.intervals,
+            'by_source': sources,
+            'loaded_at': self.loaded_at,
+            **self.counters,
+        }
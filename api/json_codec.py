@@ -0,0 +1,98 @@
+"""
+B0B API - JSON Codec
+====================
+Fast JSON encode/decode, and upstream JSON relayed without a round trip.
+
+orjson encodes when installed (several times faster than the stdlib
+encoder on large pulse documents), with the stdlib json module as a
+fallback producing the same compact, key-sorted output. Decoding stays on
+the stdlib so big integers (wei amounts) survive exactly. JSONBody keeps an
+upstream body as the bytes the brain sent: relaying it costs nothing, and
+it is only parsed the first time a projection actually needs the data
+and only hashed (for its ETag) the first time a response carries it.
+"""
+
+import hashlib
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def _stdlib_dumps(obj, default=None):
+    return json.dumps(obj, default=default, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj, default=None):
+        """Compact, key-sorted JSON as UTF-8 bytes"""
+        try:
+            return orjson.dumps(obj, default=default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits (wei amounts) - the stdlib handles those
+            return _stdlib_dumps(obj, default)
+else:
+    dumps = _stdlib_dumps
+
+# orjson would decode integers past 64 bits as floats; the stdlib keeps them exact
+loads = json.loads
+
+ENCODER = 'orjson' if orjson is not None else 'json'
+
+
+def content_etag(data):
+    """Content-hash entity tag for a body"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider (jsonify, request.get_json) backed by dumps/loads above"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, default=self.default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, default=self.default) + b'\n', mimetype=self.mimetype)
+
+
+class JSONBody:
+    """An upstream JSON body kept as raw bytes, parsed and hashed once on first use"""
+
+    __slots__ = ('raw', '_data', '_etag')
+
+    _UNPARSED = object()
+
+    def __init__(self, raw, data=_UNPARSED):
+        self.raw = raw
+        self._data = data
+        self._etag = None
+
+    @classmethod
+    def from_response(cls, response):
+        """Wrap a brain response; non-JSON content types are parsed now so bad bodies fail early"""
+        body = cls(response.content)
+        if 'json' not in response.headers.get('Content-Type', ''):
+            body.data
+        return body
+
+    @property
+    def data(self):
+        if self._data is JSONBody._UNPARSED:
+            self._data = loads(self.raw)
+        return self._data
+
+    @property
+    def etag(self):
+        if self._etag is None:
+            self._etag = content_etag(self.raw)
+        return self._etag
@@ -0,0 +1,67 @@
+"""
+B0B API - Lazy Imports
+======================
+Heavy SDKs imported on first use instead of at process start.
+
+The Anthropic SDK (pydantic models for the whole API surface), httpx (only
+the ASGI server and chat need it) and bleach together cost several hundred
+milliseconds of import, on every cold start, for processes that may only
+ever serve /api/health and cached proxy routes. lazy_import() hands out a
+stand-in module that performs the real import the first time an attribute
+is used:
+
+    anthropic = lazy_import('anthropic')
+    ...
+    anthropic.Anthropic(...)   # imported here, once
+
+LAZY_IMPORTS=false imports everything up front again, e.g. with gunicorn
+--preload, where importing before the fork lets workers share the pages.
+"""
+
+import importlib
+import os
+import sys
+
+LAZY = os.getenv('LAZY_IMPORTS', 'true').lower() != 'false'
+
+
+class LazyModule:
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            # The import system's per-module lock makes concurrent first uses safe
+            module = importlib.import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+    @property
+    def loaded(self):
+        return self.__dict__['_module'] is not None
+
+
+def lazy_import(name):
+    """The module itself if lazy imports are off or it is already imported, else a LazyModule"""
+    if not LAZY or name in sys.modules:
+        return importlib.import_module(name)
+    return LazyModule(name)
+
+
+def is_loaded(name):
+    """Whether a module has really been imported (by anyone) in this process"""
+    return name in sys.modules
@@ -0,0 +1,121 @@
+"""
+B0B API - Path Classifier
+=========================
+Compiled matcher for honeypot / scanner-probe paths.
+
+Rules are compiled once into a trie over path segments, so classifying a
+request costs one walk down the path - independent of how many rules are
+loaded. Rule syntax (case-insensitive, matched on '/'-separated segments):
+
+    /wp-login.php      exact path
+    /wp-admin/**       prefix: the path itself and anything below it
+    /*/config.php      '*' matches exactly one segment
+    /.env*             shell-style wildcards inside a segment
+    **/*.php           leading '**/' matches at any depth
+
+Each rule carries a severity; when several rules match, the most severe wins.
+"""
+
+import fnmatch
+import re
+
+WILDCARD = re.compile(r'[*?\[]')
+
+
+class PathRule:
+    __slots__ = ('pattern', 'severity', 'category')
+
+    def __init__(self, pattern, severity=1, category='honeypot'):
+        self.pattern = pattern
+        self.severity = severity
+        self.category = category
+
+    def __repr__(self):
+        return f'PathRule({self.pattern!r}, severity={self.severity})'
+
+
+class _Node:
+    __slots__ = ('children', 'globs', 'exact', 'rest')
+
+    def __init__(self):
+        self.children = {}  # literal segment -> _Node ('*' = any one segment)
+        self.globs = []     # (compiled segment pattern, _Node)
+        self.exact = None   # rule ending exactly here
+        self.rest = None    # rule ending in '/**' here
+
+
+def _better(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return b if b.severity > a.severity else a
+
+
+def split_path(path):
+    """Lower-cased, non-empty segments - '//.git//config/' -> ['.git', 'config']"""
+    return [segment for segment in path.lower().split('/') if segment]
+
+
+class PathClassifier:
+    """Trie of exact, prefix and glob path rules"""
+
+    def __init__(self, rules=()):
+        self._root = _Node()
+        self._anywhere = _Node()  # rules starting with '**/'
+        self.rules = []
+        for rule in rules:
+            self.add(rule if isinstance(rule, PathRule) else PathRule(*rule))
+
+    def add(self, rule):
+        segments = split_path(rule.pattern)
+        node = self._root
+        if segments and segments[0] == '**' and len(segments) > 1:
+            node = self._anywhere
+            segments = segments[1:]
+        for position, segment in enumerate(segments):
+            if segment == '**':
+                if position != len(segments) - 1:
+                    raise ValueError(f"'**' only allowed first or last: {rule.pattern}")
+                node.rest = _better(node.rest, rule)
+                break
+            if segment != '*' and WILDCARD.search(segment):
+                compiled = re.compile(fnmatch.translate(segment))
+                for existing, child in node.globs:
+                    if existing.pattern == compiled.pattern:
+                        node = child
+                        break
+                else:
+                    child = _Node()
+                    node.globs.append((compiled, child))
+                    node = child
+            else:
+                node = node.children.setdefault(segment, _Node())
+        else:
+            node.exact = _better(node.exact, rule)
+        self.rules.append(rule)
+
+    def _walk(self, node, segments, index):
+        best = node.rest
+        if index == len(segments):
+            return _better(best, node.exact)
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            best = _better(best, self._walk(child, segments, index + 1))
+        child = node.children.get('*')
+        if child is not None:
+            best = _better(best, self._walk(child, segments, index + 1))
+        for compiled, child in node.globs:
+            if compiled.match(segment):
+                best = _better(best, self._walk(child, segments, index + 1))
+        return best
+
+    def classify(self, path):
+        """Most severe rule matching path, or None"""
+        segments = split_path(path)
+        best = self._walk(self._root, segments, 0)
+        if self._anywhere.children or self._anywhere.globs:
+            for start in range(len(segments)):
+                best = _better(best, self._walk(self._anywhere, segments, start))
+        return best
@@ -0,0 +1,178 @@
+"""
+B0B API - Pulse Broadcaster
+===========================
+One upstream poller for the brain /pulse, fanned out to every viewer.
+
+While at least one subscriber is connected, a single background thread
+fetches the pulse at a fixed cadence, diffs its top-level sections
+against the previous snapshot and pushes only the changed ones to every
+subscriber. Brain load is O(1) in viewers; with no viewers the poller
+stops. New subscribers get the full snapshot first. A subscriber that
+falls behind is resynced with a fresh snapshot instead of growing a queue.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+
+
+class _Subscriber:
+    """Thread-side subscriber (WSGI generator)"""
+
+    def __init__(self, max_queue):
+        self.queue = queue.Queue(maxsize=max_queue)
+
+    def deliver(self, event, resync):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self._drain()
+            self.queue.put_nowait(resync())
+
+    def _drain(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class _AsyncSubscriber:
+    """Event-loop subscriber (ASGI async generator)"""
+
+    def __init__(self, max_queue, loop):
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.loop = loop
+
+    def deliver(self, event, resync):
+        self.loop.call_soon_threadsafe(self._put, event, resync)
+
+    def _put(self, event, resync):
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = resync()
+        self.queue.put_nowait(event)
+
+
+class PulseBroadcaster:
+    """Polls fetch() while anyone listens, broadcasts changed sections"""
+
+    def __init__(self, fetch, interval=5.0, max_queue=16, max_subscribers=100):
+        self.fetch = fetch            # () -> dict (the pulse document)
+        self.interval = interval
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._snapshot = None
+        self._thread = None
+        self._failing = False
+        self.counters = {'polls': 0, 'updates': 0, 'errors': 0}
+
+    # -- subscriptions --------------------------------------------------------
+
+    def subscribe(self):
+        return self._add(_Subscriber(self.max_queue))
+
+    def subscribe_async(self):
+        return self._add(_AsyncSubscriber(self.max_queue, asyncio.get_running_loop()))
+
+    def _add(self, subscriber):
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscriber)
+            if self._snapshot is not None:
+                subscriber.deliver(self._full_event(), self._full_event)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='pulse-poller', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def listen(self, heartbeat=15.0):
+        """Yield (event, data) as they arrive, None every idle `heartbeat` seconds"""
+        subscriber = self.subscribe()
+        if subscriber is None:
+            yield ('error', {'error': 'Too many subscribers'})
+            return
+        try:
+            while True:
+                try:
+                    yield subscriber.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield None
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def alisten(self, heartbeat=15.0):
+        """listen() for the event loop"""
+        subscriber = self.subscribe_async()
+        if subscriber is None:
+            yield ('error', {'error': 'Too many subscribers'})
+            return
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        return dict(self.counters, subscribers=len(self._subscribers),
+                    polling=self._thread is not None)
+
+    # -- poller ---------------------------------------------------------------
+
+    def _full_event(self):
+        return ('snapshot', {'sections': self._snapshot})
+
+    def _broadcast(self, event):
+        for subscriber in list(self._subscribers):
+            subscriber.deliver(event, self._full_event)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            started = time.monotonic()
+            self.poll()
+            time.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    def poll(self):
+        """One fetch + diff + broadcast"""
+        self.counters['polls'] += 1
+        try:
+            data = self.fetch()
+        except Exception:
+            self.counters['errors'] += 1
+            with self._lock:
+                if not self._failing:
+                    self._failing = True
+                    self._broadcast(('error', {'error': 'Brain unreachable'}))
+            return
+
+        with self._lock:
+            self._failing = False
+            previous = self._snapshot
+            self._snapshot = data
+            if previous is None:
+                self._broadcast(self._full_event())
+                return
+            changed = {k: v for k, v in data.items() if previous.get(k) != v}
+            removed = [k for k in previous if k not in data]
+            if changed or removed:
+                self.counters['updates'] += 1
+                self._broadcast(('update', {'sections': changed, 'removed': removed}))
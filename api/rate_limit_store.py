@@ -0,0 +1,269 @@
+"""
+B0B API - Shared Rate-Limit Storage
+===================================
+flask-limiter / limits storage backend shared by every worker on the host.
+
+With storage_uri="memory://" each gunicorn worker counts on its own, so N
+workers allow N times the configured limit. This backend keeps the
+counters in a fixed-size hash table in an mmap'd file (e.g. /dev/shm) and
+updates them under flock, so a check-and-increment is atomic across
+processes. No Redis or sidecar needed:
+
+    storage_uri="shm:///dev/shm/b0b-ratelimit?slots=65536"
+
+Each slot holds a two-bucket sliding window (the same roll_window /
+window_count scheme as the threat store), which backs the limits
+"sliding-window-counter" strategy; "fixed-window" is supported too. A
+check is one hash, a short probe and two flock syscalls.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from limits.storage import Storage
+
+from threat_store import roll_window
+
+try:
+    from limits.storage.base import SlidingWindowCounterSupport
+except ImportError:  # limits < 4.1: fixed-window only
+    SlidingWindowCounterSupport = None
+
+SLIDING_WINDOW = SlidingWindowCounterSupport is not None
+STRATEGY = 'sliding-window-counter' if SLIDING_WINDOW else 'fixed-window'
+
+_BASES = (Storage, SlidingWindowCounterSupport) if SLIDING_WINDOW else (Storage,)
+
+
+class SharedMemoryStorage(*_BASES):
+    """Open-addressing table of sliding-window counters in an mmap'd file"""
+
+    STORAGE_SCHEME = ['shm']
+
+    MAGIC = b'B0BRATE1'
+    HEADER = struct.Struct('<8sIIQ')  # magic, slots, reserved, evictions
+    SLOT = struct.Struct('<16sddII')  # key, window_start, expires_at, cur, prev
+    EMPTY_KEY = bytes(16)             # never used - ends a probe sequence
+    DELETED_KEY = b'\xff' * 16        # cleared - reusable, probing continues
+    PROBES = 8
+
+    def __init__(self, uri='shm:///dev/shm/b0b-ratelimit', wrap_exceptions=False, **options):
+        import fcntl  # POSIX only - use memory:// elsewhere
+        self._fcntl = fcntl
+        parsed = urlparse(uri)
+        query = parse_qs(parsed.query)
+        self.path = parsed.path or '/dev/shm/b0b-ratelimit'
+        self.slots = int(options.get('slots') or query.get('slots', ['65536'])[0])
+        self._lock = threading.Lock()
+        super().__init__(uri, wrap_exceptions=wrap_exceptions)
+        self._open()
+        # flock is per open file: a forked worker must get its own descriptor
+        os.register_at_fork(after_in_child=self._reopen)
+
+    @property
+    def base_exceptions(self):
+        return OSError
+
+    def _open(self):
+        fcntl = self._fcntl
+        size = self.HEADER.size + self.SLOT.size * self.slots
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, size)
+                os.pwrite(fd, self.HEADER.pack(self.MAGIC, self.slots, 0, 0), 0)
+            else:
+                # Never resize a table other workers may have mapped: they would
+                # fault (SIGBUS) or read zeroes. A mismatch is a config error.
+                header = os.pread(fd, self.HEADER.size, 0)
+                if len(header) < self.HEADER.size or header[:8] != self.MAGIC:
+                    raise ValueError(f"{self.path} is not a rate limit store file - remove it or use another path")
+                slots = self.HEADER.unpack(header)[1]
+                if slots != self.slots or os.fstat(fd).st_size != size:
+                    raise ValueError(
+                        f"{self.path} holds {slots} slots, RATE_LIMIT_STORAGE asks for {self.slots} - "
+                        f"stop every worker and remove it, or use a new path"
+                    )
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+
+    def _reopen(self):
+        self._lock = threading.Lock()
+        self._map.close()
+        os.close(self._fd)
+        self._open()
+
+    # -- locking: threads in this process, then other processes --------------
+
+    def _acquire(self):
+        self._lock.acquire()
+        self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+
+    def _release(self):
+        self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+        self._lock.release()
+
+    # -- slots ----------------------------------------------------------------
+
+    @staticmethod
+    def _key(key):
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+    def _offset(self, index):
+        return self.HEADER.size + index * self.SLOT.size
+
+    def _find(self, digest, now, create):
+        """(index, slot) for digest; with create=True claim a free, expired or soonest-expiring slot"""
+        start = int.from_bytes(digest[:8], 'little') % self.slots
+        free = None
+        victim = None
+        for probe in range(self.PROBES):
+            index = (start + probe) % self.slots
+            slot = self.SLOT.unpack_from(self._map, self._offset(index))
+            if slot[0] == digest:
+                return index, slot
+            if slot[0] == self.EMPTY_KEY:
+                if free is None:
+                    free = index
+                break  # nothing was ever stored past an empty slot
+            if free is None and (slot[0] == self.DELETED_KEY or slot[2] <= now):
+                free = index
+            elif victim is None or slot[2] < victim[1]:
+                victim = (index, slot[2])
+        if not create:
+            return None, None
+        if free is None:
+            # Neighbourhood full of live counters - evict the one closest to expiry
+            free = victim[0]
+            magic, slots, reserved, evictions = self.HEADER.unpack_from(self._map, 0)
+            self.HEADER.pack_into(self._map, 0, magic, slots, reserved, evictions + 1)
+        return free, (digest, 0.0, 0.0, 0, 0)
+
+    def _write(self, index, digest, window_start, expires_at, cur, prev):
+        self.SLOT.pack_into(self._map, self._offset(index), digest, window_start, expires_at, cur, prev)
+
+    # -- fixed window ---------------------------------------------------------
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        digest = self._key(key)
+        self._acquire()
+        try:
+            index, slot = self._find(digest, now, create=True)
+            _, _, expires_at, cur, _ = slot
+            if expires_at <= now:
+                cur, expires_at = 0, now + expiry
+            elif elastic_expiry:
+                expires_at = now + expiry
+            cur += amount
+            self._write(index, digest, 0.0, expires_at, cur, 0)
+            return cur
+        finally:
+            self._release()
+
+    def get(self, key):
+        now = time.time()
+        self._acquire()
+        try:
+            _, slot = self._find(self._key(key), now, create=False)
+        finally:
+            self._release()
+        if slot is None or slot[2] <= now:
+            return 0
+        return slot[3]
+
+    def get_expiry(self, key):
+        now = time.time()
+        self._acquire()
+        try:
+            _, slot = self._find(self._key(key), now, create=False)
+        finally:
+            self._release()
+        if slot is None or slot[2] <= now:
+            return now
+        return slot[2]
+
+    # -- sliding window counter -----------------------------------------------
+
+    def _window(self, slot, expiry, now):
+        window_start, cur, prev = roll_window(slot[1], slot[3], slot[4], expiry, now)
+        return window_start, cur, prev
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        digest = self._key(key)
+        self._acquire()
+        try:
+            index, slot = self._find(digest, now, create=True)
+            window_start, cur, prev = self._window(slot, expiry, now)
+            previous_ttl = window_start + expiry - now
+            weighted = prev * previous_ttl / expiry + cur
+            if math.floor(weighted) + amount > limit:
+                return False
+            self._write(index, digest, window_start, window_start + 2 * expiry, cur + amount, prev)
+            return True
+        finally:
+            self._release()
+
+    def get_sliding_window(self, key, expiry):
+        now = time.time()
+        self._acquire()
+        try:
+            _, slot = self._find(self._key(key), now, create=False)
+        finally:
+            self._release()
+        if slot is None:
+            slot = (None, 0.0, 0.0, 0, 0)
+        window_start, cur, prev = self._window(slot, expiry, now)
+        previous_ttl = window_start + expiry - now if prev else 0.0
+        return prev, previous_ttl, cur, window_start + 2 * expiry - now
+
+    def clear_sliding_window(self, key, expiry):
+        self.clear(key)
+
+    # -- housekeeping ---------------------------------------------------------
+
+    def clear(self, key):
+        self._acquire()
+        try:
+            index, _ = self._find(self._key(key), time.time(), create=False)
+            if index is not None:
+                self._write(index, self.DELETED_KEY, 0.0, 0.0, 0, 0)
+        finally:
+            self._release()
+
+    def reset(self):
+        self._acquire()
+        try:
+            live = sum(
+                1 for slot in self.SLOT.iter_unpack(self._map[self.HEADER.size:])
+                if slot[0] not in (self.EMPTY_KEY, self.DELETED_KEY)
+            )
+            self._map[self.HEADER.size:] = bytes(self.SLOT.size * self.slots)
+            return live
+        finally:
+            self._release()
+
+    def check(self):
+        return not self._map.closed
+
+    def stats(self):
+        return {
+            'backend': 'shm',
+            'path': self.path,
+            'slots': self.slots,
+            'evictions': self.HEADER.unpack_from(self._map, 0)[3],
+        }
@@ -0,0 +1,142 @@
+"""
+B0B API - Snapshot Cache
+========================
+In-process TTL cache with single-flight loading.
+
+Several gateway routes project fields out of the same upstream document
+(the brain's /pulse). Instead of each route fetching it, they all read one
+cached snapshot. When the snapshot is stale, the first caller fetches it and
+every concurrent caller waits on that same in-flight fetch. Under the ASGI
+server the same cache coalesces coroutines with get_async(). With
+max_entries set, the least recently used keys are evicted first. A
+`cacheable` predicate keeps results such as upstream errors out of the
+cache: they still go to the callers waiting on that load, but the next
+caller loads again.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    """One in-flight load that concurrent callers wait on"""
+
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SnapshotCache:
+    """Keyed TTL cache - at most one upstream load per key per TTL window"""
+
+    def __init__(self, ttl, max_entries=None, cacheable=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cacheable = cacheable  # value -> bool, None caches everything
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._inflight = {}  # key -> _Flight
+        self._async_inflight = {}  # key -> asyncio.Task
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'errors': 0}
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() at most once when stale"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.stats['hits'] += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.stats['errors'] += 1
+            raise
+        else:
+            with self._lock:
+                self._store(key, flight.value)
+            return flight.value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    async def get_async(self, key, loader):
+        """Coroutine twin of get() - loader is an async callable, awaited at most once"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.stats['hits'] += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+
+            task = self._async_inflight.get(key)
+            if task is None:
+                task = self._async_inflight[key] = asyncio.ensure_future(
+                    self._load_async(key, loader)
+                )
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        # shield: one cancelled caller must not cancel the load for everyone else
+        return await asyncio.shield(task)
+
+    async def _load_async(self, key, loader):
+        try:
+            value = await loader()
+        except Exception:
+            with self._lock:
+                self.stats['errors'] += 1
+            raise
+        else:
+            with self._lock:
+                self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._async_inflight.pop(key, None)
+
+    def _store(self, key, value):
+        if self.ttl <= 0:
+            return  # coalescing only
+        if self.cacheable is not None and not self.cacheable(value):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def invalidate(self, key=None):
+        """Drop one cached key, or everything"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
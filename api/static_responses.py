@@ -0,0 +1,52 @@
+"""
+B0B API - Precomputed Responses
+===============================
+Serialize immutable or slow-changing JSON bodies once, serve them with ETags.
+
+Metadata endpoints (/, /api/claude/models, /api/health) return the same
+document on every hit. A PrecomputedResponse builds and hashes the body
+once (or once per `refresh` seconds), answers If-None-Match with 304, and
+carries its own Cache-Control, which add_security_headers respects instead
+of forcing no-store. The body object is reused, so its compressed form is too.
+"""
+
+import hashlib
+import threading
+import time
+
+from flask import Response, g, request
+
+import json_codec
+
+
+class PrecomputedResponse:
+    """A JSON body serialized ahead of time, with a strong ETag"""
+
+    def __init__(self, build, cache_control='public, max-age=300', refresh=None):
+        self.build = build                  # () -> dict
+        self.cache_control = cache_control  # per-route Cache-Control
+        self.refresh = refresh              # seconds between rebuilds, None = never
+        self._lock = threading.Lock()
+        self._state = None
+        self._rebuild()
+
+    def _rebuild(self):
+        # Same encoding as jsonify: compact, sorted keys, trailing newline
+        body = json_codec.dumps(self.build()) + b'\n'
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        self._state = (time.monotonic(), body, etag)
+
+    def respond(self):
+        """Response for the current request: 200 with body, or 304 if the client's copy is current"""
+        built_at, body, etag = self._state
+        if self.refresh is not None and time.monotonic() - built_at >= self.refresh:
+            with self._lock:
+                if self._state[0] == built_at:
+                    self._rebuild()
+            built_at, body, etag = self._state
+
+        g.cache_control = self.cache_control
+        g.shared_body = True  # same bytes every time - compress once
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response.make_conditional(request)
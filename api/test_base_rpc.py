@@ -0,0 +1,132 @@
+"""Batched BASE balance lookups against the stand-in JSON-RPC node (conftest.RPCNode)"""
+
+import time
+
+import pytest
+
+from base_rpc import BaseRPC, RPCError
+
+WALLETS = [f'0x{i:040x}' for i in range(1, 6)]
+
+
+@pytest.fixture
+def rpc(gateway, rpc_node, monkeypatch):
+    rpc = BaseRPC(rpc_node.url, block_time=60)
+    monkeypatch.setattr(gateway, 'base_rpc', rpc)
+    return rpc
+
+
+def test_single_address(client, rpc, rpc_node):
+    rpc_node.balances[WALLETS[0]] = 1500000000000000000
+
+    response = client.post('/api/base/balance', json={'address': WALLETS[0]})
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        'address': WALLETS[0], 'balance': '1500000000000000000', 'balance_eth': '1.5',
+        'network': 'BASE', 'block': 1000,
+    }
+
+
+def test_many_addresses_in_one_batch(client, rpc, rpc_node):
+    for i, address in enumerate(WALLETS):
+        rpc_node.balances[address] = i * 10**18 + 7
+
+    response = client.post('/api/base/balance', json={'addresses': WALLETS})
+
+    assert response.status_code == 200
+    assert [(b['address'], b['balance']) for b in response.get_json()['balances']] == [
+        (address, str(i * 10**18 + 7)) for i, address in enumerate(WALLETS)
+    ]
+    assert rpc_node.methods() == [['eth_blockNumber'], ['eth_getBalance'] * len(WALLETS)]
+    assert [call['params'] for call in rpc_node.requests[1]] == [[address, hex(1000)] for address in WALLETS]
+
+
+def test_duplicate_addresses_asked_once(client, rpc, rpc_node):
+    response = client.post('/api/base/balance', json={'addresses': [WALLETS[0], WALLETS[0].upper().replace('0X', '0x')]})
+
+    assert response.status_code == 200
+    assert len(response.get_json()['balances']) == 1
+    assert rpc_node.methods()[-1] == ['eth_getBalance']
+
+
+def test_poll_within_block_is_cached(client, rpc, rpc_node):
+    client.post('/api/base/balance', json={'addresses': WALLETS})
+    requests = len(rpc_node.requests)
+
+    response = client.post('/api/base/balance', json={'addresses': WALLETS})
+
+    assert response.status_code == 200
+    assert len(rpc_node.requests) == requests
+    assert rpc.counters['cache_hits'] == len(WALLETS)
+
+
+def test_new_block_refreshes(gateway, client, rpc_node, monkeypatch):
+    rpc = BaseRPC(rpc_node.url, block_time=0.2)
+    monkeypatch.setattr(gateway, 'base_rpc', rpc)
+    rpc_node.balances[WALLETS[0]] = 5
+    assert client.post('/api/base/balance', json={'address': WALLETS[0]}).get_json()['balance'] == '5'
+
+    rpc_node.block, rpc_node.balances[WALLETS[0]] = 1001, 6
+    assert client.post('/api/base/balance', json={'address': WALLETS[0]}).get_json()['balance'] == '5'
+    time.sleep(0.25)
+    data = client.post('/api/base/balance', json={'address': WALLETS[0]}).get_json()
+
+    assert (data['block'], data['balance']) == (1001, '6')
+    assert rpc_node.methods()[-2:] == [['eth_blockNumber'], ['eth_getBalance']]
+    assert rpc_node.requests[-1][0]['params'] == [WALLETS[0], hex(1001)]
+
+
+def test_rpc_error_on_one_address(client, rpc, rpc_node):
+    rpc_node.balances.update({WALLETS[0]: 1, WALLETS[2]: 3})
+    rpc_node.errors[WALLETS[1]] = {'code': -32000, 'message': 'header not found'}
+
+    response = client.post('/api/base/balance', json={'addresses': WALLETS[:3]})
+
+    assert response.status_code == 200
+    assert response.get_json()['balances'] == [
+        {'address': WALLETS[0], 'balance': '1', 'balance_eth': '0.000000000000000001'},
+        {'address': WALLETS[1], 'error': 'header not found'},
+        {'address': WALLETS[2], 'balance': '3', 'balance_eth': '0.000000000000000003'},
+    ]
+    single = client.post('/api/base/balance', json={'address': WALLETS[1]})
+    assert single.status_code == 502
+    assert single.get_json()['error'] == 'header not found'
+
+
+def test_bad_hex_is_a_per_address_error(rpc, rpc_node):
+    rpc.block_number()  # request id 0
+    rpc_node.reply = (200, [{'jsonrpc': '2.0', 'id': 1, 'result': '0xzz'},
+                            {'jsonrpc': '2.0', 'id': 2, 'result': '0x10'}])
+
+    balances, _ = rpc.balances(WALLETS[:2])
+
+    assert isinstance(balances[WALLETS[0]], RPCError)
+    assert balances[WALLETS[1]] == 16
+
+
+@pytest.mark.parametrize('reply', [
+    (200, b'<html>not json</html>'),
+    (500, b'{"error": "upstream"}'),
+    (200, {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'batch rejected'}}),
+])
+def test_broken_node_is_503_without_url(client, rpc, rpc_node, reply, caplog):
+    rpc_node.reply = reply
+
+    response = client.post('/api/base/balance', json={'addresses': WALLETS})
+
+    assert response.status_code == 503
+    assert response.get_json() == {'error': 'BASE RPC unavailable'}
+    assert 'node-secret-key' not in caplog.text
+    assert '127.0.0.1' not in caplog.text
+
+
+def test_node_down_is_503_without_url(gateway, client, monkeypatch, caplog):
+    monkeypatch.setattr(gateway, 'base_rpc', BaseRPC('http://127.0.0.1:9/v1/node-secret-key', timeout=(1, 1)))
+
+    response = client.post('/api/base/balance', json={'address': WALLETS[0]})
+
+    assert response.status_code == 503
+    assert 'node-secret-key' not in response.get_data(as_text=True)
+    assert 'BASE RPC error' in caplog.text
+    assert 'node-secret-key' not in caplog.text
@@ -0,0 +1,100 @@
+"""/api/chat answer coalescing and cache against the stand-in Anthropic API (conftest.AnthropicAPI)"""
+
+import threading
+import time
+
+import pytest
+
+from snapshot_cache import SnapshotCache
+
+
+@pytest.fixture
+def use_cache(gateway, monkeypatch):
+    def install(ttl, max_entries=512):
+        cache = SnapshotCache(ttl=ttl, max_entries=max_entries)
+        monkeypatch.setattr(gateway, 'chat_cache', cache)
+        return cache
+    return install
+
+
+def ask(client, message='what is the swarm doing?', headers=None):
+    response = client.post('/api/chat', json={'message': message}, headers=headers or {})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_default_ttl_is_coalescing_only(gateway):
+    assert gateway.CHAT_CACHE_TTL == 0
+    assert gateway.chat_cache.ttl == 0
+
+
+def test_concurrent_identical_requests_share_one_call(gateway, anthropic_api, use_cache):
+    use_cache(ttl=0)
+    anthropic_api.delay = 0.3
+    start = threading.Barrier(8)
+    answers = []
+
+    def worker():
+        client = gateway.app.test_client()
+        start.wait()
+        answers.append(ask(client))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert anthropic_api.calls == 1
+    assert len(answers) == 8
+    assert {answer['message'] for answer in answers} == {'echo: what is the swarm doing?'}
+    assert sorted(answer['cached'] for answer in answers) == [False] + [True] * 7
+
+
+def test_no_ttl_never_serves_an_old_answer(client, anthropic_api, use_cache):
+    cache = use_cache(ttl=0)
+
+    answers = [ask(client) for _ in range(3)]
+
+    assert anthropic_api.calls == 3
+    assert [answer['cached'] for answer in answers] == [False, False, False]
+    assert len(cache) == 0
+
+
+def test_ttl_reuses_then_expires(client, anthropic_api, use_cache):
+    use_cache(ttl=0.3)
+
+    assert ask(client)['cached'] is False
+    assert ask(client)['cached'] is True
+    assert anthropic_api.calls == 1
+    time.sleep(0.35)
+
+    assert ask(client)['cached'] is False
+    assert anthropic_api.calls == 2
+
+
+def test_no_cache_header_skips_the_cache(client, anthropic_api, use_cache):
+    cache = use_cache(ttl=60)
+    ask(client)
+
+    answer = ask(client, headers={'Cache-Control': 'no-cache'})
+
+    assert answer['cached'] is False
+    assert anthropic_api.calls == 2
+    assert ask(client)['cached'] is True
+    assert cache.stats['hits'] == 1
+
+
+def test_lru_eviction_at_max_entries(client, anthropic_api, use_cache):
+    cache = use_cache(ttl=60, max_entries=2)
+    for message in ('a', 'b', 'c'):
+        ask(client, message)
+    assert anthropic_api.calls == 3
+    assert len(cache) == 2
+
+    assert ask(client, 'b')['cached'] is True
+    assert ask(client, 'c')['cached'] is True
+    answer = ask(client, 'a')
+
+    assert answer == {**answer, 'message': 'echo: a', 'cached': False}
+    assert anthropic_api.calls == 4
@@ -0,0 +1,120 @@
+"""Multi-turn chat sessions: SessionStore and /api/chat(/stream) against the stand-in Anthropic API"""
+
+import pytest
+
+from chat_sessions import SessionStore
+
+
+@pytest.fixture
+def sessions(gateway, monkeypatch):
+    store = SessionStore()
+    monkeypatch.setattr(gateway, 'chat_sessions', store)
+    return store
+
+
+def cache_marks(request):
+    """Indexes of the request messages carrying a cache_control block"""
+    return [
+        i for i, message in enumerate(request['messages'])
+        if isinstance(message['content'], list) and any('cache_control' in block for block in message['content'])
+    ]
+
+
+def test_history_trimmed_to_budget_keeping_newest_turns():
+    store = SessionStore(max_tokens=100, trim_to=50)
+    session = store.acquire()
+    for turn in range(1, 7):
+        # 36 characters = 10 estimated tokens, plus 10 output tokens: 20 per turn
+        store.finish(session, f'question {turn:02d} '.ljust(36, '.'), f'answer {turn}', {'output_tokens': 10})
+        store.acquire(session.id)
+
+    assert [user[:11] for user, _, _ in session.turns] == ['question 05', 'question 06']
+    assert session.tokens == 40
+    assert store.counters['trims'] == 1
+    assert store.counters['turns_dropped'] == 4
+
+    # Under budget again: the retained prefix is left alone
+    store.finish(session, 'question 07 '.ljust(36, '.'), 'answer 7', {'output_tokens': 10})
+    assert [user[:11] for user, _, _ in session.turns] == ['question 05', 'question 06', 'question 07']
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(idle_ttl=10)
+    session = store.acquire(now=0)
+    store.release(session, now=0)
+
+    store.acquire(session.id, now=9)
+    store.release(session, now=9)
+    with pytest.raises(KeyError):
+        store.acquire(session.id, now=20)
+    assert store.counters['expired'] == 1
+
+
+def test_least_recently_used_session_evicted():
+    store = SessionStore(max_sessions=2)
+    first, second = store.acquire(now=0), store.acquire(now=1)
+    store.release(first, now=2)
+    store.release(second, now=2)
+    store.acquire(first.id, now=3)
+    store.release(first, now=3)
+
+    store.acquire(now=4)
+
+    with pytest.raises(KeyError):
+        store.acquire(second.id, now=5)
+    assert store.acquire(first.id, now=5) is first
+    assert store.counters['evicted'] == 1
+
+
+def test_unknown_session_is_404(client, sessions):
+    response = client.post('/api/chat', json={'message': 'hi', 'session_id': 'no-such-session'})
+
+    assert response.status_code == 404
+    assert response.get_json()['code'] == 'SESSION_EXPIRED'
+
+
+@pytest.mark.parametrize('session_id', [['a'], 42, {'id': 'a'}, 'x' * 65])
+def test_invalid_session_id_is_400(client, sessions, anthropic_api, session_id):
+    response = client.post('/api/chat', json={'message': 'hi', 'session_id': session_id})
+
+    assert response.status_code == 400
+    assert anthropic_api.calls == 0
+
+
+def test_history_sent_with_cache_mark_on_newest_message_only(client, sessions, anthropic_api):
+    first = client.post('/api/chat', json={'message': 'one', 'session': True}).get_json()
+    session_id = first['session_id']
+    client.post('/api/chat', json={'message': 'two', 'session_id': session_id})
+
+    request = anthropic_api.requests[-1]
+
+    assert [(m['role'], m['content'] if isinstance(m['content'], str) else m['content'][0]['text'])
+            for m in request['messages']] == [('user', 'one'), ('assistant', 'echo: one'), ('user', 'two')]
+    assert cache_marks(request) == [2]
+    assert cache_marks(anthropic_api.requests[0]) == [0]
+
+
+def test_session_turns_skip_the_answer_cache(client, sessions, anthropic_api):
+    session_id = client.post('/api/chat', json={'message': 'same', 'session': True}).get_json()['session_id']
+
+    answer = client.post('/api/chat', json={'message': 'same', 'session_id': session_id}).get_json()
+
+    assert answer['cached'] is False
+    assert anthropic_api.calls == 2
+
+
+def test_stream_records_both_turns_after_done(client, sessions, anthropic_api):
+    session_id = client.post('/api/chat', json={'message': 'one', 'session': True}).get_json()['session_id']
+
+    response = client.post('/api/chat/stream', json={'message': 'stream me', 'session_id': session_id})
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert 'event: done' in body and session_id in body
+    session = sessions._sessions[session_id]
+    assert [(user, reply) for user, reply, _ in session.turns] == [('one', 'echo: one'), ('stream me', 'hello world')]
+    assert session.busy_since is None
+
+    client.post('/api/chat', json={'message': 'three', 'session_id': session_id})
+    assert [m['role'] for m in anthropic_api.requests[-1]['messages']] == ['user', 'assistant'] * 2 + ['user']
+    assert anthropic_api.requests[-1]['messages'][3]['content'] == 'hello world'
@@ -0,0 +1,12 @@
+"""Request metrics label cardinality"""
+
+
+def test_unknown_methods_share_one_label(gateway, client):
+    for method in ('FOO1', 'FOO2', 'GET'):
+        client.open('/api/health', method=method)
+
+    text = gateway.metrics.render()
+
+    assert 'method="other",route="unmatched",status="405"' in text
+    assert 'method="GET",route="/api/health"' in text
+    assert 'FOO' not in text
@@ -0,0 +1,53 @@
+"""Shared /pulse snapshot: brain errors are never cached, the stream poller bypasses it"""
+
+import asyncio
+
+import pytest
+
+from json_codec import JSONBody
+
+
+@pytest.fixture
+def brain_results(gateway, monkeypatch):
+    """Feed (body, status) results to fetch_pulse()/fetch_pulse_async() in order"""
+    results = []
+
+    def brain_get(path):
+        return results.pop(0)
+
+    async def brain_get_async(path):
+        return results.pop(0)
+
+    monkeypatch.setattr(gateway, 'brain_get', brain_get)
+    monkeypatch.setattr(gateway, 'brain_get_async', brain_get_async)
+    gateway.pulse_cache.invalidate()
+    yield results
+    gateway.pulse_cache.invalidate()
+
+
+@pytest.mark.parametrize('status', [404, 500, 503])
+def test_error_passes_through_uncached(gateway, brain_results, status):
+    brain_results.extend([('error', status), ('pulse', 200)])
+
+    assert gateway.fetch_pulse() == ('error', status)
+    assert gateway.fetch_pulse() == ('pulse', 200)
+    assert gateway.fetch_pulse() == ('pulse', 200)  # cached: no third brain call
+    assert brain_results == []
+
+
+def test_async_error_passes_through_uncached(gateway, brain_results):
+    brain_results.extend([('error', 502), ('pulse', 200)])
+
+    async def fetch_three():
+        return [await gateway.fetch_pulse_async() for _ in range(3)]
+
+    assert asyncio.run(fetch_three()) == [('error', 502), ('pulse', 200), ('pulse', 200)]
+    assert brain_results == []
+
+
+def test_stream_poller_reads_the_brain_not_the_cache(gateway, brain_results):
+    brain_results.extend([(JSONBody(b'{"epoch": 1}'), 200), (JSONBody(b'{"epoch": 2}'), 200)])
+    assert gateway.fetch_pulse()[0].data == {'epoch': 1}  # now cached for PULSE_CACHE_TTL
+
+    assert gateway.poll_pulse() == {'epoch': 2}
+    assert brain_results == []
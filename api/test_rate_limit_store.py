@@ -0,0 +1,34 @@
+"""Shared-memory limiter storage file handling"""
+
+import pytest
+
+from rate_limit_store import SharedMemoryStorage
+
+
+def test_reopen_keeps_the_counters(tmp_path):
+    uri = f'shm://{tmp_path}/ratelimit?slots=64'
+    SharedMemoryStorage(uri).incr('chat/203.0.113.7', 60)
+
+    assert SharedMemoryStorage(uri).get('chat/203.0.113.7') == 1
+
+
+def test_slot_mismatch_fails_without_touching_the_file(tmp_path):
+    path = tmp_path / 'ratelimit'
+    storage = SharedMemoryStorage(f'shm://{path}?slots=64')
+    storage.incr('chat/203.0.113.7', 60)
+    size = path.stat().st_size
+
+    with pytest.raises(ValueError, match='holds 64 slots'):
+        SharedMemoryStorage(f'shm://{path}?slots=128')
+
+    assert path.stat().st_size == size
+    assert storage.get('chat/203.0.113.7') == 1
+
+
+def test_foreign_file_is_refused(tmp_path):
+    path = tmp_path / 'ratelimit'
+    path.write_bytes(b'not a table' * 100)
+
+    with pytest.raises(ValueError, match='not a rate limit store file'):
+        SharedMemoryStorage(f'shm://{path}?slots=64')
+    assert path.read_bytes() == b'not a table' * 100
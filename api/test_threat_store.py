@@ -0,0 +1,37 @@
+"""Shared-memory threat store file handling"""
+
+import time
+
+import pytest
+
+from threat_store import SharedMemoryThreatStore
+
+
+def test_reopen_keeps_the_table(tmp_path):
+    path = str(tmp_path / 'threats')
+    store = SharedMemoryThreatStore(path=path, max_entries=100)
+    store.block('203.0.113.7', time.time() + 60)
+
+    assert SharedMemoryThreatStore(path=path, max_entries=100).is_blocked('203.0.113.7')
+
+
+def test_capacity_mismatch_fails_without_touching_the_file(tmp_path):
+    path = tmp_path / 'threats'
+    store = SharedMemoryThreatStore(path=str(path), max_entries=100)
+    store.block('203.0.113.7', time.time() + 60)
+    size = path.stat().st_size
+
+    with pytest.raises(ValueError, match='THREAT_STORE_MAX_IPS'):
+        SharedMemoryThreatStore(path=str(path), max_entries=200)
+
+    assert path.stat().st_size == size
+    assert store.is_blocked('203.0.113.7')
+
+
+def test_foreign_file_is_refused(tmp_path):
+    path = tmp_path / 'threats'
+    path.write_bytes(b'not a table' * 100)
+
+    with pytest.raises(ValueError, match='not a threat store file'):
+        SharedMemoryThreatStore(path=str(path), max_entries=100)
+    assert path.read_bytes() == b'not a table' * 100
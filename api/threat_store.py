@@ -0,0 +1,409 @@
+"""
+B0B API - Threat State Store
+============================
+Per-IP violation counters and blocks, bounded in memory and time.
+
+Violations are counted over a sliding window (two aligned buckets,
+weighted by overlap), blocks expire on their own, idle IPs are evicted
+after their TTL, and a hard entry cap bounds memory during a distributed
+scan. The cap never evicts a live block - otherwise a client could lift
+its own block by violating from enough spoofed addresses. Every operation
+is O(1) amortized.
+
+Backends:
+- MemoryThreatStore: in-process, LRU-capped. One worker only.
+- SharedMemoryThreatStore: fixed-size hash table in an mmap'd file
+  (e.g. /dev/shm), guarded by flock, so every gunicorn worker on the host
+  agrees on who is blocked.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+
+def roll_window(window_start, cur, prev, window, now):
+    """Advance a two-bucket sliding window to `now`"""
+    start = math.floor(now / window) * window
+    if start == window_start:
+        return window_start, cur, prev
+    if start - window_start == window:
+        return start, 0, cur
+    return start, 0, 0
+
+
+def window_count(window_start, cur, prev, window, now):
+    """Sliding-window estimate: current bucket + overlapping share of the previous one"""
+    overlap = 1.0 - (now - window_start) / window
+    return int(cur + prev * max(overlap, 0.0))
+
+
+class ThreatStore:
+    """Interface shared by all threat-state backends"""
+
+    def record_violation(self, ip, now=None, weight=1):
+        """Count a violation (weighted by severity), return the sliding-window count"""
+        raise NotImplementedError
+
+    def block(self, ip, until):
+        """Block ip until the given epoch time"""
+        raise NotImplementedError
+
+    def is_blocked(self, ip, now=None):
+        """True while ip is blocked. An expired block resets the IP's counters."""
+        raise NotImplementedError
+
+    def blocked_count(self):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+# =============================================================================
+# IN-PROCESS BACKEND
+# =============================================================================
+
+class _Entry:
+    __slots__ = ('window_start', 'cur', 'prev', 'blocked_until', 'last_seen')
+
+    def __init__(self, now):
+        self.window_start = 0.0
+        self.cur = 0
+        self.prev = 0
+        self.blocked_until = 0.0
+        self.last_seen = now
+
+
+class MemoryThreatStore(ThreatStore):
+    """LRU-capped, TTL-expiring threat state for a single process
+
+    Violation counters live in the LRU; blocks live in their own table,
+    bounded separately, so evicting an IP's counters never unblocks it.
+    """
+
+    def __init__(self, window=3600, max_entries=65536, max_blocked=None):
+        self.window = window
+        self.max_entries = max_entries
+        self.max_blocked = max_blocked or max_entries
+        self._entries = OrderedDict()  # ip -> _Entry, least recently seen first
+        self._blocked = {}             # ip -> blocked_until, never evicted while live
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.block_evictions = 0
+
+    def _expired(self, entry, now):
+        return entry.blocked_until <= now and now - entry.last_seen > self.window
+
+    def _sweep(self, now, budget=2):
+        # Amortized TTL eviction: check a couple of the stalest entries per call
+        for _ in range(budget):
+            if not self._entries:
+                return
+            ip, entry = next(iter(self._entries.items()))
+            if not self._expired(entry, now):
+                return
+            del self._entries[ip]
+            self._blocked.pop(ip, None)
+            self.evictions += 1
+
+    def _touch(self, ip, now):
+        entry = self._entries.get(ip)
+        if entry is None:
+            if len(self._entries) >= self.max_entries:
+                # Only counters go - a live block stays in _blocked
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            entry = self._entries[ip] = _Entry(now)
+            entry.blocked_until = self._blocked.get(ip, 0.0)
+        else:
+            self._entries.move_to_end(ip)
+        entry.last_seen = now
+        return entry
+
+    def record_violation(self, ip, now=None, weight=1):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._sweep(now)
+            entry = self._touch(ip, now)
+            entry.window_start, entry.cur, entry.prev = roll_window(
+                entry.window_start, entry.cur, entry.prev, self.window, now
+            )
+            entry.cur += weight
+            return window_count(entry.window_start, entry.cur, entry.prev, self.window, now)
+
+    def block(self, ip, until):
+        now = time.time()
+        with self._lock:
+            entry = self._touch(ip, now)
+            entry.blocked_until = until
+            if ip not in self._blocked and len(self._blocked) >= self.max_blocked:
+                self._make_room(now)
+            self._blocked[ip] = until
+
+    def _make_room(self, now):
+        # Drop expired blocks; with max_blocked IPs genuinely blocked, the one
+        # closest to expiry gives way
+        for ip in [ip for ip, until in self._blocked.items() if until <= now]:
+            del self._blocked[ip]
+        if len(self._blocked) >= self.max_blocked:
+            del self._blocked[min(self._blocked, key=self._blocked.get)]
+            self.block_evictions += 1
+
+    def is_blocked(self, ip, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            until = self._blocked.get(ip)
+            if until is None:
+                return False
+            if now < until:
+                if ip in self._entries:
+                    self._entries.move_to_end(ip)
+                return True
+            del self._blocked[ip]
+            self._entries.pop(ip, None)
+            return False
+
+    def blocked_count(self):
+        now = time.time()
+        with self._lock:
+            for ip in [ip for ip, until in self._blocked.items() if until <= now]:
+                del self._blocked[ip]
+            return len(self._blocked)
+
+    def stats(self):
+        return {
+            'backend': 'memory',
+            'tracked_ips': len(self._entries),
+            'blocked_ips': len(self._blocked),
+            'max_entries': self.max_entries,
+            'evictions': self.evictions,
+            'block_evictions': self.block_evictions,
+        }
+
+
+# =============================================================================
+# SHARED-MEMORY BACKEND (all workers on one host)
+# =============================================================================
+
+class SharedMemoryThreatStore(ThreatStore):
+    """Fixed-size open-addressing hash table in an mmap'd file, shared across processes"""
+
+    MAGIC = b'B0BTHRT1'
+    HEADER = struct.Struct('<8sIIQ')           # magic, capacity, reserved, evictions
+    SLOT = struct.Struct('<16s46sdIIddI')     # key, ip, window_start, cur, prev, blocked_until, last_seen, spare
+    EMPTY_KEY = bytes(16)
+    PROBES = 8
+
+    def __init__(self, path='/dev/shm/b0b-threats', window=3600, max_entries=65536):
+        import fcntl  # POSIX only - the in-process store works everywhere
+        self._fcntl = fcntl
+        self.path = path
+        self.window = window
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._blocked_cache = (0.0, 0)
+
+        self._open()
+        # flock is per open file: a forked worker must get its own descriptor
+        os.register_at_fork(after_in_child=self._reopen)
+
+    def _open(self):
+        fcntl = self._fcntl
+        size = self.HEADER.size + self.SLOT.size * self.max_entries
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, size)
+                os.pwrite(fd, self.HEADER.pack(self.MAGIC, self.max_entries, 0, 0), 0)
+            else:
+                # Never resize a table other workers may have mapped: they would
+                # fault (SIGBUS) or read zeroes. A mismatch is a config error.
+                header = os.pread(fd, self.HEADER.size, 0)
+                if len(header) < self.HEADER.size or header[:8] != self.MAGIC:
+                    raise ValueError(f"{self.path} is not a threat store file - remove it or set THREAT_STORE_PATH")
+                capacity = self.HEADER.unpack(header)[1]
+                if capacity != self.max_entries or os.fstat(fd).st_size != size:
+                    raise ValueError(
+                        f"{self.path} holds {capacity} IPs, THREAT_STORE_MAX_IPS is {self.max_entries} - "
+                        f"stop every worker and remove it, or set THREAT_STORE_PATH to a new file"
+                    )
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+
+    def _reopen(self):
+        self._lock = threading.Lock()
+        self._map.close()
+        os.close(self._fd)
+        self._open()
+
+    # -- locking: threads in this process, then other processes --------------
+
+    def _acquire(self):
+        self._lock.acquire()
+        self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+
+    def _release(self):
+        self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+        self._lock.release()
+
+    # -- slot helpers ---------------------------------------------------------
+
+    @staticmethod
+    def _key(ip):
+        return hashlib.blake2b(ip.encode('utf-8', 'replace'), digest_size=16).digest()
+
+    def _offset(self, index):
+        return self.HEADER.size + index * self.SLOT.size
+
+    def _read(self, index):
+        return self.SLOT.unpack_from(self._map, self._offset(index))
+
+    def _write(self, index, key, ip, window_start, cur, prev, blocked_until, last_seen):
+        self.SLOT.pack_into(
+            self._map, self._offset(index),
+            key, ip.encode('utf-8', 'replace')[:46], window_start, cur, prev,
+            blocked_until, last_seen, 0,
+        )
+
+    def _clear(self, index):
+        self._map[self._offset(index):self._offset(index) + self.SLOT.size] = bytes(self.SLOT.size)
+
+    def _expired(self, slot, now):
+        return slot[5] <= now and now - slot[6] > self.window
+
+    def _find(self, key, now, create, evict_blocks=False):
+        """Slot index holding key; with create=True claim a free, expired or LRU slot
+
+        A slot with a live block is never the LRU victim, so a flood of new
+        IPs can't push a blocked one out. If every probed slot is blocked,
+        None is returned - unless evict_blocks (placing a new block), which
+        takes the block closest to expiry.
+        """
+        start = int.from_bytes(key[:8], 'little') % self.max_entries
+        free = None
+        lru = None
+        lru_seen = None
+        soonest = None
+        soonest_until = None
+        for probe in range(self.PROBES):
+            index = (start + probe) % self.max_entries
+            slot = self._read(index)
+            if slot[0] == key:
+                return index
+            if not create:
+                continue
+            if free is None and (slot[0] == self.EMPTY_KEY or self._expired(slot, now)):
+                free = index
+            elif slot[5] > now:
+                if soonest_until is None or slot[5] < soonest_until:
+                    soonest, soonest_until = index, slot[5]
+            elif lru_seen is None or slot[6] < lru_seen:
+                lru, lru_seen = index, slot[6]
+        if not create:
+            return None
+        if free is None:
+            # Neighbourhood full of live entries - evict the least recently seen
+            # unblocked one
+            free = lru if lru is not None else soonest if evict_blocks else None
+            if free is None:
+                return None
+            magic, capacity, reserved, evictions = self.HEADER.unpack_from(self._map, 0)
+            self.HEADER.pack_into(self._map, 0, magic, capacity, reserved, evictions + 1)
+        self._clear(free)
+        return free
+
+    # -- ThreatStore ----------------------------------------------------------
+
+    def record_violation(self, ip, now=None, weight=1):
+        now = time.time() if now is None else now
+        key = self._key(ip)
+        self._acquire()
+        try:
+            index = self._find(key, now, create=True)
+            if index is None:
+                return weight  # every slot around it holds a live block - not tracked
+            _, _, window_start, cur, prev, blocked_until, _, _ = self._read(index)
+            window_start, cur, prev = roll_window(window_start, cur, prev, self.window, now)
+            cur += weight
+            self._write(index, key, ip, window_start, cur, prev, blocked_until, now)
+            return window_count(window_start, cur, prev, self.window, now)
+        finally:
+            self._release()
+
+    def block(self, ip, until):
+        now = time.time()
+        key = self._key(ip)
+        self._acquire()
+        try:
+            index = self._find(key, now, create=True, evict_blocks=True)
+            _, _, window_start, cur, prev, _, _, _ = self._read(index)
+            self._write(index, key, ip, window_start, cur, prev, until, now)
+        finally:
+            self._release()
+
+    def is_blocked(self, ip, now=None):
+        now = time.time() if now is None else now
+        key = self._key(ip)
+        self._acquire()
+        try:
+            index = self._find(key, now, create=False)
+            if index is None:
+                return False
+            blocked_until = self._read(index)[5]
+            if not blocked_until:
+                return False
+            if now < blocked_until:
+                return True
+            self._clear(index)
+            return False
+        finally:
+            self._release()
+
+    def _scan(self):
+        self._acquire()
+        try:
+            return [
+                slot for slot in self.SLOT.iter_unpack(self._map[self.HEADER.size:])
+                if slot[0] != self.EMPTY_KEY
+            ]
+        finally:
+            self._release()
+
+    def blocked_count(self):
+        # Full-table scan, so cache it briefly - /api/v1/status is public
+        now = time.time()
+        cached_at, count = self._blocked_cache
+        if now - cached_at < 2:
+            return count
+        count = sum(1 for slot in self._scan() if slot[5] > now)
+        self._blocked_cache = (now, count)
+        return count
+
+    def stats(self):
+        return {
+            'backend': 'shm',
+            'path': self.path,
+            'tracked_ips': len(self._scan()),
+            'max_entries': self.max_entries,
+            'evictions': self.HEADER.unpack_from(self._map, 0)[3],
+        }
+
+
+def open_threat_store(backend='memory', path='/dev/shm/b0b-threats', window=3600, max_entries=65536):
+    """Build the configured backend ('memory' or 'shm')"""
+    if backend == 'shm':
+        return SharedMemoryThreatStore(path=path, window=window, max_entries=max_entries)
+    if backend == 'memory':
+        return MemoryThreatStore(window=window, max_entries=max_entries)
+    raise ValueError(f"Unknown threat store backend: {backend}")